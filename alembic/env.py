@@ -7,7 +7,7 @@ from alembic import context
 
 from app.db.base import Base
 from app.core.config import db_settings
-from app.models import user, wallet, transaction, ledger, idempotency
+from app.models import user, wallet, transaction, ledger, idempotency, outbox, hold, scheduled_transfer, rollup, refresh_token, archive, spending_limit, transfer_review, transfer_saga, wallet_shard
 
 from dotenv import load_dotenv
 import os
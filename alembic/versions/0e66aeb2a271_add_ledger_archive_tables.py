@@ -0,0 +1,61 @@
+"""add ledger archive tables
+
+Revision ID: 0e66aeb2a271
+Revises: 63e9a64df17c
+Create Date: 2026-10-19 00:17:41.742050
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0e66aeb2a271'
+down_revision: Union[str, Sequence[str], None] = '63e9a64df17c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('archived_ledger_entries',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('transaction_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_ledger_entries_transaction_id'), 'archived_ledger_entries', ['transaction_id'], unique=False)
+    op.create_index('ix_archived_ledger_entries_wallet_id_created_at', 'archived_ledger_entries', ['wallet_id', 'created_at'], unique=False)
+    op.create_table('archived_transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('reference', sa.String(), nullable=True),
+    sa.Column('reversal_of_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_transactions_created_at'), 'archived_transactions', ['created_at'], unique=False)
+    op.create_index('ix_archived_transactions_reference_pattern', 'archived_transactions', ['reference'], unique=False, postgresql_ops={'reference': 'text_pattern_ops'})
+    op.create_table('wallet_archive_balances',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('carried_balance', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('archived_entry_count', sa.BigInteger(), nullable=False),
+    sa.Column('archived_until', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+    sa.PrimaryKeyConstraint('wallet_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('wallet_archive_balances')
+    op.drop_index('ix_archived_transactions_reference_pattern', table_name='archived_transactions', postgresql_ops={'reference': 'text_pattern_ops'})
+    op.drop_index(op.f('ix_archived_transactions_created_at'), table_name='archived_transactions')
+    op.drop_table('archived_transactions')
+    op.drop_index('ix_archived_ledger_entries_wallet_id_created_at', table_name='archived_ledger_entries')
+    op.drop_index(op.f('ix_archived_ledger_entries_transaction_id'), table_name='archived_ledger_entries')
+    op.drop_table('archived_ledger_entries')
@@ -0,0 +1,36 @@
+"""add transaction history indexes
+
+Revision ID: 1e9da15cd600
+Revises: e18a7c3f6d05
+Create Date: 2026-10-19 00:05:53.819537
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e9da15cd600'
+down_revision: Union[str, Sequence[str], None] = 'e18a7c3f6d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_ledger_entries_transaction_id'), 'ledger_entries', ['transaction_id'], unique=False)
+    op.create_index('ix_ledger_entries_wallet_id_created_at', 'ledger_entries', ['wallet_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_transactions_created_at'), 'transactions', ['created_at'], unique=False)
+    op.create_index('ix_transactions_reference_pattern', 'transactions', ['reference'], unique=False, postgresql_ops={'reference': 'text_pattern_ops'})
+    op.create_index('ix_transactions_type_created_at', 'transactions', ['type', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_type_created_at', table_name='transactions')
+    op.drop_index('ix_transactions_reference_pattern', table_name='transactions')
+    op.drop_index(op.f('ix_transactions_created_at'), table_name='transactions')
+    op.drop_index('ix_ledger_entries_wallet_id_created_at', table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_transaction_id'), table_name='ledger_entries')
@@ -0,0 +1,51 @@
+"""add scheduled transfers
+
+Revision ID: 5be0f27a9c41
+Revises: c72d94b1e3fa
+Create Date: 2026-10-18 15:20:52.117604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5be0f27a9c41'
+down_revision: Union[str, Sequence[str], None] = 'c72d94b1e3fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('scheduled_transfers',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('source_wallet_id', sa.UUID(), nullable=False),
+    sa.Column('destination_wallet_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('frequency', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('anchor_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('occurrence', sa.Integer(), nullable=False),
+    sa.Column('run_count', sa.Integer(), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['destination_wallet_id'], ['wallets.id'], ),
+    sa.ForeignKeyConstraint(['source_wallet_id'], ['wallets.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scheduled_transfers_user_id'), 'scheduled_transfers', ['user_id'], unique=False)
+    op.create_index('ix_scheduled_transfers_active_next_run_at', 'scheduled_transfers', ['next_run_at'], unique=False, postgresql_where="status = 'active'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scheduled_transfers_active_next_run_at', table_name='scheduled_transfers', postgresql_where="status = 'active'")
+    op.drop_index(op.f('ix_scheduled_transfers_user_id'), table_name='scheduled_transfers')
+    op.drop_table('scheduled_transfers')
@@ -0,0 +1,32 @@
+"""add transaction reversal link
+
+Revision ID: 8a41e6c05d92
+Revises: 3f9c1d2a7b8e
+Create Date: 2026-10-18 11:03:27.518440
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41e6c05d92'
+down_revision: Union[str, Sequence[str], None] = '3f9c1d2a7b8e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transactions', sa.Column('reversal_of_id', sa.UUID(), nullable=True))
+    op.create_unique_constraint('transactions_reversal_of_id_key', 'transactions', ['reversal_of_id'])
+    op.create_foreign_key('transactions_reversal_of_id_fkey', 'transactions', 'transactions', ['reversal_of_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('transactions_reversal_of_id_fkey', 'transactions', type_='foreignkey')
+    op.drop_constraint('transactions_reversal_of_id_key', 'transactions', type_='unique')
+    op.drop_column('transactions', 'reversal_of_id')
@@ -0,0 +1,55 @@
+"""add sharding directory and transfer sagas
+
+Revision ID: 9cd7eafd613f
+Revises: e83aef02a2a9
+Create Date: 2026-10-19 00:44:55.649925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9cd7eafd613f'
+down_revision: Union[str, Sequence[str], None] = 'e83aef02a2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('wallet_shards',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('shard', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('wallet_id')
+    )
+    op.create_index(op.f('ix_wallet_shards_user_id'), 'wallet_shards', ['user_id'], unique=False)
+    op.create_table('transfer_sagas',
+    sa.Column('transaction_id', sa.UUID(), nullable=False),
+    sa.Column('source_wallet_id', sa.UUID(), nullable=False),
+    sa.Column('destination_wallet_id', sa.UUID(), nullable=False),
+    sa.Column('destination_shard', sa.String(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['source_wallet_id'], ['wallets.id'], ),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+    sa.PrimaryKeyConstraint('transaction_id')
+    )
+    op.create_index('ix_transfer_sagas_pending_updated_at', 'transfer_sagas', ['updated_at'], unique=False, postgresql_where="status = 'pending'")
+    op.add_column('users', sa.Column('shard', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'shard')
+    op.drop_index('ix_transfer_sagas_pending_updated_at', table_name='transfer_sagas', postgresql_where="status = 'pending'")
+    op.drop_table('transfer_sagas')
+    op.drop_index(op.f('ix_wallet_shards_user_id'), table_name='wallet_shards')
+    op.drop_table('wallet_shards')
@@ -0,0 +1,32 @@
+"""add wallet archive watermark
+
+Revision ID: b7d2e4f19a03
+Revises: 9cd7eafd613f
+Create Date: 2026-10-19 14:05:41.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f19a03'
+down_revision: Union[str, Sequence[str], None] = '9cd7eafd613f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('wallets', sa.Column('archived_until', sa.DateTime(timezone=True), nullable=True))
+    # Wallets archived before the column existed
+    op.execute(
+        "UPDATE wallets SET archived_until = b.archived_until "
+        "FROM wallet_archive_balances b WHERE b.wallet_id = wallets.id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('wallets', 'archived_until')
@@ -0,0 +1,48 @@
+"""add wallet holds
+
+Revision ID: c72d94b1e3fa
+Revises: 8a41e6c05d92
+Create Date: 2026-10-18 13:41:09.884215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c72d94b1e3fa'
+down_revision: Union[str, Sequence[str], None] = '8a41e6c05d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('wallets', sa.Column('held_balance', sa.Numeric(precision=18, scale=2), server_default='0', nullable=False))
+    op.create_table('holds',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('captured_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('reference', sa.String(), nullable=True),
+    sa.Column('transaction_id', sa.UUID(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reference')
+    )
+    op.create_index(op.f('ix_holds_wallet_id'), 'holds', ['wallet_id'], unique=False)
+    op.create_index('ix_holds_active_expires_at', 'holds', ['expires_at'], unique=False, postgresql_where="status = 'active'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_holds_active_expires_at', table_name='holds', postgresql_where="status = 'active'")
+    op.drop_index(op.f('ix_holds_wallet_id'), table_name='holds')
+    op.drop_table('holds')
+    op.drop_column('wallets', 'held_balance')
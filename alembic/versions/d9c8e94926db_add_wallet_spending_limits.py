@@ -0,0 +1,40 @@
+"""add wallet spending limits
+
+Revision ID: d9c8e94926db
+Revises: f985b57fc1e8
+Create Date: 2026-10-19 00:22:56.848064
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9c8e94926db'
+down_revision: Union[str, Sequence[str], None] = 'f985b57fc1e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('wallet_spend_buckets',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('period', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.Date(), nullable=False),
+    sa.Column('spent', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+    sa.PrimaryKeyConstraint('wallet_id', 'period', 'bucket_start')
+    )
+    op.add_column('wallets', sa.Column('limit_tier', sa.String(), nullable=True))
+    op.add_column('wallets', sa.Column('daily_limit', sa.Numeric(precision=18, scale=2), nullable=True))
+    op.add_column('wallets', sa.Column('monthly_limit', sa.Numeric(precision=18, scale=2), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('wallets', 'monthly_limit')
+    op.drop_column('wallets', 'daily_limit')
+    op.drop_column('wallets', 'limit_tier')
+    op.drop_table('wallet_spend_buckets')
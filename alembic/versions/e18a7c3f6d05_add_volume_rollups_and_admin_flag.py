@@ -0,0 +1,46 @@
+"""add volume rollups and admin flag
+
+Revision ID: e18a7c3f6d05
+Revises: 5be0f27a9c41
+Create Date: 2026-10-18 17:02:36.740951
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e18a7c3f6d05'
+down_revision: Union[str, Sequence[str], None] = '5be0f27a9c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transaction_volume_rollups',
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('entry_count', sa.BigInteger(), nullable=False),
+    sa.Column('credit_volume', sa.Numeric(precision=20, scale=2), nullable=False),
+    sa.Column('debit_volume', sa.Numeric(precision=20, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_start', 'currency', 'type')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('processed_until', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index(op.f('ix_ledger_entries_created_at'), 'ledger_entries', ['created_at'], unique=False)
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), server_default=sa.text('false'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'is_admin')
+    op.drop_index(op.f('ix_ledger_entries_created_at'), table_name='ledger_entries')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('transaction_volume_rollups')
@@ -0,0 +1,43 @@
+"""add transfer reviews
+
+Revision ID: e83aef02a2a9
+Revises: d9c8e94926db
+Create Date: 2026-10-19 00:26:00.183467
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83aef02a2a9'
+down_revision: Union[str, Sequence[str], None] = 'd9c8e94926db'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transfer_reviews',
+    sa.Column('transaction_id', sa.UUID(), nullable=False),
+    sa.Column('source_wallet_id', sa.UUID(), nullable=False),
+    sa.Column('destination_wallet_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('reasons', sa.String(), nullable=False),
+    sa.Column('reviewed_by', sa.UUID(), nullable=True),
+    sa.Column('reviewed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['destination_wallet_id'], ['wallets.id'], ),
+    sa.ForeignKeyConstraint(['reviewed_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['source_wallet_id'], ['wallets.id'], ),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+    sa.PrimaryKeyConstraint('transaction_id')
+    )
+    op.create_index('ix_transfer_reviews_open_created_at', 'transfer_reviews', ['created_at'], unique=False, postgresql_where='reviewed_at IS NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transfer_reviews_open_created_at', table_name='transfer_reviews', postgresql_where='reviewed_at IS NULL')
+    op.drop_table('transfer_reviews')
@@ -0,0 +1,27 @@
+"""add wallet version
+
+Revision ID: f985b57fc1e8
+Revises: 0e66aeb2a271
+Create Date: 2026-10-19 00:20:13.318954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f985b57fc1e8'
+down_revision: Union[str, Sequence[str], None] = '0e66aeb2a271'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('wallets', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('wallets', 'version')
@@ -0,0 +1,32 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _orjson_default(value: Any) -> Any:
+    # orjson handles UUID, datetime and Enum natively; Decimal is the only
+    # type we return that it doesn't know. Pydantic renders it as a string too.
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError
+
+
+class ORJSONModelResponse(JSONResponse):
+    # Returning this directly from an endpoint skips FastAPI's response_model
+    # re-validation, so only use it for data we built ourselves from the DB.
+    # response_model is still declared on the route for the OpenAPI schema.
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_UTC_Z,
+        )
@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.routers import auth, wallet
+from app.api.routers import auth, wallet, scheduled_transfers, admin, health
 
 master_router = APIRouter()
 
 master_router.include_router(auth.router)
-master_router.include_router(wallet.router)
\ No newline at end of file
+master_router.include_router(wallet.router)
+master_router.include_router(scheduled_transfers.router)
+master_router.include_router(admin.router)
+master_router.include_router(health.router)
\ No newline at end of file
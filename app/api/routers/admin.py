@@ -0,0 +1,255 @@
+from datetime import datetime
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.responses import ORJSONModelResponse
+from app.core.config import db_settings
+from app.schemas.auth import BulkProvisionRead, BulkProvisionUsers
+from app.schemas.analytics import RollupGranularity, VolumeRollupRead
+from app.schemas.dependencies import (
+    AdminTransactionServiceDep,
+    AdminUserDep,
+    AdminWalletServiceDep,
+    AnalyticsServiceDep,
+    AuthServiceDep,
+)
+from app.models.transfer_review import TransferReview
+from app.schemas.transaction import (
+    RecentTransactionRead,
+    TransactionFilter,
+    TransactionStatus,
+    TransactionType,
+    TransferReviewRead,
+)
+from app.services.transaction import TransactionNotFoundError, TransferNotPendingError
+from app.schemas.wallet import Currency, UpdateSpendingLimits, WalletLimitsRead
+from app.services.wallet import (
+    InsufficientBalanceError,
+    SpendingLimitExceededError,
+    WalletNotFoundError,
+    WalletVersionConflictError,
+)
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get(
+    "/volumes",
+    response_model=list[VolumeRollupRead],
+)
+def transaction_volumes(
+    admin: AdminUserDep,
+    service: AnalyticsServiceDep,
+    start: datetime,
+    end: datetime,
+    granularity: RollupGranularity = RollupGranularity.HOUR,
+    currency: Currency | None = None,
+    type: TransactionType | None = None,
+):
+    if end <= start:
+        raise HTTPException(
+            status_code=400,
+            detail="end must be after start.",
+        )
+
+    return service.get_volume(
+        granularity=granularity,
+        start=start,
+        end=end,
+        currency=currency.value if currency else None,
+        transaction_type=type.value if type else None,
+    )
+
+
+@router.get(
+    "/transactions",
+    response_model=list[RecentTransactionRead],
+)
+def search_transactions(
+    admin: AdminUserDep,
+    transaction_service: AdminTransactionServiceDep,
+    filters: Annotated[TransactionFilter, Depends()],
+    wallet_id: UUID | None = None,
+    limit: int = Query(
+        default=50,
+        ge=1,
+        le=500,
+    ),
+):
+    return ORJSONModelResponse(
+        transaction_service.get_recent_transaction_rows(
+            wallet_id=wallet_id,
+            limit=limit,
+            filters=filters,
+        )
+    )
+
+
+def build_review_read(review: TransferReview, status: str) -> TransferReviewRead:
+    return TransferReviewRead(
+        transaction_id=review.transaction_id,
+        source_wallet_id=review.source_wallet_id,
+        destination_wallet_id=review.destination_wallet_id,
+        amount=review.amount,
+        status=TransactionStatus(status),
+        reasons=review.reasons.splitlines(),
+        reviewed_by=review.reviewed_by,
+        reviewed_at=review.reviewed_at,
+        created_at=review.created_at,
+    )
+
+
+@router.get(
+    "/transfer-reviews",
+    response_model=list[TransferReviewRead],
+)
+def transfer_reviews(
+    admin: AdminUserDep,
+    transaction_service: AdminTransactionServiceDep,
+    pending_only: bool = True,
+    limit: int = Query(
+        default=50,
+        ge=1,
+        le=500,
+    ),
+):
+    return [
+        build_review_read(review, status)
+        for review, status in transaction_service.get_transfer_reviews(
+            pending_only=pending_only,
+            limit=limit,
+        )
+    ]
+
+
+@router.post(
+    "/transfer-reviews/{transaction_id}/approve",
+    response_model=TransferReviewRead,
+)
+def approve_transfer(
+    admin: AdminUserDep,
+    transaction_id: UUID,
+    transaction_service: AdminTransactionServiceDep,
+):
+    try:
+        review = transaction_service.approve_transfer(
+            transaction_id=transaction_id,
+            reviewer_id=admin.id,
+        )
+
+    except TransactionNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Transfer review not found.",
+        )
+
+    except TransferNotPendingError:
+        raise HTTPException(
+            status_code=409,
+            detail="Transfer has already been decided.",
+        )
+
+    except (InsufficientBalanceError, SpendingLimitExceededError) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e) or "Insufficient wallet balance.",
+        )
+
+    return build_review_read(review, TransactionStatus.COMPLETED)
+
+
+@router.post(
+    "/transfer-reviews/{transaction_id}/reject",
+    response_model=TransferReviewRead,
+)
+def reject_transfer(
+    admin: AdminUserDep,
+    transaction_id: UUID,
+    transaction_service: AdminTransactionServiceDep,
+):
+    try:
+        review = transaction_service.reject_transfer(
+            transaction_id=transaction_id,
+            reviewer_id=admin.id,
+        )
+
+    except TransactionNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Transfer review not found.",
+        )
+
+    except TransferNotPendingError:
+        raise HTTPException(
+            status_code=409,
+            detail="Transfer has already been decided.",
+        )
+
+    return build_review_read(review, TransactionStatus.FAILED)
+
+
+@router.post(
+    "/users/bulk",
+    response_model=BulkProvisionRead,
+)
+def provision_users(
+    admin: AdminUserDep,
+    auth_service: AuthServiceDep,
+    data: BulkProvisionUsers,
+):
+    if len(data.users) > db_settings.PROVISION_MAX_USERS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=(
+                f"At most {db_settings.PROVISION_MAX_USERS_PER_REQUEST} users per request; "
+                "use the provision_users CLI for larger imports."
+            ),
+        )
+
+    return auth_service.bulk_create_users_with_wallets(
+        data.users,
+        currencies=data.currencies,
+    )
+
+
+@router.put(
+    "/wallets/{wallet_id}/limits",
+    response_model=WalletLimitsRead,
+)
+def update_wallet_limits(
+    admin: AdminUserDep,
+    wallet_id: UUID,
+    data: UpdateSpendingLimits,
+    service: AdminWalletServiceDep,
+):
+    if data.tier is not None and data.tier not in db_settings.SPENDING_LIMIT_TIERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown limit tier: {data.tier}.",
+        )
+
+    # Only the fields sent are changed
+    values = data.model_dump(include=data.model_fields_set)
+
+    if "tier" in values:
+        values["limit_tier"] = values.pop("tier")
+
+    try:
+        wallet = service.update_spending_limits(wallet_id, values)
+
+    except WalletNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Wallet not found.",
+        )
+
+    except WalletVersionConflictError:
+        raise HTTPException(
+            status_code=409,
+            detail="Wallet is being updated concurrently, try again.",
+        )
+
+    return service.get_limits(wallet)
@@ -3,12 +3,15 @@ from typing import Annotated
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.schemas.auth import AuthBase
+from app.schemas.auth import AuthBase, RefreshTokenRequest, TokenRead
 from app.schemas.user import UserRead
-from app.services.auth import UserAlreadyExistsError, WeakPasswordError
+from app.services.auth import (
+    InvalidRefreshTokenError,
+    UserAlreadyExistsError,
+    WeakPasswordError,
+)
 
-from app.db.redis_db import add_jti_to_blacklist
-from app.schemas.dependencies import get_access_token, AuthServiceDep
+from app.schemas.dependencies import get_access_token, limit_login, AuthServiceDep
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -36,31 +39,57 @@ def signup(
     return user
 
 
-@router.post("/login")
+@router.post(
+    "/login",
+    response_model=TokenRead,
+    dependencies=[Depends(limit_login)],
+)
 def login(
     request_form: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_service: AuthServiceDep,
 ):
 
-    token = auth_service.authenticate_user(
+    tokens = auth_service.authenticate_user(
         email=request_form.username, password=request_form.password
     )
 
-    if not token:
+    if not tokens:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
         )
 
-    return {
-        "access_token": token,
-        "type": "jwt",
-    }
+    return tokens
+
+
+@router.post("/refresh", response_model=TokenRead)
+def refresh(
+    data: RefreshTokenRequest,
+    auth_service: AuthServiceDep,
+):
+    try:
+        return auth_service.refresh(data.refresh_token)
+
+    except InvalidRefreshTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
 
 
 @router.get("/logout")
 def logout_user(
     token_data: Annotated[dict, Depends(get_access_token)],
+    auth_service: AuthServiceDep,
 ):
-    add_jti_to_blacklist(token_data["jti"])
+    auth_service.logout(token_data["user"]["id"], session_id=token_data.get("sid"))
     return {"details": "Logged out"}
+
+
+@router.post("/logout-all")
+def logout_everywhere(
+    token_data: Annotated[dict, Depends(get_access_token)],
+    auth_service: AuthServiceDep,
+):
+    auth_service.logout_everywhere(token_data["user"]["id"])
+    return {"details": "Logged out of all sessions"}
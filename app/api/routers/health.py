@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Response, status
+
+from app.schemas.health import HealthRead, HealthStatus
+from app.services.health import health_monitor
+
+
+router = APIRouter(tags=["health"])
+
+
+# Both are async on purpose: they never wait for a request thread, so they
+# still answer when every thread is stuck waiting on the database.
+
+
+@router.get(
+    "/healthz",
+    response_model=HealthRead,
+)
+async def healthz():
+    # Liveness: the process is up and serving. Dependency trouble shows in
+    # the body but doesn't fail the probe, since restarting the worker
+    # wouldn't fix Postgres or Redis.
+    return await health_monitor.report()
+
+
+@router.get(
+    "/readyz",
+    response_model=HealthRead,
+    responses={503: {"model": HealthRead}},
+)
+async def readyz(response: Response):
+    # Readiness: 503 while a dependency is down or slow, or the DB pool is
+    # nearly full, so the load balancer routes around this worker until it
+    # recovers.
+    report = await health_monitor.report()
+
+    if report.status != HealthStatus.OK:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return report
@@ -0,0 +1,82 @@
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException
+
+from app.schemas.dependencies import UserDep, ScheduledTransferServiceDep
+from app.schemas.scheduled_transfer import CreateScheduledTransfer, ScheduledTransferRead
+from app.services.scheduled_transfer import (
+    ScheduledTransferNotActiveError,
+    ScheduledTransferNotFoundError,
+)
+from app.services.transaction import InvalidTransferError, WalletCurrencyMismatchError
+from app.services.wallet import WalletNotFoundError
+
+
+router = APIRouter(prefix="/scheduled-transfers", tags=["scheduled transfers"])
+
+
+@router.post(
+    "/",
+    response_model=ScheduledTransferRead,
+)
+def create_scheduled_transfer(
+    user: UserDep,
+    data: CreateScheduledTransfer,
+    service: ScheduledTransferServiceDep,
+):
+    try:
+        return service.create(user_id=user.id, data=data)
+
+    except WalletNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Wallet not found.",
+        )
+
+    except WalletCurrencyMismatchError:
+        raise HTTPException(
+            status_code=400,
+            detail="Source and destination wallets must use the same currency.",
+        )
+
+    except InvalidTransferError:
+        raise HTTPException(
+            status_code=400,
+            detail="Source and destination wallets must be different.",
+        )
+
+
+@router.get(
+    "/",
+    response_model=list[ScheduledTransferRead],
+)
+def list_scheduled_transfers(
+    user: UserDep,
+    service: ScheduledTransferServiceDep,
+):
+    return service.list_for_user(user_id=user.id)
+
+
+@router.delete(
+    "/{schedule_id}",
+    response_model=ScheduledTransferRead,
+)
+def cancel_scheduled_transfer(
+    user: UserDep,
+    schedule_id: UUID,
+    service: ScheduledTransferServiceDep,
+):
+    try:
+        return service.cancel(user_id=user.id, schedule_id=schedule_id)
+
+    except ScheduledTransferNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Scheduled transfer not found.",
+        )
+
+    except ScheduledTransferNotActiveError:
+        raise HTTPException(
+            status_code=409,
+            detail="Scheduled transfer is no longer active.",
+        )
@@ -1,22 +1,100 @@
+import csv
+import io
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.exc import IntegrityError
 
-from app.schemas.dependencies import UserDep, TransactionServiceDep, WalletServiceDep
-from app.schemas.wallet import WalletReadItem, WalletsRead
+from app.api.responses import ORJSONModelResponse
+from app.models.ledger import LedgerEntry
+from app.models.transaction import Transaction
+from app.models.wallet import Wallet
+from app.schemas.dependencies import (
+    ExpectedVersionDep,
+    ShardedTransferServiceDep,
+    UserDep,
+    TransactionServiceDep,
+    WalletServiceDep,
+    enforce_rate_limit,
+    get_access_token,
+    limit_transfer_by_user,
+    wallet_rate_limit_key,
+)
+from app.schemas.wallet import WalletLimitsRead, WalletReadItem, WalletsRead
+from app.schemas.hold import CaptureHold, CreateHold, HoldRead
+from app.schemas.fx import CreateFxQuote, CreateFxTransfer, FxQuoteRead, FxTransferRead
 from app.schemas.transaction import (
     CreateTransaction,
     RecentTransactionsRead,
+    TransactionFilter,
     TransactionOperationRead,
+    TransactionStatus,
+    TransactionType,
     CreateTransfer,
     TransferRead,
+    CreateJournal,
+    JournalRead,
+)
+from app.services.wallet import (
+    WalletNotFoundError,
+    InsufficientBalanceError,
+    SpendingLimitExceededError,
+    WalletVersionConflictError,
+)
+from app.services.fx import (
+    FxHouseWalletNotConfiguredError,
+    FxLiquidityError,
+    FxRateUnavailableError,
+    InvalidFxQuoteError,
+    create_quote,
+    verify_quote,
+)
+from app.services.transaction import (
+    WalletCurrencyMismatchError,
+    InvalidTransferError,
+    HoldNotFoundError,
+    HoldNotActiveError,
+    InvalidHoldAmountError,
+    InvalidJournalError,
+    FxTransferReviewRequiredError,
+    JournalReviewRequiredError,
+)
+from app.services.sharding import CrossShardFxTransferError, TransferReviewRequiredError
+
+
+# Newest first, like the history page
+EXPORT_COLUMNS = ["transaction_id", "type", "status", "amount", "currency", "reference", "created_at"]
+EXPORT_MAX_ROWS = 10_000
+
+
+router = APIRouter(
+    prefix="/wallet",
+    tags=["wallet"],
+    default_response_class=ORJSONModelResponse,
 )
-from app.services.wallet import WalletNotFoundError, InsufficientBalanceError
-from app.services.transaction import WalletCurrencyMismatchError, InvalidTransferError
 
 
-router = APIRouter(prefix="/wallet", tags=["wallet"])
+# Everything below comes straight from rows we just wrote or read, so it is
+# built with model_construct instead of being validated field by field again.
+def build_operation_read(
+    transaction: Transaction,
+    ledger_entry: LedgerEntry,
+    wallet: Wallet,
+) -> TransactionOperationRead:
+
+    return TransactionOperationRead.model_construct(
+        transaction_id=transaction.id,
+        wallet_id=wallet.id,
+        currency=wallet.currency,
+        amount=ledger_entry.amount,
+        balance=wallet.balance,
+        wallet_version=wallet.version,
+        type=TransactionType(transaction.type),
+        status=TransactionStatus(transaction.status),
+        reference=transaction.reference,
+        created_at=transaction.created_at,
+    )
 
 
 @router.get(
@@ -29,7 +107,7 @@ def wallet(
     wallet_service: WalletServiceDep,
     wallet_id: UUID | None = None,
 ):
-    wallets = user.wallets
+    wallets = wallet_service.get_user_wallets(user.id)
     # if we always create wallet on signup, this may never happen; still safer to handle.
     if not wallets:
         raise HTTPException(
@@ -64,6 +142,7 @@ def transactions(
     user: UserDep,
     wallet_service: WalletServiceDep,
     transaction_service: TransactionServiceDep,
+    filters: Annotated[TransactionFilter, Depends()],
     wallet_id: UUID | None = None,
     limit: int | None = Query(
         default=20,
@@ -77,15 +156,17 @@ def transactions(
             wallet_id=wallet_id,
         )
 
-        transactions = transaction_service.get_recent_transactions(
+        transactions = transaction_service.get_recent_transaction_rows(
             wallet_id=active_wallet.id,
             limit=limit,
+            filters=filters,
         )
 
-        return RecentTransactionsRead(
-            transactions=transactions,
-            currency=active_wallet.currency
-        )
+        # Rows go to orjson as they are; same JSON as RecentTransactionsRead
+        return ORJSONModelResponse({
+            "currency": active_wallet.currency,
+            "transactions": transactions,
+        })
     
     except WalletNotFoundError:
         raise HTTPException(
@@ -94,6 +175,91 @@ def transactions(
         )
 
 
+@router.get(
+    "/transactions/export",
+    name="transactions_export",
+    response_class=Response,
+    responses={200: {"content": {"text/csv": {}}}},
+)
+def transactions_export(
+    user: UserDep,
+    wallet_service: WalletServiceDep,
+    transaction_service: TransactionServiceDep,
+    filters: Annotated[TransactionFilter, Depends()],
+    wallet_id: UUID | None = None,
+    limit: int = Query(
+        default=1000,
+        ge=1,
+        le=EXPORT_MAX_ROWS,
+    ),
+):
+    try:
+        active_wallet = wallet_service.get_active_wallet(
+            user=user,
+            wallet_id=wallet_id,
+        )
+
+    except WalletNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Wallet not found.",
+        )
+
+    rows = transaction_service.get_recent_transaction_rows(
+        wallet_id=active_wallet.id,
+        limit=limit,
+        filters=filters,
+    )
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(
+        (
+            row.transaction_id,
+            row.type,
+            row.status,
+            row.amount,
+            active_wallet.currency,
+            row.reference,
+            row.created_at.isoformat(),
+        )
+        for row in rows
+    )
+
+    return Response(
+        content=out.getvalue(),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions-{active_wallet.id}.csv"',
+        },
+    )
+
+
+@router.get(
+    "/limits",
+    response_model=WalletLimitsRead,
+)
+def limits(
+    user: UserDep,
+    wallet_service: WalletServiceDep,
+    wallet_id: UUID | None = None,
+):
+    try:
+        active_wallet = wallet_service.get_active_wallet(
+            user=user,
+            wallet_id=wallet_id,
+        )
+
+    except WalletNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Wallet not found.",
+        )
+
+    return wallet_service.get_limits(active_wallet)
+
+
 @router.post(
     "/deposit",
     response_model=TransactionOperationRead,
@@ -103,6 +269,7 @@ def deposit(
     data: CreateTransaction,
     wallet_id: UUID,
     service: TransactionServiceDep,
+    expected_version: ExpectedVersionDep,
 ):
     try:
         transaction, ledger_entry, wallet = service.deposit(
@@ -110,18 +277,11 @@ def deposit(
             wallet_id=wallet_id,
             amount=data.amount,
             reference=data.reference,
+            expected_version=expected_version,
         )
 
-        return TransactionOperationRead(
-            transaction_id=transaction.id,
-            wallet_id=wallet.id,
-            currency=wallet.currency,
-            amount=ledger_entry.amount,
-            balance=wallet.balance,
-            type=transaction.type,
-            status=transaction.status,
-            reference=transaction.reference,
-            created_at=transaction.created_at,
+        return ORJSONModelResponse(
+            build_operation_read(transaction, ledger_entry, wallet)
         )
 
     except WalletNotFoundError:
@@ -130,6 +290,12 @@ def deposit(
             detail="Wallet not found.",
         )
 
+    except WalletVersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Wallet has changed; current version is {e.current_version}.",
+        )
+
     except IntegrityError:
         raise HTTPException(
             status_code=409,
@@ -146,6 +312,7 @@ def withdraw(
     data: CreateTransaction,
     wallet_id: UUID,
     service: TransactionServiceDep,
+    expected_version: ExpectedVersionDep,
 ):
     try:
         transaction, ledger_entry, wallet = service.withdraw(
@@ -153,18 +320,11 @@ def withdraw(
             wallet_id=wallet_id,
             amount=data.amount,
             reference=data.reference,
+            expected_version=expected_version,
         )
 
-        return TransactionOperationRead(
-            transaction_id=transaction.id,
-            wallet_id=wallet.id,
-            currency=wallet.currency,
-            amount=ledger_entry.amount,
-            balance=wallet.balance,
-            type=transaction.type,
-            status=transaction.status,
-            reference=transaction.reference,
-            created_at=transaction.created_at,
+        return ORJSONModelResponse(
+            build_operation_read(transaction, ledger_entry, wallet)
         )
 
     except WalletNotFoundError:
@@ -173,12 +333,24 @@ def withdraw(
             detail="Wallet not found.",
         )
 
+    except WalletVersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Wallet has changed; current version is {e.current_version}.",
+        )
+
     except InsufficientBalanceError:
         raise HTTPException(
             status_code=400,
             detail="Insufficient wallet balance.",
         )
 
+    except SpendingLimitExceededError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
     except IntegrityError:
         raise HTTPException(
             status_code=409,
@@ -189,12 +361,15 @@ def withdraw(
 @router.post(
     "/transfer",
     response_model=TransferRead,
+    dependencies=[Depends(limit_transfer_by_user)],
 )
 def transfer(
     user: UserDep,
     data: CreateTransfer,
-    service: TransactionServiceDep,
+    service: ShardedTransferServiceDep,
 ):
+    enforce_rate_limit("transfer", "wallet", wallet_rate_limit_key(user.id, data.source_wallet_id))
+
     try:
         (
             transaction,
@@ -208,17 +383,26 @@ def transfer(
             reference=data.reference,
         )
 
-        return TransferRead(
-            transaction_id=transaction.id,
-            wallet_id=source_wallet.id,
-            currency=source_wallet.currency,
-            destination_wallet_id=destination_wallet.id,
-            amount=data.amount,
-            balance=source_wallet.balance,
-            type=transaction.type,
-            status=transaction.status,
-            reference=transaction.reference,
-            created_at=transaction.created_at,
+        # A transfer parked for review is accepted but hasn't moved any money yet
+        return ORJSONModelResponse(
+            TransferRead.model_construct(
+                transaction_id=transaction.id,
+                wallet_id=source_wallet.id,
+                currency=source_wallet.currency,
+                destination_wallet_id=destination_wallet.id,
+                amount=data.amount,
+                balance=source_wallet.balance,
+                wallet_version=source_wallet.version,
+                type=TransactionType(transaction.type),
+                status=TransactionStatus(transaction.status),
+                reference=transaction.reference,
+                created_at=transaction.created_at,
+            ),
+            status_code=(
+                status.HTTP_202_ACCEPTED
+                if transaction.status == TransactionStatus.PENDING
+                else status.HTTP_200_OK
+            ),
         )
 
     except WalletNotFoundError:
@@ -233,6 +417,12 @@ def transfer(
             detail="Insufficient wallet balance.",
         )
 
+    except SpendingLimitExceededError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
     except WalletCurrencyMismatchError:
         raise HTTPException(
             status_code=400,
@@ -251,6 +441,338 @@ def transfer(
             detail="Source and destination wallets must be different.",
         )
 
+    except TransferReviewRequiredError as e:
+        # Cross-shard transfers can't be parked for review
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e),
+        )
+
+    except IntegrityError:
+        raise HTTPException(
+            status_code=409,
+            detail="Transaction reference already exists.",
+        )
+
+
+@router.post(
+    "/journal",
+    response_model=JournalRead,
+    dependencies=[Depends(limit_transfer_by_user)],
+)
+def journal(
+    user: UserDep,
+    data: CreateJournal,
+    service: TransactionServiceDep,
+):
+    try:
+        return ORJSONModelResponse(
+            service.post_journal(
+                user_id=user.id,
+                legs=data.legs,
+                reference=data.reference,
+            )
+        )
+
+    except WalletNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Wallet not found.",
+        )
+
+    except InsufficientBalanceError:
+        raise HTTPException(
+            status_code=400,
+            detail="Insufficient wallet balance.",
+        )
+
+    except SpendingLimitExceededError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    except WalletCurrencyMismatchError:
+        raise HTTPException(
+            status_code=400,
+            detail="All journal legs must use the same currency.",
+        )
+
+    except InvalidJournalError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    except JournalReviewRequiredError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e),
+        )
+
+    except IntegrityError:
+        raise HTTPException(
+            status_code=409,
+            detail="Transaction reference already exists.",
+        )
+
+
+@router.post(
+    "/holds",
+    response_model=HoldRead,
+)
+def create_hold(
+    user: UserDep,
+    data: CreateHold,
+    wallet_id: UUID,
+    service: TransactionServiceDep,
+):
+    try:
+        hold, wallet = service.hold(
+            user_id=user.id,
+            wallet_id=wallet_id,
+            amount=data.amount,
+            reference=data.reference,
+            expires_in_seconds=data.expires_in_seconds,
+        )
+
+        return hold
+
+    except WalletNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Wallet not found.",
+        )
+
+    except InsufficientBalanceError:
+        raise HTTPException(
+            status_code=400,
+            detail="Insufficient wallet balance.",
+        )
+
+    except IntegrityError:
+        raise HTTPException(
+            status_code=409,
+            detail="Hold reference already exists.",
+        )
+
+
+@router.post(
+    "/holds/{hold_id}/capture",
+    response_model=TransactionOperationRead,
+)
+def capture_hold(
+    user: UserDep,
+    hold_id: UUID,
+    data: CaptureHold,
+    service: TransactionServiceDep,
+):
+    try:
+        transaction, ledger_entry, wallet = service.capture(
+            user_id=user.id,
+            hold_id=hold_id,
+            amount=data.amount,
+        )
+
+        return ORJSONModelResponse(
+            build_operation_read(transaction, ledger_entry, wallet)
+        )
+
+    except HoldNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Hold not found.",
+        )
+
+    except HoldNotActiveError:
+        raise HTTPException(
+            status_code=409,
+            detail="Hold is no longer active.",
+        )
+
+    except InvalidHoldAmountError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    except InsufficientBalanceError:
+        raise HTTPException(
+            status_code=400,
+            detail="Insufficient wallet balance.",
+        )
+
+    except SpendingLimitExceededError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+
+@router.post(
+    "/holds/{hold_id}/release",
+    response_model=HoldRead,
+)
+def release_hold(
+    user: UserDep,
+    hold_id: UUID,
+    service: TransactionServiceDep,
+):
+    try:
+        return service.release(
+            user_id=user.id,
+            hold_id=hold_id,
+        )
+
+    except HoldNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Hold not found.",
+        )
+
+    except HoldNotActiveError:
+        raise HTTPException(
+            status_code=409,
+            detail="Hold is no longer active.",
+        )
+
+
+# Only needs the token, not the User row: quoting is served entirely from memory.
+@router.post(
+    "/fx/quote",
+    response_model=FxQuoteRead,
+)
+def fx_quote(
+    token_data: Annotated[dict, Depends(get_access_token)],
+    data: CreateFxQuote,
+):
+    try:
+        quote, quote_token = create_quote(
+            user_id=token_data["user"]["id"],
+            source_currency=data.source_currency,
+            destination_currency=data.destination_currency,
+            amount=data.amount,
+        )
+
+    except FxRateUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+        )
+
+    return ORJSONModelResponse(
+        FxQuoteRead.model_construct(
+            quote_token=quote_token,
+            source_currency=quote.source_currency,
+            destination_currency=quote.destination_currency,
+            source_amount=quote.source_amount,
+            destination_amount=quote.destination_amount,
+            rate=quote.rate,
+            expires_at=quote.expires_at,
+        )
+    )
+
+
+@router.post(
+    "/fx/transfer",
+    response_model=FxTransferRead,
+    dependencies=[Depends(limit_transfer_by_user)],
+)
+def fx_transfer(
+    user: UserDep,
+    data: CreateFxTransfer,
+    service: ShardedTransferServiceDep,
+):
+    enforce_rate_limit("transfer", "wallet", wallet_rate_limit_key(user.id, data.source_wallet_id))
+
+    try:
+        quote = verify_quote(data.quote_token, user_id=str(user.id))
+
+        (
+            transaction,
+            source_wallet,
+            destination_wallet,
+        ) = service.fx_transfer(
+            user_id=user.id,
+            source_wallet_id=data.source_wallet_id,
+            destination_wallet_id=data.destination_wallet_id,
+            quote=quote,
+            reference=data.reference,
+        )
+
+        return ORJSONModelResponse(
+            FxTransferRead.model_construct(
+                transaction_id=transaction.id,
+                wallet_id=source_wallet.id,
+                currency=source_wallet.currency,
+                destination_wallet_id=destination_wallet.id,
+                destination_currency=destination_wallet.currency,
+                amount=quote.source_amount,
+                destination_amount=quote.destination_amount,
+                rate=quote.rate,
+                balance=source_wallet.balance,
+                wallet_version=source_wallet.version,
+                type=TransactionType(transaction.type),
+                status=TransactionStatus(transaction.status),
+                reference=transaction.reference,
+                created_at=transaction.created_at,
+            )
+        )
+
+    except InvalidFxQuoteError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    except WalletNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Wallet not found.",
+        )
+
+    except InsufficientBalanceError:
+        raise HTTPException(
+            status_code=400,
+            detail="Insufficient wallet balance.",
+        )
+
+    except SpendingLimitExceededError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    except WalletCurrencyMismatchError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+
+    except InvalidTransferError:
+        raise HTTPException(
+            status_code=400,
+            detail="Source and destination wallets must be different.",
+        )
+
+    except FxTransferReviewRequiredError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e),
+        )
+
+    except CrossShardFxTransferError:
+        raise HTTPException(
+            status_code=400,
+            detail="Cross-currency transfers to this wallet are not supported.",
+        )
+
+    except (FxHouseWalletNotConfiguredError, FxLiquidityError):
+        raise HTTPException(
+            status_code=503,
+            detail="Currency exchange is currently unavailable.",
+        )
+
     except IntegrityError:
         raise HTTPException(
             status_code=409,
@@ -1,16 +1,175 @@
+from decimal import Decimal
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 _base_config = SettingsConfigDict(env_file=".env", env_ignore_empty=True, extra="ignore")
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Connections per process: a pool of DB_POOL_SIZE plus up to
+    # DB_MAX_OVERFLOW extra ones under load.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Access tokens are short-lived; clients renew them with a refresh token.
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
 
     REDIS_HOST: str
     REDIS_PORT: str
 
+    # Token revocation. Each process keeps the per-user "issued before"
+    # watermarks in memory and hears about new ones on this pub/sub channel.
+    TOKEN_REVOCATION_CHANNEL: str = "wallet-ledger:token-revocations"
+
+    # Production server (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 4
+    # How long a worker may spend finishing in-flight requests after SIGTERM
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_PRELOAD: bool = False
+
+    # Sharding. Extra databases for wallets, transactions and ledger entries,
+    # by name, e.g. SHARD_DATABASE_URLS='{"s1": "postgresql://.../ledger_s1"}'.
+    # DATABASE_URL stays the catalog (users, auth, the shard directory) and is
+    # itself the shard "main". New users are placed on a shard by consistent
+    # hashing with SHARD_VNODES points per shard. Unset: everything on main.
+    SHARD_DATABASE_URLS: dict[str, str] = {}
+    SHARD_VNODES: int = 64
+    # A cross-shard transfer still pending after this long is picked up by
+    # the saga worker (app.workers.transfer_sagas).
+    SAGA_RETRY_AFTER_SECONDS: int = 30
+    SAGA_BATCH_SIZE: int = 100
+
+    # Health probes (/healthz, /readyz). Dependency checks are cached for
+    # HEALTH_CACHE_SECONDS, so frequent probes don't add load. A worker is
+    # reported degraded, and not ready, once its DB pool is this full or a
+    # dependency answers slower than the latency threshold.
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_POOL_SATURATION_THRESHOLD: float = 0.9
+    HEALTH_LATENCY_THRESHOLD_MS: float = 250.0
+
+    # Request profiling (off unless enabled; nothing is installed otherwise).
+    # A request is profiled when it is picked by the sample rate or sends
+    # "X-Profile: <PROFILING_ADMIN_TOKEN>"; with PROFILING_SLOW_MS set every
+    # request is profiled and kept if it took at least that long. Profiles go
+    # to PROFILING_DIR, oldest removed beyond PROFILING_MAX_FILES.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SLOW_MS: float | None = None
+    PROFILING_ADMIN_TOKEN: str | None = None
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 200
+
+    # Outbox relay
+    OUTBOX_STREAM: str = "wallet-ledger:events"
+    OUTBOX_STREAM_MAXLEN: int = 1_000_000
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+
+    # Rate limiting. Keys are "<route>:<principal>", values "<count>/<period>"
+    # with period one of second, minute, hour (e.g. "30/minute").
+    # Override with a JSON object, e.g. RATE_LIMITS='{"transfer:user": "5/second"}'.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: dict[str, str] = {
+        "transfer:user": "60/minute",
+        "transfer:wallet": "60/minute",
+        "login:ip": "30/minute",
+        "login:email": "10/minute",
+    }
+    # Share of a bucket a process may reserve from Redis in one call and
+    # spend locally, and how long an unspent reservation is kept.
+    RATE_LIMIT_LOCAL_LEASE_FRACTION: float = 0.1
+    RATE_LIMIT_LOCAL_LEASE_TTL_SECONDS: float = 1.0
+
+    # Amount storage: "numeric" (NUMERIC(18, 2) columns) or "minor_units"
+    # (BIGINT hundredths). Switch only together with a conversion of the
+    # database: python -m app.workers.convert_amounts --to minor_units.
+    AMOUNT_STORAGE: Literal["numeric", "minor_units"] = "numeric"
+
+    # Optimistic concurrency: how often a compare-and-swap wallet update is
+    # retried against a fresh read before the conflict is given up on.
+    WALLET_UPDATE_ATTEMPTS: int = 5
+
+    # Outgoing spending limits per tier, in the wallet's currency. Keys are
+    # "day" and "month" (UTC calendar windows); a missing key means no limit.
+    # Wallets can override either one. Override with a JSON object, e.g.
+    # SPENDING_LIMIT_TIERS='{"standard": {"day": "500"}, "premium": {}}'.
+    SPENDING_LIMIT_TIERS: dict[str, dict[str, Decimal]] = {
+        "standard": {"day": Decimal("10000"), "month": Decimal("50000")},
+        "unlimited": {},
+    }
+    SPENDING_LIMIT_DEFAULT_TIER: str = "standard"
+
+    # Transfer risk checks. Velocity limits are keyed "<party>:<window>",
+    # party one of sender, receiver, pair and window one of minute, hour,
+    # day; each sets a "count" and/or an "amount" (per currency). Transfers
+    # that would go over one are parked as pending for review.
+    RISK_CHECKS_ENABLED: bool = True
+    RISK_VELOCITY_LIMITS: dict[str, dict[str, Decimal]] = {
+        "sender:minute": {"count": Decimal("10")},
+        "sender:hour": {"amount": Decimal("20000")},
+        "sender:day": {"count": Decimal("200"), "amount": Decimal("50000")},
+        "receiver:minute": {"count": Decimal("30")},
+        "pair:hour": {"count": Decimal("20")},
+        "pair:day": {"amount": Decimal("20000")},
+    }
+    # Slots per window; more slots make the windows slide more smoothly
+    RISK_VELOCITY_SLOTS: int = 60
+
+    # Holds
+    HOLD_DEFAULT_TTL_SECONDS: int = 7 * 24 * 3600
+    HOLD_SWEEP_BATCH_SIZE: int = 500
+    HOLD_SWEEP_INTERVAL_SECONDS: float = 30.0
+
+    # Scheduled transfers
+    SCHEDULER_BATCH_SIZE: int = 200
+    SCHEDULER_POLL_INTERVAL_SECONDS: float = 5.0
+    # How long a claimed job stays invisible to other workers before it is
+    # considered abandoned and picked up again.
+    SCHEDULER_LEASE_SECONDS: int = 300
+    # Each schedule runs at a fixed, id-derived offset inside this window
+    # after its nominal time, so "1st of the month" jobs don't all fire at once.
+    SCHEDULER_SPREAD_SECONDS: int = 3600
+
+    # FX. Rates file is JSON of units per 1 of a common base currency,
+    # e.g. {"USD": "1", "EUR": "0.92", "GBP": "0.79"}; unset uses stub rates.
+    FX_RATES_FILE: str | None = None
+    FX_RATE_REFRESH_SECONDS: float = 60.0
+    FX_QUOTE_TTL_SECONDS: int = 30
+    FX_SPREAD_BPS: int = 50
+    # User whose wallets act as the FX house (one wallet per currency)
+    FX_HOUSE_USER_ID: str | None = None
+
+    # Analytics rollups. Entries younger than the lag are left for the next
+    # run, so rows from transactions still in flight aren't skipped.
+    ROLLUP_LAG_SECONDS: int = 300
+    ROLLUP_MAX_WINDOW_SECONDS: int = 24 * 3600
+    ROLLUP_INTERVAL_SECONDS: float = 60.0
+
+    # Ledger archival. Transactions older than the horizon move to the
+    # archived_* tables; history queries reaching past it read through.
+    ARCHIVE_HORIZON_DAYS: int = 365
+    ARCHIVE_BATCH_SIZE: int = 1000
+
+    # Ledger replay (app.workers.replay_ledger). Rows fetched per round trip
+    # from the server-side cursor, and corrections written per UPDATE.
+    REPLAY_FETCH_SIZE: int = 10_000
+    REPLAY_BATCH_SIZE: int = 1000
+
+    # Bulk user provisioning. Hash workers are processes in the CLI and threads
+    # in the API (bcrypt is CPU bound but releases the GIL). The HTTP endpoint
+    # hashes inside the request at ~0.25s a user per worker, so it stays
+    # small; bigger imports go through python -m app.workers.provision_users.
+    PROVISION_CHUNK_SIZE: int = 1000
+    PROVISION_HASH_WORKERS: int = 4
+    PROVISION_MAX_USERS_PER_REQUEST: int = 100
+
     # This configures how the settings are loaded
     model_config = _base_config
 
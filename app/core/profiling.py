@@ -0,0 +1,338 @@
+import hmac
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+import anyio
+import orjson
+from sqlalchemy import event
+
+from app.core.config import db_settings
+
+logger = logging.getLogger(__name__)
+
+# Keeps one runaway request (a loop of queries) from writing a huge file
+_MAX_STATEMENTS = 1000
+_PROFILE_HEADER = b"x-profile"
+
+_current_profile: ContextVar["RequestProfile | None"] = ContextVar("request_profile", default=None)
+
+# Worker thread id -> the profiled request it last ran a query for. Set from
+# the SQL hook, since that runs in the thread doing the work, inside the
+# request's context.
+_thread_profiles: dict[int, "RequestProfile"] = {}
+
+# Where an idle worker thread waits for its next job. If that ever changes,
+# idle time just shows up in the profile as its own stack.
+_QUEUE_GET_CODE = queue.Queue.get.__code__
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.now(timezone.utc)
+        self.status: int | None = None
+        self.duration_ms = 0.0
+        # tuple of code objects, outermost first -> samples
+        self.samples: dict[tuple, int] = {}
+        self.statements: list[dict] = []
+        self.dropped_statements = 0
+        self._started = time.perf_counter()
+
+    def finish(self, status: int | None) -> None:
+        self.status = status
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def add_statement(self, statement: str, duration_ms: float, executemany: bool) -> None:
+        if len(self.statements) >= _MAX_STATEMENTS:
+            self.dropped_statements += 1
+            return
+
+        self.statements.append({
+            "at_ms": round((time.perf_counter() - self._started) * 1000 - duration_ms, 3),
+            "duration_ms": round(duration_ms, 3),
+            "executemany": executemany,
+            "statement": statement,
+        })
+
+    def to_dict(self, interval_ms: float) -> dict:
+        stacks = sorted(
+            (";".join(_label(code) for code in stack), count)
+            for stack, count in self.samples.items()
+        )
+
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "sql": {
+                "count": len(self.statements) + self.dropped_statements,
+                "total_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+                "statements": self.statements,
+            },
+            "sample_interval_ms": interval_ms,
+            "samples": sum(self.samples.values()),
+            # Collapsed ("folded") stacks, as flamegraph.pl and speedscope read them
+            "stacks": [f"{stack} {count}" for stack, count in stacks],
+        }
+
+
+_labels: dict = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+
+    if label is None:
+        filename = code.co_filename
+        for prefix in (os.getcwd() + os.sep, *(p + os.sep for p in sys.path if p.endswith("-packages"))):
+            if filename.startswith(prefix):
+                filename = filename[len(prefix):]
+                break
+
+        label = _labels[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+    return label
+
+
+class StackSampler:
+    # Statistical profiler in the style of pyinstrument: while any profiled
+    # request is in flight, a background thread looks at every thread's stack
+    # each interval and counts it against the request that thread is working
+    # for. Requests that aren't profiled pay nothing, and profiled ones only
+    # the occasional GIL hand-off to the sampler.
+
+    def __init__(self, interval_ms: float = db_settings.PROFILING_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._active: set[RequestProfile] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.add(profile)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+        self._wake.set()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.discard(profile)
+
+        for ident, bound in list(_thread_profiles.items()):
+            if bound is profile:
+                _thread_profiles.pop(ident, None)
+
+    def _run(self) -> None:
+        while True:
+            if not self._active:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            time.sleep(self.interval)
+            try:
+                self._sample()
+            except Exception:
+                logger.exception("Request profiler sample failed")
+
+    def _sample(self) -> None:
+        with self._lock:
+            active = set(self._active)
+        if not active:
+            return
+
+        me = threading.get_ident()
+        bound = _thread_profiles.copy()
+
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+
+            # On the event loop thread the middleware coroutine's frame says
+            # which request is running. Worker threads are looked up by id.
+            stack = []
+            profile = bound.get(ident)
+
+            while frame is not None:
+                code = frame.f_code
+
+                if code is _MIDDLEWARE_CODE:
+                    profile = frame.f_locals.get("profile")
+                    break
+                if code is _QUEUE_GET_CODE:
+                    # Between jobs, not working for anyone
+                    profile = None
+                    break
+
+                stack.append(code)
+                frame = frame.f_back
+
+            if profile in active:
+                stack.reverse()
+                key = tuple(stack)
+                profile.samples[key] = profile.samples.get(key, 0) + 1
+
+    def _reset_after_fork(self) -> None:
+        # The sampler thread isn't carried over into a forked worker
+        self._active = set()
+        _thread_profiles.clear()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+
+class ProfileStore:
+    def __init__(
+        self,
+        directory: str = db_settings.PROFILING_DIR,
+        max_files: int = db_settings.PROFILING_MAX_FILES,
+    ):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def write(self, profile: RequestProfile, interval_ms: float) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Timestamp first, so names sort oldest to newest
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", profile.path).strip("-") or "root"
+        path = self.directory / (
+            f"{profile.started_at:%Y%m%dT%H%M%S%f}-{profile.method}-{slug[:60]}-{profile.id}.json"
+        )
+        path.write_bytes(orjson.dumps(profile.to_dict(interval_ms), option=orjson.OPT_INDENT_2))
+
+        self._prune()
+
+        return path
+
+    def _prune(self) -> None:
+        with self._lock:
+            files = sorted(self.directory.glob("*.json"))
+
+            for old in files[:max(len(files) - self.max_files, 0)]:
+                old.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    # Plain ASGI middleware, so the request runs in the same task (and with
+    # the same contextvars) as the code that set the profile up.
+
+    def __init__(
+        self,
+        app,
+        sampler: StackSampler,
+        store: ProfileStore,
+        sample_rate: float = db_settings.PROFILING_SAMPLE_RATE,
+        slow_ms: float | None = db_settings.PROFILING_SLOW_MS,
+        admin_token: str | None = db_settings.PROFILING_ADMIN_TOKEN,
+    ):
+        self.app = app
+        self.sampler = sampler
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.admin_token = admin_token.encode() if admin_token else None
+
+    def _reason(self, scope) -> str | None:
+        if self.admin_token is not None:
+            for name, value in scope["headers"]:
+                if name == _PROFILE_HEADER and hmac.compare_digest(value, self.admin_token):
+                    return "header"
+
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+
+        if self.slow_ms is not None:
+            return "slow"
+
+        return None
+
+    async def __call__(self, scope, receive, send):
+        reason = self._reason(scope) if scope["type"] == "http" else None
+
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], reason)
+        status = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        self.sampler.add(profile)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.sampler.remove(profile)
+            _current_profile.reset(token)
+            profile.finish(status if status is not None else 500)
+
+            if reason != "slow" or profile.duration_ms >= self.slow_ms:
+                try:
+                    await anyio.to_thread.run_sync(
+                        self.store.write, profile, self.sampler.interval * 1000
+                    )
+                except Exception:
+                    logger.exception("Could not write request profile %s", profile.id)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+
+    if profile is not None:
+        _thread_profiles[threading.get_ident()] = profile
+        context._profiling_started = time.perf_counter()
+    else:
+        # The thread has moved on to a request that isn't profiled
+        _thread_profiles.pop(threading.get_ident(), None)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profiling_started", None)
+
+    # Parameters are left out on purpose: they hold user data
+    if profile is not None and started is not None:
+        profile.add_statement(statement, (time.perf_counter() - started) * 1000, executemany)
+
+
+_MIDDLEWARE_CODE = ProfilingMiddleware.__call__.__code__
+
+sampler = StackSampler()
+os.register_at_fork(after_in_child=sampler._reset_after_fork)
+
+
+def install_profiling(app, engines) -> None:
+    # Only called when PROFILING_ENABLED, so with profiling off there is no
+    # middleware and no engine listener at all.
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_middleware(ProfilingMiddleware, sampler=sampler, store=ProfileStore())
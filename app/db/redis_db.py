@@ -1,3 +1,5 @@
+import os
+
 from redis import Redis
 
 
@@ -9,10 +11,122 @@ _token_blacllist = Redis(
     db=0,
 )
 
+_event_stream = Redis(
+    host=db_settings.REDIS_HOST,
+    port=db_settings.REDIS_PORT,
+    db=1,
+)
+
+_rate_limits = Redis(
+    host=db_settings.REDIS_HOST,
+    port=db_settings.REDIS_PORT,
+    db=2,
+)
+
+# Token bucket, refilled lazily from the Redis server clock so every node sees
+# the same time. First puts back ARGV[4] unspent tokens from an expired local
+# lease, then grants up to ARGV[3] tokens at once (a partial grant when the
+# bucket is nearly empty) and returns {granted, retry_after_ms}.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local returned = tonumber(ARGV[4]) or 0
+
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000 + returned)
+
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+
+local retry_after = 0
+if granted == 0 then
+    retry_after = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+return {granted, retry_after}
+"""
+
+_token_bucket = _rate_limits.register_script(_TOKEN_BUCKET_LUA)
+
+
+def _reset_redis_after_fork() -> None:
+    for client in (_token_blacllist, _event_stream, _rate_limits):
+        client.connection_pool.reset()
+
+
+os.register_at_fork(after_in_child=_reset_redis_after_fork)
+
+
+_TOKEN_WATERMARKS = "token_watermarks"
+
+
+def set_token_watermark(
+    user_id: str,
+    revoked_before: float,
+    channel: str,
+    keep_seconds: float,
+) -> None:
+    # Watermarks only matter while tokens issued before them can still be
+    # alive, so anything older than the access token lifetime is dropped.
+    pipe = _token_blacllist.pipeline(transaction=True)
+    pipe.zadd(_TOKEN_WATERMARKS, {user_id: revoked_before})
+    pipe.zremrangebyscore(_TOKEN_WATERMARKS, "-inf", revoked_before - keep_seconds)
+    pipe.publish(channel, f"{user_id} {revoked_before}")
+    pipe.execute()
+
+
+def get_token_watermarks(since: float) -> dict[str, float]:
+    return {
+        user_id.decode(): score
+        for user_id, score in _token_blacllist.zrangebyscore(
+            _TOKEN_WATERMARKS,
+            since,
+            "+inf",
+            withscores=True,
+        )
+    }
+
+
+def subscribe_to_token_watermarks(channel: str):
+    pubsub = _token_blacllist.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(channel)
+    return pubsub
+
+
+def add_events_to_stream(stream: str, events: list[dict], maxlen: int) -> None:
+    # One round trip for the whole batch instead of one XADD per event.
+    pipe = _event_stream.pipeline(transaction=False)
+
+    for event in events:
+        pipe.xadd(stream, event, maxlen=maxlen, approximate=True)
+
+    pipe.execute()
+
 
-def add_jti_to_blacklist(jti: str):
-    _token_blacllist.set(jti, "blacklisted")
+def take_rate_limit_tokens(
+    key: str,
+    capacity: int,
+    refill_per_second: float,
+    requested: int = 1,
+    returned: int = 0,
+) -> tuple[int, int]:
+    granted, retry_after_ms = _token_bucket(
+        keys=[key],
+        args=[capacity, refill_per_second, requested, returned],
+    )
+    return int(granted), int(retry_after_ms)
 
 
-def is_jti_blacklisted(jti: str) -> bool:
-    return _token_blacllist.exists(jti)
\ No newline at end of file
+def ping_redis() -> None:
+    # All clients share one server; the rate limiter's is on the request path
+    _rate_limits.ping()
@@ -1,9 +1,16 @@
+import os
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import db_settings
 
-engine = create_engine(db_settings.DATABASE_URL, future=True)
+engine = create_engine(
+    db_settings.DATABASE_URL,
+    pool_size=db_settings.DB_POOL_SIZE,
+    max_overflow=db_settings.DB_MAX_OVERFLOW,
+    future=True,
+)
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -12,6 +19,13 @@ SessionLocal = sessionmaker(
     future=True
 )
 
+def _reset_engine_after_fork():
+    # Pooled connections inherited from the parent must not be shared;
+    # close=False leaves them for the parent and starts a fresh pool.
+    engine.dispose(close=False)
+
+os.register_at_fork(after_in_child=_reset_engine_after_fork)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,130 @@
+import bisect
+import hashlib
+import os
+from uuid import UUID
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import db_settings
+from app.db.session import SessionLocal, engine
+from app.models.wallet_shard import WalletShard
+
+MAIN_SHARD = "main"
+
+# Wallets never move, so their placement can be cached for good; the cap only
+# bounds memory.
+_WALLET_CACHE_SIZE = 100_000
+
+
+class UnknownShardError(Exception):
+    pass
+
+
+class HashRing:
+    # Consistent hashing: every shard owns vnodes points on a 64-bit ring and
+    # a key goes to the first point at or after its hash. Adding a shard only
+    # takes over the keys just before its points (about 1/N of them), the
+    # rest stay where they were.
+
+    def __init__(self, shards: list[str], vnodes: int = db_settings.SHARD_VNODES):
+        points = sorted(
+            (self._hash(f"{shard}#{i}".encode()), shard)
+            for shard in shards
+            for i in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    @staticmethod
+    def _hash(value: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+
+    def shard_for(self, key: UUID) -> str:
+        i = bisect.bisect_left(self._points, self._hash(key.bytes))
+
+        return self._shards[i % len(self._shards)]
+
+
+class ShardMap:
+    # Where a user's wallets, transactions and ledger entries live. The
+    # catalog (DATABASE_URL, shard "main") is the source of truth:
+    # users.shard for users and wallet_shards for wallets. The ring only
+    # places new users, so changing the shard list never strands old data.
+
+    def __init__(
+        self,
+        urls: dict[str, str],
+        vnodes: int = db_settings.SHARD_VNODES,
+    ):
+        if MAIN_SHARD in urls:
+            raise ValueError(f'"{MAIN_SHARD}" is the catalog database, not an extra shard')
+
+        self.names = [MAIN_SHARD, *urls]
+        self.ring = HashRing(self.names, vnodes)
+        self._urls = urls
+        self._engines = {}
+        self._sessionmakers = {MAIN_SHARD: SessionLocal}
+        self._wallet_shards: dict[UUID, str] = {}
+
+        for name, url in urls.items():
+            self._engines[name] = create_engine(
+                url,
+                pool_size=db_settings.DB_POOL_SIZE,
+                max_overflow=db_settings.DB_MAX_OVERFLOW,
+                future=True,
+            )
+            self._sessionmakers[name] = sessionmaker(
+                bind=self._engines[name],
+                autocommit=False,
+                autoflush=False,
+                future=True,
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.names) > 1
+
+    @property
+    def engines(self) -> list:
+        return [engine, *self._engines.values()]
+
+    def session(self, shard: str) -> Session:
+        try:
+            return self._sessionmakers[shard]()
+        except KeyError:
+            raise UnknownShardError(shard)
+
+    def place_user(self, user_id: UUID) -> str:
+        return self.ring.shard_for(user_id)
+
+    def home_shard(self, user) -> str:
+        # Users from before sharding have no shard set: they live on main
+        return user.shard or MAIN_SHARD
+
+    def shard_for_wallet(self, db: Session, wallet_id: UUID) -> str:
+        # db is a catalog session. Wallets with no directory row were created
+        # on main (before sharding, or by a main-only path like provisioning).
+        if not self.enabled:
+            return MAIN_SHARD
+
+        shard = self._wallet_shards.get(wallet_id)
+
+        if shard is None:
+            shard = db.execute(
+                select(WalletShard.shard).where(WalletShard.wallet_id == wallet_id)
+            ).scalar_one_or_none() or MAIN_SHARD
+
+            if len(self._wallet_shards) >= _WALLET_CACHE_SIZE:
+                self._wallet_shards.clear()
+            self._wallet_shards[wallet_id] = shard
+
+        return shard
+
+    def _reset_after_fork(self) -> None:
+        for engine in self._engines.values():
+            engine.dispose(close=False)
+
+
+shard_map = ShardMap(db_settings.SHARD_DATABASE_URLS)
+os.register_at_fork(after_in_child=shard_map._reset_after_fork)
@@ -0,0 +1,86 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import BigInteger, Numeric, TypeDecorator, cast, type_coerce
+from sqlalchemy.sql import operators
+
+from app.core.config import db_settings
+
+# Amounts are stored with AMOUNT_SCALE decimal places, as NUMERIC(p, 2) or,
+# with AMOUNT_STORAGE=minor_units, as a BIGINT count of hundredths. Every
+# currency's exponent (Currency.exponent) must fit in it.
+AMOUNT_SCALE = 2
+MINOR_UNITS = db_settings.AMOUNT_STORAGE == "minor_units"
+
+_ADDITIVE = (operators.add, operators.sub)
+_SCALING = (operators.mul, operators.truediv)
+
+
+class MinorUnits(TypeDecorator):
+    # A BIGINT of minor units that services still see as Decimal, so only
+    # the column type changes. In SQL the values stay integers: sums,
+    # comparisons and the balance guards run on bigint, not numeric.
+    impl = BigInteger
+    cache_ok = True
+
+    def __init__(self, precision: int = 18):
+        super().__init__()
+        # Kept for the conversion back to NUMERIC (app.workers.convert_amounts)
+        self.precision = precision
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def _adapt_expression(self, op, other_comparator):
+            # balance - held_balance is still an amount, so the value it is
+            # compared with gets scaled too; so is amount * n.
+            if op in _ADDITIVE or (op in _SCALING and not isinstance(other_comparator.type, MinorUnits)):
+                return op, self.type
+
+            return super()._adapt_expression(op, other_comparator)
+
+    def coerce_compared_value(self, op, value):
+        # The n in amount * n is a plain number, not an amount
+        if op in _SCALING:
+            return Numeric()
+
+        return self
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+
+        return int(Decimal(value).scaleb(AMOUNT_SCALE).quantize(1, rounding=ROUND_HALF_UP))
+
+    def process_literal_param(self, value, dialect):
+        return str(self.process_bind_param(value, dialect))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+
+        return Decimal(value).scaleb(-AMOUNT_SCALE)
+
+
+def Amount(precision: int = 18):
+    # The type of every amount column. NUMERIC unless the database has been
+    # converted (python -m app.workers.convert_amounts) and the app started
+    # with AMOUNT_STORAGE=minor_units.
+    if MINOR_UNITS:
+        return MinorUnits(precision)
+
+    return Numeric(precision, AMOUNT_SCALE)
+
+
+def minor_units(amount):
+    # An amount column (or expression) as integer minor units, for read paths
+    # that want ints without a Decimal per row. Free with BIGINT storage.
+    if MINOR_UNITS:
+        return type_coerce(amount, BigInteger)
+
+    return cast(amount * 10 ** AMOUNT_SCALE, BigInteger)
+
+
+def from_minor_units(value):
+    # The other way: integer minor units (SQL) to a value for an amount column
+    if MINOR_UNITS:
+        return type_coerce(value, BigInteger)
+
+    return cast(value, Numeric) / 10 ** AMOUNT_SCALE
@@ -8,6 +8,8 @@ from pydantic import ValidationError
 from scalar_fastapi import get_scalar_api_reference
 
 from app.core.config import db_settings
+from app.core.profiling import install_profiling
+from app.db.sharding import shard_map
 from app.api.router import master_router
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -55,6 +57,10 @@ app.add_middleware(
     https_only=False # True in production
 )
 
+# Added last so it wraps everything else; not installed at all when off
+if db_settings.PROFILING_ENABLED:
+    install_profiling(app, shard_map.engines)
+
 @app.get("/scalar", include_in_schema=False)
 def get_scalar_docs():
     return get_scalar_api_reference(
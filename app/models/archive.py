@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import Amount
+
+
+# Cold copies of transactions and ledger entries past the archive horizon.
+# Same columns as the hot tables, but without foreign keys or unique
+# constraints, and only the indexes the history read-through needs.
+
+
+class ArchivedTransaction(Base):
+    __tablename__ = "archived_transactions"
+    __table_args__ = (
+        Index(
+            "ix_archived_transactions_reference_pattern",
+            "reference",
+            postgresql_ops={"reference": "text_pattern_ops"},
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    type: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    reference: Mapped[str | None] = mapped_column(String, nullable=True)
+    reversal_of_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+    )
+
+
+class ArchivedLedgerEntry(Base):
+    __tablename__ = "archived_ledger_entries"
+    __table_args__ = (
+        Index("ix_archived_ledger_entries_wallet_id_created_at", "wallet_id", "created_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    wallet_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    transaction_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=False,
+        index=True,
+    )
+    amount: Mapped[Decimal] = mapped_column(Amount(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+
+
+class WalletArchiveBalance(Base):
+    __tablename__ = "wallet_archive_balances"
+
+    # Carry-forward per wallet: what the archived entries add up to. For
+    # reconciliation, wallet balance = carried_balance + SUM(hot entries).
+    wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("wallets.id"),
+        primary_key=True,
+    )
+    carried_balance: Mapped[Decimal] = mapped_column(
+        Amount(),
+        nullable=False,
+        default=0,
+    )
+    archived_entry_count: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+    )
+    # Newest created_at among this wallet's archived entries
+    archived_until: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
@@ -2,16 +2,21 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import DateTime, ForeignKey, Numeric
+from sqlalchemy import DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.db.types import Amount
 
 
 class LedgerEntry(Base):
     __tablename__ = "ledger_entries"
+    __table_args__ = (
+        # A wallet's history, newest first.
+        Index("ix_ledger_entries_wallet_id_created_at", "wallet_id", "created_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -27,14 +32,16 @@ class LedgerEntry(Base):
         UUID(as_uuid=True),
         ForeignKey("transactions.id"),
         nullable=False,
+        index=True,
     )
     amount: Mapped[Decimal] = mapped_column(
-        Numeric(18, 2),
+        Amount(),
         nullable=False,
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
+        index=True,
     )
     wallet: Mapped["Wallet"] = relationship(
         back_populates="ledger_entries",
@@ -0,0 +1,47 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import Amount
+
+
+class TransactionVolumeRollup(Base):
+    __tablename__ = "transaction_volume_rollups"
+
+    # One row per (UTC hour, currency, transaction type). Daily and monthly
+    # figures are summed from these at query time.
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+    currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+    type: Mapped[str] = mapped_column(String, primary_key=True)
+    entry_count: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+    )
+    credit_volume: Mapped[Decimal] = mapped_column(
+        Amount(20),
+        nullable=False,
+        default=0,
+    )
+    debit_volume: Mapped[Decimal] = mapped_column(
+        Amount(20),
+        nullable=False,
+        default=0,
+    )
+
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    # Everything with created_at <= processed_until is already in the rollups
+    processed_until: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
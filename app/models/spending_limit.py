@@ -0,0 +1,30 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, ForeignKey, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import Amount
+
+
+class WalletSpendBucket(Base):
+    __tablename__ = "wallet_spend_buckets"
+
+    # Outgoing total per wallet and limit window (a UTC day or month), kept
+    # up to date by the debit itself, so checking a limit reads one row
+    # instead of summing that window's ledger entries.
+    wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("wallets.id"),
+        primary_key=True,
+    )
+    period: Mapped[str] = mapped_column(String(5), primary_key=True)
+    bucket_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    spent: Mapped[Decimal] = mapped_column(
+        Amount(),
+        nullable=False,
+        default=0,
+    )
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -11,6 +11,17 @@ from app.db.base import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # History search: filter by type within a date range, newest first.
+        Index("ix_transactions_type_created_at", "type", "created_at"),
+        # The unique index on reference can't serve LIKE 'prefix%' outside the
+        # C collation; text_pattern_ops can.
+        Index(
+            "ix_transactions_reference_pattern",
+            "reference",
+            postgresql_ops={"reference": "text_pattern_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -28,9 +39,18 @@ class Transaction(Base):
         unique=True,
         nullable=True,
     )
+    # Set on compensating transactions. Unique, so a transaction can only
+    # ever be reversed once even if two reversals race.
+    reversal_of_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("transactions.id"),
+        unique=True,
+        nullable=True,
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
+        index=True,
     )
     ledger_entries: Mapped[list["LedgerEntry"]] = relationship(
         back_populates="transaction",
@@ -0,0 +1,57 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.db.types import Amount
+
+
+class TransferReview(Base):
+    __tablename__ = "transfer_reviews"
+    __table_args__ = (
+        # The review queue: undecided transfers, oldest first
+        Index(
+            "ix_transfer_reviews_open_created_at",
+            "created_at",
+            postgresql_where="reviewed_at IS NULL",
+        ),
+    )
+
+    # A transfer the risk checks parked. Its transaction stays pending and
+    # the amount is held on the source wallet until an admin decides.
+    transaction_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("transactions.id"),
+        primary_key=True,
+    )
+    source_wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("wallets.id"),
+        nullable=False,
+    )
+    destination_wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("wallets.id"),
+        nullable=False,
+    )
+    amount: Mapped[Decimal] = mapped_column(Amount(), nullable=False)
+    # Why the risk checks flagged it, one reason per line
+    reasons: Mapped[str] = mapped_column(String, nullable=False)
+    reviewed_by: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id"),
+        nullable=True,
+    )
+    reviewed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
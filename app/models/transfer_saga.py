@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.db.types import Amount
+
+
+class TransferSaga(Base):
+    __tablename__ = "transfer_sagas"
+    __table_args__ = (
+        # What the saga worker picks up: unfinished sagas, oldest first
+        Index(
+            "ix_transfer_sagas_pending_updated_at",
+            "updated_at",
+            postgresql_where="status = 'pending'",
+        ),
+    )
+
+    # A transfer to a wallet on another shard, kept on the source shard next
+    # to the debit. The transaction stays pending until the credit has been
+    # applied on the destination shard (completed) or the debit refunded
+    # (compensated).
+    transaction_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("transactions.id"),
+        primary_key=True,
+    )
+    source_wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("wallets.id"),
+        nullable=False,
+    )
+    # No foreign key: it lives on destination_shard
+    destination_wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=False,
+    )
+    destination_shard: Mapped[str] = mapped_column(String, nullable=False)
+    amount: Mapped[Decimal] = mapped_column(Amount(), nullable=False)
+    status: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+        default="pending",
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+    )
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
@@ -26,6 +26,16 @@ class User(Base):
         Boolean,
         default=True,
     )
+    is_admin: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default=text("false"),
+    )
+    # Home shard of the user's wallets (app.db.sharding); NULL is "main"
+    shard: Mapped[str | None] = mapped_column(
+        String,
+        nullable=True,
+    )
     created_at: Mapped[str] = mapped_column(
         TIMESTAMP(timezone=True),
         server_default=text("now()"),
@@ -2,12 +2,13 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import DateTime, ForeignKey, Numeric, String
+from sqlalchemy import DateTime, ForeignKey, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.db.types import Amount
 
 
 class Wallet(Base):
@@ -25,10 +26,37 @@ class Wallet(Base):
     )
     currency: Mapped[str] = mapped_column(String(3), nullable=False)
     balance: Mapped[Decimal] = mapped_column(
-        Numeric(18, 2),
+        Amount(),
         nullable=False,
         default=0,
     )
+    # Funds reserved by active holds. They still count towards balance but
+    # can't be withdrawn, transferred or held again.
+    held_balance: Mapped[Decimal] = mapped_column(
+        Amount(),
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+    # Spending limits: the tier's limits apply unless the wallet overrides
+    # them (see SPENDING_LIMIT_TIERS). No tier means the default tier.
+    limit_tier: Mapped[str | None] = mapped_column(String, nullable=True)
+    daily_limit: Mapped[Decimal | None] = mapped_column(Amount(), nullable=True)
+    monthly_limit: Mapped[Decimal | None] = mapped_column(Amount(), nullable=True)
+    # Bumped by every update. ORM flushes check it through version_id_col;
+    # the UPDATE statements in WalletService bump it themselves.
+    version: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        server_default="1",
+    )
+    # Archive watermark: the newest ledger entry of this wallet moved to the
+    # archive, None if nothing was. Everything newer is hot, so history pages
+    # only read through to the archive when they reach back this far.
+    archived_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -38,4 +66,10 @@ class Wallet(Base):
     )
     ledger_entries: Mapped[list["LedgerEntry"]] = relationship(
         back_populates="wallet",
-    )
\ No newline at end of file
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+    @property
+    def available_balance(self) -> Decimal:
+        return self.balance - self.held_balance
\ No newline at end of file
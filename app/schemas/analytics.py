@@ -0,0 +1,20 @@
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class RollupGranularity(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+
+
+class VolumeRollupRead(BaseModel):
+    bucket_start: datetime
+    currency: str
+    type: str
+    entry_count: int
+    credit_volume: Decimal
+    debit_volume: Decimal
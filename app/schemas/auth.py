@@ -1,6 +1,19 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 import re
 
+from app.schemas.wallet import Currency
+
+
+def check_password_strength(password: str) -> str:
+    if len(password) < 4:
+        raise ValueError("Password too short (min 4 characters)")
+    if not re.search(r"[A-Z]", password):
+        raise ValueError("Password must contain at least one uppercase letter")
+    if not re.search(r"[0-9]", password):
+        raise ValueError("Password must contain at least one number")
+    return password
+
+
 class AuthBase(BaseModel):
     email: EmailStr
     password: str = Field(max_length=64)
@@ -8,10 +21,48 @@ class AuthBase(BaseModel):
     @field_validator("password")
     @classmethod
     def validate_password(cls, password: str):
-        if len(password) < 4:
-            raise ValueError("Password too short (min 4 characters)")
-        if not re.search(r"[A-Z]", password):
-            raise ValueError("Password must contain at least one uppercase letter")
-        if not re.search(r"[0-9]", password):
-            raise ValueError("Password must contain at least one number")
-        return password
\ No newline at end of file
+        return check_password_strength(password)
+
+
+class ProvisionUser(BaseModel):
+    email: EmailStr
+    # Either a plain password to hash, or a bcrypt hash migrated as is
+    password: str | None = Field(default=None, max_length=64)
+    hashed_password: str | None = None
+
+    @field_validator("password")
+    @classmethod
+    def validate_password(cls, password: str | None):
+        if password is None:
+            return None
+        return check_password_strength(password)
+
+    @model_validator(mode="after")
+    def check_credentials(self) -> "ProvisionUser":
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError("Provide exactly one of password or hashed_password")
+        return self
+
+
+class BulkProvisionUsers(BaseModel):
+    users: list[ProvisionUser] = Field(min_length=1)
+    currencies: list[Currency] | None = None
+
+
+class BulkProvisionRead(BaseModel):
+    created: int = 0
+    duplicates: list[str] = []
+    # email -> reason it was rejected
+    failed: dict[str, str] = {}
+
+
+class TokenRead(BaseModel):
+    access_token: str
+    refresh_token: str
+    type: str = "jwt"
+    # Access token lifetime in seconds
+    expires_in: int
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
@@ -1,44 +1,34 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Query, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
+from app.db.sharding import MAIN_SHARD, shard_map
 from app.models.user import User
 
-from app.services.auth import AuthService
+from app.services.analytics import AnalyticsService
+from app.services.auth import AuthService, normalize_email
+from app.services.scheduled_transfer import ScheduledTransferService
+from app.services.sharding import ShardedTransferService
+from app.services.rate_limit import RateLimitExceededError, rate_limiter
+from app.services.token_revocation import token_revocations
 from app.services.transaction import TransactionService
 from app.services.wallet import WalletService
 
 from app.core.security import oauth2_scheme
 from app.utils import decode_access_token
-from app.db.redis_db import is_jti_blacklisted
 
 DatabaseDep = Annotated[Session, Depends(get_db)]
 
 
-def get_wallet_service(db: DatabaseDep):
-    return WalletService(db)
-
-
-def get_auth_service(
-    db: DatabaseDep,
-    wallet_service: WalletService = Depends(get_wallet_service),
-):
+def get_auth_service(db: DatabaseDep):
+    # Users live in the catalog (main); signup places their wallets itself
     return AuthService(
         db,
-        wallet_service=wallet_service,
-    )
-
-
-def get_transaction_service(
-    db: DatabaseDep,
-    wallet_service: WalletService = Depends(get_wallet_service),
-):
-    return TransactionService(
-        db=db,
-        wallet_service=wallet_service,
+        wallet_service=WalletService(db),
     )
 
 
@@ -54,7 +44,8 @@ def get_access_token(token: Annotated[str, Depends(oauth2_scheme)]):
 
     data = decode_access_token(token)
 
-    if data is None or is_jti_blacklisted(data["jti"]):
+    # In-memory watermark check; no Redis round trip per request
+    if data is None or token_revocations.is_revoked(data["user"]["id"], data.get("iat", 0)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired access token",
@@ -71,16 +62,210 @@ def get_current_user(
     return db.get(User, UUID(token_data["user"]["id"]))
 
 
+def enforce_rate_limit(route: str, principal: str, identity: str) -> None:
+    try:
+        rate_limiter.hit(route, principal, identity)
+    except RateLimitExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please try again later.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+# Keyed on the token rather than the loaded User so a flood is rejected
+# before it costs a DB query.
+def limit_transfer_by_user(
+    token_data: Annotated[dict, Depends(get_access_token)],
+):
+    enforce_rate_limit("transfer", "user", token_data["user"]["id"])
+
+
+# The wallet bucket is charged before the service has checked ownership, so
+# it is keyed by the caller too: posting transfers from someone else's wallet
+# ID only drains the caller's own bucket.
+def wallet_rate_limit_key(user_id, wallet_id) -> str:
+    return f"{user_id}:{wallet_id}"
+
+
+def limit_login(
+    request: Request,
+    request_form: Annotated[OAuth2PasswordRequestForm, Depends()],
+):
+    client_ip = request.client.host if request.client else "unknown"
+
+    enforce_rate_limit("login", "ip", client_ip)
+    enforce_rate_limit("login", "email", normalize_email(request_form.username))
+
+
 # User dep
 UserDep = Annotated[User, Depends(get_current_user)]
 
+
+def get_shard_db(user: UserDep, db: DatabaseDep):
+    # The caller's wallets, transactions and ledger entries live on their
+    # home shard. Without extra shards that is main: the request's session.
+    shard = shard_map.home_shard(user) if user is not None else MAIN_SHARD
+
+    if shard == MAIN_SHARD:
+        yield db
+        return
+
+    shard_db = shard_map.session(shard)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+
+ShardDatabaseDep = Annotated[Session, Depends(get_shard_db)]
+
+
+def get_wallet_service(db: ShardDatabaseDep):
+    return WalletService(db)
+
+
+def get_transaction_service(
+    db: ShardDatabaseDep,
+    wallet_service: WalletService = Depends(get_wallet_service),
+):
+    return TransactionService(
+        db=db,
+        wallet_service=wallet_service,
+    )
+
+
+def get_sharded_transfer_service(
+    user: UserDep,
+    db: DatabaseDep,
+    transaction_service: TransactionService = Depends(get_transaction_service),
+):
+    return ShardedTransferService(
+        catalog_db=db,
+        transaction_service=transaction_service,
+        home_shard=shard_map.home_shard(user),
+    )
+
+
+def get_scheduled_transfer_service(
+    db: ShardDatabaseDep,
+    transaction_service: TransactionService = Depends(get_transaction_service),
+):
+    return ScheduledTransferService(
+        db=db,
+        transaction_service=transaction_service,
+    )
+
+
+def get_admin_user(user: UserDep) -> User:
+    if user is None or not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required.",
+        )
+
+    return user
+
+
+# Admin dep
+AdminUserDep = Annotated[User, Depends(get_admin_user)]
+
+
+def get_admin_shard_db(
+    admin: AdminUserDep,
+    db: DatabaseDep,
+    shard: Annotated[str, Query(description="Shard to work on")] = MAIN_SHARD,
+):
+    # Admin tools work on one shard at a time, main unless asked otherwise
+    if shard not in shard_map.names:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shard not found.",
+        )
+
+    if shard == MAIN_SHARD:
+        yield db
+        return
+
+    shard_db = shard_map.session(shard)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+
+AdminShardDatabaseDep = Annotated[Session, Depends(get_admin_shard_db)]
+
+
+def get_admin_wallet_service(db: AdminShardDatabaseDep):
+    return WalletService(db)
+
+
+def get_admin_transaction_service(
+    db: AdminShardDatabaseDep,
+    wallet_service: WalletService = Depends(get_admin_wallet_service),
+):
+    return TransactionService(
+        db=db,
+        wallet_service=wallet_service,
+    )
+
+
+def get_analytics_service(db: AdminShardDatabaseDep):
+    return AnalyticsService(db)
+
+
+def get_expected_version(
+    if_match: Annotated[str | None, Header()] = None,
+) -> int | None:
+    # Conditional writes: If-Match carries the wallet version the client
+    # last saw, e.g. If-Match: "3" (quotes and W/ prefix are optional).
+    if if_match is None:
+        return None
+
+    value = if_match.strip().removeprefix("W/").strip('"')
+
+    if not value.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be a wallet version.",
+        )
+
+    return int(value)
+
+
+# Expected wallet version dep
+ExpectedVersionDep = Annotated[int | None, Depends(get_expected_version)]
+
 # Auth Dep
 AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
 
 # Transaction Dep
 TransactionServiceDep = Annotated[TransactionService, Depends(get_transaction_service)]
 
+# Transfer Dep (routes cross-shard transfers through a saga)
+ShardedTransferServiceDep = Annotated[
+    ShardedTransferService,
+    Depends(get_sharded_transfer_service),
+]
+
+# Admin Deps, on the shard picked with ?shard=
+AdminTransactionServiceDep = Annotated[
+    TransactionService,
+    Depends(get_admin_transaction_service),
+]
+AdminWalletServiceDep = Annotated[WalletService, Depends(get_admin_wallet_service)]
+
 # Wallet Dep
 WalletServiceDep = Annotated[WalletService, Depends(get_wallet_service)]
 
+# Scheduled Transfer Dep
+ScheduledTransferServiceDep = Annotated[
+    ScheduledTransferService,
+    Depends(get_scheduled_transfer_service),
+]
+
+# Analytics Dep
+AnalyticsServiceDep = Annotated[AnalyticsService, Depends(get_analytics_service)]
+
 # why Annotated not just Session = Depends(get_db)? because we want to specify the type of db parameter as Session for better type hinting and editor support
@@ -0,0 +1,56 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.schemas.transaction import TransferRead
+from app.schemas.wallet import Currency
+
+
+class CreateFxQuote(BaseModel):
+    source_currency: Currency
+    destination_currency: Currency
+    amount: Decimal = Field(
+        gt=0,
+        max_digits=18,
+        decimal_places=2
+    )
+
+    @model_validator(mode="after")
+    def currencies_must_differ(self):
+        if self.source_currency == self.destination_currency:
+            raise ValueError("Source and destination currencies must be different.")
+
+        return self
+
+
+class FxQuoteRead(BaseModel):
+    quote_token: str
+    source_currency: Currency
+    destination_currency: Currency
+    source_amount: Decimal
+    destination_amount: Decimal
+    rate: Decimal
+    expires_at: datetime
+
+
+class CreateFxTransfer(BaseModel):
+    quote_token: str
+    source_wallet_id: UUID
+    destination_wallet_id: UUID
+    reference: str | None = None
+
+    @field_validator("reference")
+    @classmethod
+    def empty_reference_to_none(cls, value: str | None) -> str | None:
+        if value is not None:
+            value = value.strip()
+
+        return value or None
+
+
+class FxTransferRead(TransferRead):
+    destination_currency: str
+    destination_amount: Decimal
+    rate: Decimal
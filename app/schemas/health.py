@@ -0,0 +1,37 @@
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class HealthStatus(str, Enum):
+    OK = "ok"
+    DEGRADED = "degraded"
+    DOWN = "down"
+
+
+class PoolRead(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+    saturation: float
+
+
+class DependencyRead(BaseModel):
+    status: HealthStatus
+    # Last probe and the average over recent probes
+    latency_ms: float | None
+    avg_latency_ms: float | None
+    error: str | None = None
+
+
+class DatabaseHealthRead(DependencyRead):
+    pool: PoolRead
+
+
+class HealthRead(BaseModel):
+    status: HealthStatus
+    pid: int
+    checked_at: datetime
+    database: DatabaseHealthRead
+    redis: DependencyRead
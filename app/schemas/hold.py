@@ -0,0 +1,44 @@
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.transaction import CreateTransaction
+
+
+class HoldStatus(str, Enum):
+    ACTIVE = "active"
+    CAPTURED = "captured"
+    RELEASED = "released"
+    EXPIRED = "expired"
+
+
+class CreateHold(CreateTransaction):
+    # Defaults to HOLD_DEFAULT_TTL_SECONDS when omitted
+    expires_in_seconds: int | None = Field(default=None, gt=0)
+
+
+class CaptureHold(BaseModel):
+    # Capture less than the held amount to release the rest; omit to capture all
+    amount: Decimal | None = Field(
+        default=None,
+        gt=0,
+        max_digits=18,
+        decimal_places=2,
+    )
+
+
+class HoldRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    wallet_id: UUID
+    amount: Decimal
+    captured_amount: Decimal | None
+    status: HoldStatus
+    reference: str | None
+    transaction_id: UUID | None
+    expires_at: datetime
+    created_at: datetime
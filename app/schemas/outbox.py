@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class OutboxEventType(str, Enum):
+    TRANSACTION_CREATED = "transaction.created"
+    LEDGER_ENTRY_CREATED = "ledger_entry.created"
+    TRANSACTION_STATUS_CHANGED = "transaction.status_changed"
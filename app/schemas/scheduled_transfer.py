@@ -0,0 +1,48 @@
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class TransferFrequency(str, Enum):
+    ONCE = "once"
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+class ScheduledTransferStatus(str, Enum):
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class CreateScheduledTransfer(BaseModel):
+    source_wallet_id: UUID
+    destination_wallet_id: UUID
+    amount: Decimal = Field(
+        gt=0,
+        max_digits=18,
+        decimal_places=2
+    )
+    frequency: TransferFrequency
+    start_at: datetime
+
+
+class ScheduledTransferRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    source_wallet_id: UUID
+    destination_wallet_id: UUID
+    amount: Decimal
+    frequency: TransferFrequency
+    status: ScheduledTransferStatus
+    next_run_at: datetime
+    run_count: int
+    last_run_at: datetime | None
+    last_error: str | None
+    created_at: datetime
@@ -1,21 +1,33 @@
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from uuid import UUID
 from decimal import Decimal
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator, model_validator
 
 
 class TransactionType(str, Enum):
     DEPOSIT = "deposit"
     WITHDRAWAL = "withdrawal"
     TRANSFER = "transfer"
+    REVERSAL = "reversal"
+    CAPTURE = "capture"
+    FX_TRANSFER = "fx_transfer"
+    JOURNAL = "journal"
 
 
 class TransactionStatus(str, Enum):
     PENDING = "pending"
     COMPLETED = "completed"
     FAILED = "failed"
+    REVERSED = "reversed"
+
+
+class SagaStatus(str, Enum):
+    PENDING = "pending"
+    COMPLETED = "completed"
+    COMPENSATED = "compensated"
 
 
 class TransactionRead(BaseModel):
@@ -35,6 +47,8 @@ class RecentTransactionRead(TransactionRead):
 class TransactionOperationRead(RecentTransactionRead):
     balance: Decimal
     currency: str
+    # Wallet version after this operation, for a follow-up If-Match
+    wallet_version: int
 
 
 class RecentTransactionsRead(BaseModel):
@@ -42,6 +56,34 @@ class RecentTransactionsRead(BaseModel):
     transactions: list[RecentTransactionRead]
 
 
+class TransactionFilter(BaseModel):
+    type: TransactionType | None = None
+    # Matches references starting with this value
+    reference: str | None = Field(default=None, min_length=1, max_length=255)
+    min_amount: Decimal | None = Field(default=None, ge=0)
+    max_amount: Decimal | None = Field(default=None, ge=0)
+    start: datetime | None = None
+    end: datetime | None = None
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "TransactionFilter":
+        if (
+            self.min_amount is not None
+            and self.max_amount is not None
+            and self.min_amount > self.max_amount
+        ):
+            raise ValueError("min_amount must not be greater than max_amount.")
+
+        if self.start is not None and self.end is not None and self.start >= self.end:
+            raise ValueError("start must be before end.")
+
+        return self
+
+
+# Building a TypeAdapter compiles a validator, so do it once at import time.
+RecentTransactionListAdapter = TypeAdapter(list[RecentTransactionRead])
+
+
 class CreateTransaction(BaseModel):
     amount: Decimal = Field(
         gt=0,
@@ -64,6 +106,97 @@ class CreateTransfer(CreateTransaction):
     destination_wallet_id: UUID
 
 
+class JournalLeg(BaseModel):
+    wallet_id: UUID
+    # Negative takes money out of the wallet, positive puts it in
+    amount: Decimal = Field(
+        max_digits=18,
+        decimal_places=2,
+    )
+
+    @field_validator("amount")
+    @classmethod
+    def non_zero_amount(cls, value: Decimal) -> Decimal:
+        if value == 0:
+            raise ValueError("Leg amount must not be zero.")
+
+        return value
+
+
+class CreateJournal(BaseModel):
+    # e.g. buyer -100.00, seller +85.00, platform fee +10.00, tax +5.00
+    legs: list[JournalLeg] = Field(min_length=2, max_length=100)
+    reference: str | None = None
+
+    @field_validator("reference")
+    @classmethod
+    def empty_reference_to_none(cls, value: str | None) -> str | None:
+        if value is not None:
+            value = value.strip()
+
+        return value or None
+
+
+class JournalLegRead(BaseModel):
+    ledger_entry_id: UUID
+    wallet_id: UUID
+    amount: Decimal
+    # Only shown for the caller's own wallets
+    balance: Decimal | None = None
+    wallet_version: int | None = None
+
+
+class JournalRead(TransactionRead):
+    transaction_id: UUID
+    currency: str
+    legs: list[JournalLegRead]
+
+
 class TransferRead(TransactionOperationRead):
     destination_wallet_id: UUID
     # destination_balance: Decimal
+
+
+class TransferReviewRead(BaseModel):
+    transaction_id: UUID
+    source_wallet_id: UUID
+    destination_wallet_id: UUID
+    amount: Decimal
+    status: TransactionStatus
+    reasons: list[str]
+    reviewed_by: UUID | None
+    reviewed_at: datetime | None
+    created_at: datetime
+
+
+class BulkReversalRead(BaseModel):
+    reversed: list[UUID] = []
+    # transaction id -> reason it was skipped
+    failed: dict[UUID, str] = {}
+
+
+@dataclass(slots=True)
+class RecentTransactionRow:
+    # The lean form of RecentTransactionRead for history pages and exports:
+    # plain strings straight from the query (ids cast to text in SQL, amount
+    # rendered from integer cents) that orjson serializes without a model.
+    # Same JSON as RecentTransactionRead, down to the key order.
+    type: str
+    status: str
+    reference: str | None
+    created_at: datetime
+    transaction_id: str
+    wallet_id: str
+    amount: str
+
+
+def format_minor_units(amount: int, exponent: int = 2) -> str:
+    # Integer minor units to the decimal string Decimal would give, e.g.
+    # -550 -> "-5.50", without building the Decimal
+    sign = "-" if amount < 0 else ""
+    units, minor = divmod(abs(amount), 10 ** exponent)
+
+    if not exponent:
+        return f"{sign}{units}"
+
+    return f"{sign}{units}.{minor:0{exponent}d}"
@@ -4,7 +4,7 @@ from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Currency(str, Enum):
@@ -12,15 +12,61 @@ class Currency(str, Enum):
     EUR = "EUR"
     GBP = "GBP"
 
+    @property
+    def exponent(self) -> int:
+        # Decimal places of the minor unit (ISO 4217), e.g. 2 for cents
+        return CURRENCY_EXPONENTS[self]
+
+    @property
+    def minor_unit(self) -> Decimal:
+        return Decimal(1).scaleb(-self.exponent)
+
+
+# Amounts are stored with 2 decimal places (app.db.types.AMOUNT_SCALE), so no
+# currency can have a smaller minor unit than that.
+CURRENCY_EXPONENTS = {
+    Currency.USD: 2,
+    Currency.EUR: 2,
+    Currency.GBP: 2,
+}
+
+class LimitPeriod(str, Enum):
+    DAY = "day"
+    MONTH = "month"
+
+
 class WalletReadItem(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: UUID
     currency: str
     balance: Decimal
+    held_balance: Decimal
+    available_balance: Decimal
+    version: int
     created_at: datetime
 
 
 class WalletsRead(BaseModel):
     wallet: WalletReadItem
-    wallets: list[WalletReadItem]
\ No newline at end of file
+    wallets: list[WalletReadItem]
+
+
+class UpdateSpendingLimits(BaseModel):
+    # Only the fields sent are changed; null clears a wallet override.
+    tier: str | None = None
+    daily_limit: Decimal | None = Field(default=None, ge=0, decimal_places=2)
+    monthly_limit: Decimal | None = Field(default=None, ge=0, decimal_places=2)
+
+
+class SpendingLimitRead(BaseModel):
+    period: LimitPeriod
+    limit: Decimal | None
+    spent: Decimal
+    remaining: Decimal | None
+
+
+class WalletLimitsRead(BaseModel):
+    wallet_id: UUID
+    tier: str
+    limits: list[SpendingLimitRead]
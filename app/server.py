@@ -0,0 +1,160 @@
+import argparse
+import logging
+import os
+import signal
+import time
+
+import uvicorn
+
+from app.core.config import db_settings
+
+logger = logging.getLogger("app.server")
+
+APP = "app.main:app"
+
+
+class Arbiter:
+    # A small pre-fork supervisor: the master binds the socket once, forks the
+    # workers (each running its own uvicorn server on the shared socket) and
+    # replaces any that die. Per-process state such as DB and Redis pools is
+    # reset in the children by the os.register_at_fork hooks in those modules.
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        workers: int,
+        graceful_timeout: float,
+    ):
+        self.config = config
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.children: set[int] = set()
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+
+        if pid:
+            self.children.add(pid)
+            return
+
+        # Child. uvicorn installs its own SIGTERM/SIGINT handlers: stop
+        # accepting, let in-flight requests finish (up to
+        # timeout_graceful_shutdown), then exit.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        exit_code = 0
+
+        try:
+            uvicorn.Server(self.config).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %d crashed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+
+            if pid == 0:
+                return
+
+            self.children.discard(pid)
+
+            if not self.stopping:
+                logger.warning("Worker %d exited (status %d), restarting", pid, status)
+
+    def run(self, preload: bool) -> None:
+        self.socket = self.config.bind_socket()
+
+        if preload:
+            # Import the app (settings, engine, bcrypt dummy hash, ...) once
+            # in the master, so workers fork with it already loaded.
+            self.config.load()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        logger.info("Starting %d workers (preload=%s)", self.workers, preload)
+
+        while not self.stopping:
+            self.reap()
+
+            while len(self.children) < self.workers and not self.stopping:
+                self.spawn()
+
+            time.sleep(0.5)
+
+        self.drain()
+
+    def drain(self) -> None:
+        logger.info("Draining %d workers", len(self.children))
+
+        # Once the workers close their copies too, new connections are refused
+        # instead of queueing on a socket nobody accepts from any more.
+        self.socket.close()
+
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+
+        # A little longer than the workers' own graceful timeout, so they get
+        # to exit by themselves before being killed.
+        deadline = time.monotonic() + self.graceful_timeout + 5
+
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+
+        for pid in self.children:
+            logger.warning("Worker %d did not stop in time, killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes.")
+    parser.add_argument("--host", default=db_settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=db_settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=db_settings.SERVER_WORKERS)
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=db_settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+    parser.add_argument(
+        "--preload",
+        action=argparse.BooleanOptionalAction,
+        default=db_settings.SERVER_PRELOAD,
+        help="Import the app in the master before forking workers.",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+
+    config = uvicorn.Config(
+        APP,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+    )
+
+    if args.workers <= 1:
+        # Nothing to supervise
+        uvicorn.Server(config).run()
+        return
+
+    Arbiter(config, args.workers, args.graceful_timeout).run(preload=args.preload)
+
+
+if __name__ == "__main__":
+    main()
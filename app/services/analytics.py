@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import BigInteger, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import db_settings
+from app.models.ledger import LedgerEntry
+from app.models.rollup import RollupWatermark, TransactionVolumeRollup
+from app.models.transaction import Transaction
+from app.models.wallet import Wallet
+from app.schemas.analytics import RollupGranularity, VolumeRollupRead
+
+VOLUME_ROLLUP = "transaction_volume_hourly"
+
+
+class AnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _lock_watermark(self) -> RollupWatermark:
+        # Row lock serialises concurrent runs of the job
+        stmt = (
+            select(RollupWatermark)
+            .where(RollupWatermark.name == VOLUME_ROLLUP)
+            .with_for_update()
+        )
+
+        watermark = self.db.execute(stmt).scalar_one_or_none()
+
+        if watermark is not None:
+            return watermark
+
+        # First run: start just before the oldest entry
+        oldest = self.db.execute(select(func.min(LedgerEntry.created_at))).scalar()
+        start = (oldest or datetime.now(timezone.utc)) - timedelta(microseconds=1)
+
+        self.db.execute(
+            insert(RollupWatermark)
+            .values(name=VOLUME_ROLLUP, processed_until=start)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+
+        return self.db.execute(stmt).scalar_one()
+
+    def refresh_volume_rollups(
+        self,
+        lag_seconds: int = db_settings.ROLLUP_LAG_SECONDS,
+        max_window_seconds: int = db_settings.ROLLUP_MAX_WINDOW_SECONDS,
+    ) -> bool:
+        # Returns True when the window was capped, i.e. there is more to catch up on
+        try:
+            watermark = self._lock_watermark()
+
+            now = self.db.execute(select(func.now())).scalar()
+            window_start = watermark.processed_until
+            caught_up_at = now - timedelta(seconds=lag_seconds)
+            window_end = min(
+                caught_up_at,
+                window_start + timedelta(seconds=max_window_seconds),
+            )
+
+            if window_end <= window_start:
+                self.db.commit()
+                return False
+
+            bucket = func.date_trunc("hour", LedgerEntry.created_at, literal("UTC"))
+
+            # Only entries since the watermark are read (via the created_at
+            # index) and folded into the existing hourly rows.
+            new_volume = (
+                select(
+                    bucket.label("bucket_start"),
+                    Wallet.currency,
+                    Transaction.type,
+                    func.count().label("entry_count"),
+                    func.sum(func.greatest(LedgerEntry.amount, 0)).label("credit_volume"),
+                    func.sum(func.greatest(-LedgerEntry.amount, 0)).label("debit_volume"),
+                )
+                .join(Transaction, Transaction.id == LedgerEntry.transaction_id)
+                .join(Wallet, Wallet.id == LedgerEntry.wallet_id)
+                .where(
+                    LedgerEntry.created_at > window_start,
+                    LedgerEntry.created_at <= window_end,
+                )
+                .group_by(bucket, Wallet.currency, Transaction.type)
+            )
+
+            stmt = insert(TransactionVolumeRollup).from_select(
+                [
+                    "bucket_start",
+                    "currency",
+                    "type",
+                    "entry_count",
+                    "credit_volume",
+                    "debit_volume",
+                ],
+                new_volume,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["bucket_start", "currency", "type"],
+                set_={
+                    "entry_count": TransactionVolumeRollup.entry_count + stmt.excluded.entry_count,
+                    "credit_volume": TransactionVolumeRollup.credit_volume + stmt.excluded.credit_volume,
+                    "debit_volume": TransactionVolumeRollup.debit_volume + stmt.excluded.debit_volume,
+                },
+            )
+
+            self.db.execute(stmt)
+
+            # Advanced in the same transaction, so a window is counted exactly once
+            watermark.processed_until = window_end
+            self.db.commit()
+
+            return window_end < caught_up_at
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def get_volume(
+        self,
+        granularity: RollupGranularity,
+        start: datetime,
+        end: datetime,
+        currency: str | None = None,
+        transaction_type: str | None = None,
+    ) -> list[VolumeRollupRead]:
+
+        bucket = func.date_trunc(
+            granularity.value,
+            TransactionVolumeRollup.bucket_start,
+            literal("UTC"),
+        ).label("bucket_start")
+
+        stmt = (
+            select(
+                bucket,
+                TransactionVolumeRollup.currency,
+                TransactionVolumeRollup.type,
+                cast(func.sum(TransactionVolumeRollup.entry_count), BigInteger).label("entry_count"),
+                func.sum(TransactionVolumeRollup.credit_volume).label("credit_volume"),
+                func.sum(TransactionVolumeRollup.debit_volume).label("debit_volume"),
+            )
+            .where(
+                TransactionVolumeRollup.bucket_start >= start,
+                TransactionVolumeRollup.bucket_start < end,
+            )
+            .group_by(
+                bucket,
+                TransactionVolumeRollup.currency,
+                TransactionVolumeRollup.type,
+            )
+            .order_by(bucket, TransactionVolumeRollup.currency, TransactionVolumeRollup.type)
+        )
+
+        if currency is not None:
+            stmt = stmt.where(TransactionVolumeRollup.currency == currency)
+
+        if transaction_type is not None:
+            stmt = stmt.where(TransactionVolumeRollup.type == transaction_type)
+
+        rows = self.db.execute(stmt).all()
+
+        return [
+            VolumeRollupRead.model_construct(**row._mapping)
+            for row in rows
+        ]
@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import db_settings
+from app.models.archive import (
+    ArchivedLedgerEntry,
+    ArchivedTransaction,
+    WalletArchiveBalance,
+)
+from app.models.hold import Hold
+from app.models.ledger import LedgerEntry
+from app.models.transaction import Transaction
+from app.models.transfer_review import TransferReview
+from app.models.transfer_saga import TransferSaga
+from app.models.wallet import Wallet
+from app.schemas.transaction import TransactionStatus
+
+# Only settled transactions are moved; anything still pending stays hot.
+_FINAL_STATUSES = (
+    TransactionStatus.COMPLETED,
+    TransactionStatus.FAILED,
+    TransactionStatus.REVERSED,
+)
+
+_LEDGER_COLUMNS = ["id", "wallet_id", "transaction_id", "amount", "created_at"]
+_TRANSACTION_COLUMNS = ["id", "type", "status", "reference", "reversal_of_id", "created_at"]
+
+
+def archive_cutoff(horizon_days: int = db_settings.ARCHIVE_HORIZON_DAYS) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=horizon_days)
+
+
+class ArchiveService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _claim_batch(self, cutoff: datetime, batch_size: int) -> list:
+        reversal = aliased(Transaction)
+
+        # Transactions still linked to hot rows (reversal pairs, captured
+        # holds, reviewed transfers, transfer sagas) are left alone, so no foreign key ever points into the archive.
+        return self.db.execute(
+            select(Transaction.id)
+            .where(
+                Transaction.created_at < cutoff,
+                Transaction.status.in_(_FINAL_STATUSES),
+                Transaction.reversal_of_id.is_(None),
+                ~exists().where(reversal.reversal_of_id == Transaction.id),
+                ~exists().where(Hold.transaction_id == Transaction.id),
+                ~exists().where(TransferReview.transaction_id == Transaction.id),
+                ~exists().where(TransferSaga.transaction_id == Transaction.id),
+            )
+            .order_by(Transaction.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+    def archive_batch(
+        self,
+        horizon_days: int = db_settings.ARCHIVE_HORIZON_DAYS,
+        batch_size: int = db_settings.ARCHIVE_BATCH_SIZE,
+    ) -> int:
+
+        try:
+            transaction_ids = self._claim_batch(archive_cutoff(horizon_days), batch_size)
+
+            if not transaction_ids:
+                self.db.rollback()
+                return 0
+
+            # 1. Fold the entries into each wallet's carry-forward balance
+            carried = (
+                select(
+                    LedgerEntry.wallet_id,
+                    func.sum(LedgerEntry.amount),
+                    func.count(),
+                    func.max(LedgerEntry.created_at),
+                )
+                .where(LedgerEntry.transaction_id.in_(transaction_ids))
+                .group_by(LedgerEntry.wallet_id)
+            )
+            stmt = insert(WalletArchiveBalance).from_select(
+                ["wallet_id", "carried_balance", "archived_entry_count", "archived_until"],
+                carried,
+            )
+            self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["wallet_id"],
+                    set_={
+                        "carried_balance": WalletArchiveBalance.carried_balance
+                        + stmt.excluded.carried_balance,
+                        "archived_entry_count": WalletArchiveBalance.archived_entry_count
+                        + stmt.excluded.archived_entry_count,
+                        "archived_until": func.greatest(
+                            WalletArchiveBalance.archived_until,
+                            stmt.excluded.archived_until,
+                        ),
+                    },
+                )
+            )
+
+            # ...and move the wallets' archive watermarks up with it. Not a
+            # balance change, so the wallet version stays as it is.
+            self.db.execute(
+                update(Wallet)
+                .where(
+                    Wallet.id == WalletArchiveBalance.wallet_id,
+                    WalletArchiveBalance.wallet_id.in_(carried.with_only_columns(LedgerEntry.wallet_id)),
+                )
+                .values(archived_until=WalletArchiveBalance.archived_until)
+                .execution_options(synchronize_session=False)
+            )
+
+            # 2. Move entries, then their transactions, each with a single
+            # DELETE ... RETURNING feeding an INSERT (no round trip per row).
+            moved_entries = (
+                delete(LedgerEntry)
+                .where(LedgerEntry.transaction_id.in_(transaction_ids))
+                .returning(*[LedgerEntry.__table__.c[name] for name in _LEDGER_COLUMNS])
+                .cte("moved_entries")
+            )
+            self.db.execute(
+                insert(ArchivedLedgerEntry).from_select(
+                    _LEDGER_COLUMNS,
+                    select(*[moved_entries.c[name] for name in _LEDGER_COLUMNS]),
+                )
+            )
+
+            moved_transactions = (
+                delete(Transaction)
+                .where(Transaction.id.in_(transaction_ids))
+                .returning(*[Transaction.__table__.c[name] for name in _TRANSACTION_COLUMNS])
+                .cte("moved_transactions")
+            )
+            self.db.execute(
+                insert(ArchivedTransaction).from_select(
+                    _TRANSACTION_COLUMNS,
+                    select(*[moved_transactions.c[name] for name in _TRANSACTION_COLUMNS]),
+                )
+            )
+
+            self.db.commit()
+
+            return len(transaction_ids)
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def ledger_balance(self, wallet_id: UUID) -> Decimal:
+        # What the ledger says the wallet should hold: the archived
+        # carry-forward plus every entry still in the hot table.
+        carried = select(WalletArchiveBalance.carried_balance).where(
+            WalletArchiveBalance.wallet_id == wallet_id
+        ).scalar_subquery()
+        hot = select(func.sum(LedgerEntry.amount)).where(
+            LedgerEntry.wallet_id == wallet_id
+        ).scalar_subquery()
+
+        return self.db.execute(
+            select(func.coalesce(carried, 0) + func.coalesce(hot, 0))
+        ).scalar_one()
@@ -1,13 +1,26 @@
+import hashlib
+import secrets
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
+from app.models.wallet import Wallet
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from app.services.wallet import WalletService
+from app.core.config import db_settings
+from app.db.sharding import MAIN_SHARD, shard_map
+from app.services.sharding import create_shard_wallets
+from app.services.wallet import DEFAULT_WALLET_CURRENCIES, WalletService
 
-from app.schemas.auth import AuthBase
+from app.schemas.auth import AuthBase, BulkProvisionRead, ProvisionUser, TokenRead
 from app.schemas.wallet import Currency
+from app.services.token_revocation import token_revocations
 
 from app.utils import generate_access_token
 
@@ -23,6 +36,10 @@ class WeakPasswordError(ValueError):
     pass
 
 
+class InvalidRefreshTokenError(Exception):
+    pass
+
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -35,6 +52,30 @@ def normalize_email(email: str) -> str:
     return email.strip().lower()
 
 
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are long random strings, so a fast hash is enough
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def hash_passwords(passwords: list[str], executor: Executor | None = None) -> list[str]:
+    # bcrypt is deliberately slow (~0.25s each), so this is the bottleneck
+    # of any bulk import; spread it over all cores.
+    if not passwords:
+        return []
+
+    if executor is None:
+        # The small batches of POST /admin/users/bulk: bcrypt releases the
+        # GIL, so threads use the cores without forking the API worker.
+        # The CLI passes a process pool for the big imports.
+        with ThreadPoolExecutor(max_workers=db_settings.PROVISION_HASH_WORKERS) as threads:
+            return list(threads.map(hash_password, passwords))
+
+    workers = getattr(executor, "_max_workers", 1)
+    chunksize = max(1, len(passwords) // (workers * 4))
+
+    return list(executor.map(hash_password, passwords, chunksize=chunksize))
+
+
 def create_user(db: Session, email: str, password: str) -> User:
 
     user = User(
@@ -77,10 +118,18 @@ class AuthService:
                     credentials.password,
                 )
 
-                self.wallet_service.create_wallets(
-                    str(user.id),
-                    currencies=currencies,
-                )
+                # New users are spread over the shards; without extra
+                # shards everyone stays on main (shard left unset).
+                if shard_map.enabled:
+                    user.shard = shard_map.place_user(user.id)
+
+                if shard_map.home_shard(user) == MAIN_SHARD:
+                    self.wallet_service.create_wallets(
+                        str(user.id),
+                        currencies=currencies,
+                    )
+                else:
+                    create_shard_wallets(self.db, user, currencies=currencies)
 
         except UserAlreadyExistsError:
             raise
@@ -93,7 +142,136 @@ class AuthService:
 
         return user
 
-    def authenticate_user(self, email: str, password: str) -> str | None:
+    def bulk_create_users_with_wallets(
+        self,
+        users: list[ProvisionUser],
+        currencies: list[Currency] | None = None,
+        chunk_size: int = db_settings.PROVISION_CHUNK_SIZE,
+        executor: Executor | None = None,
+    ) -> BulkProvisionRead:
+
+        report = BulkProvisionRead()
+        currencies = currencies or list(DEFAULT_WALLET_CURRENCIES)
+
+        # Duplicates inside the batch itself are reported like existing ones
+        pending: dict[str, ProvisionUser] = {}
+
+        for user in users:
+            email = normalize_email(user.email)
+
+            if email in pending:
+                report.duplicates.append(email)
+            elif user.hashed_password is not None and pwd_context.identify(user.hashed_password) is None:
+                report.failed[email] = "Unsupported password hash"
+            else:
+                pending[email] = user
+
+        pending_users = list(pending.items())
+
+        for start in range(0, len(pending_users), chunk_size):
+            chunk = pending_users[start:start + chunk_size]
+
+            # Skip hashing for users that are already there (e.g. a re-run
+            # import); the ON CONFLICT below still covers any race.
+            existing = set(self.db.execute(
+                select(User.email).where(User.email.in_([email for email, _ in chunk]))
+            ).scalars())
+
+            if existing:
+                report.duplicates.extend(email for email, _ in chunk if email in existing)
+                chunk = [(email, user) for email, user in chunk if email not in existing]
+
+            if not chunk:
+                continue
+
+            to_hash = [user.password for _, user in chunk if user.password is not None]
+            hashes = iter(hash_passwords(to_hash, executor=executor))
+
+            rows = [
+                {
+                    "email": email,
+                    "hashed_password": (
+                        user.hashed_password
+                        if user.hashed_password is not None
+                        else next(hashes)
+                    ),
+                }
+                for email, user in chunk
+            ]
+
+            try:
+                # One multi-row INSERT per chunk. Emails that already exist are
+                # skipped by ON CONFLICT instead of failing the whole chunk, and
+                # RETURNING tells us which rows actually went in.
+                created = self.db.execute(
+                    pg_insert(User)
+                    .on_conflict_do_nothing(index_elements=["email"])
+                    .returning(User.id, User.email),
+                    rows,
+                ).all()
+
+                if created:
+                    self.db.execute(
+                        insert(Wallet),
+                        [
+                            {"user_id": user_id, "currency": currency, "balance": 0}
+                            for user_id, _ in created
+                            for currency in currencies
+                        ],
+                    )
+
+                self.db.commit()
+
+            except Exception:
+                self.db.rollback()
+                raise
+
+            created_emails = {email for _, email in created}
+            report.created += len(created)
+            report.duplicates.extend(
+                email for email, _ in chunk if email not in created_emails
+            )
+
+        return report
+
+    def issue_tokens(
+        self,
+        user: User,
+        family_id: uuid.UUID | None = None,
+    ) -> TokenRead:
+
+        family_id = family_id or uuid.uuid4()
+        refresh_token = secrets.token_urlsafe(32)
+
+        self.db.add(
+            RefreshToken(
+                user_id=user.id,
+                family_id=family_id,
+                token_hash=hash_refresh_token(refresh_token),
+                expires_at=datetime.now(timezone.utc)
+                + timedelta(days=db_settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            )
+        )
+        self.db.commit()
+
+        access_token = generate_access_token(
+            data={
+                "user": {
+                    "name": user.email,  # change it to name later
+                    "id": str(user.id),
+                },
+                # the login session, so logout can end just this one
+                "sid": str(family_id),
+            }
+        )
+
+        return TokenRead(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_in=db_settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        )
+
+    def authenticate_user(self, email: str, password: str) -> TokenRead | None:
 
         normalized_email = normalize_email(email)
 
@@ -112,16 +290,82 @@ class AuthService:
         if not user or not valid:
             return None
 
-        token = generate_access_token(
-            data={
-                "user": {
-                    "name": user.email,  # change it to name later
-                    "id": str(user.id),
-                }
-            }
+        return self.issue_tokens(user)
+
+    def refresh(self, refresh_token: str) -> TokenRead:
+        token_hash = hash_refresh_token(refresh_token)
+
+        # Each refresh token works once: marking it used is a conditional
+        # UPDATE, so two requests racing with the same token can't both win.
+        token = self.db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_(None),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > func.now(),
+            )
+            .values(used_at=func.now())
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        ).one_or_none()
+
+        if token is None:
+            self._detect_reuse(token_hash)
+            raise InvalidRefreshTokenError()
+
+        user = self.db.get(User, token.user_id)
+
+        if user is None or not user.is_active:
+            self.db.rollback()
+            raise InvalidRefreshTokenError()
+
+        # Commits the used flag together with its replacement
+        return self.issue_tokens(user, family_id=token.family_id)
+
+    def _detect_reuse(self, token_hash: str) -> None:
+        # A token that was already rotated is being presented again, so
+        # either the client or an attacker holds a stolen copy. Kill the
+        # whole session and the access tokens it handed out.
+        reused = self.db.execute(
+            select(RefreshToken.user_id, RefreshToken.family_id).where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_not(None),
+            )
+        ).one_or_none()
+
+        if reused is None:
+            self.db.rollback()
+            return
+
+        self._revoke_refresh_tokens(RefreshToken.family_id == reused.family_id)
+        self.db.commit()
+
+        token_revocations.revoke_user(str(reused.user_id))
+
+    def _revoke_refresh_tokens(self, *criteria) -> None:
+        self.db.execute(
+            update(RefreshToken)
+            .where(*criteria, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
         )
 
-        return token
+    def logout(self, user_id: str, session_id: str | None = None) -> None:
+        # Ends this session's refresh chain. The watermark also invalidates
+        # the user's other access tokens, but their sessions just refresh.
+        if session_id is not None:
+            self._revoke_refresh_tokens(
+                RefreshToken.user_id == uuid.UUID(user_id),
+                RefreshToken.family_id == uuid.UUID(session_id),
+            )
+            self.db.commit()
+
+        token_revocations.revoke_user(user_id)
+
+    def logout_everywhere(self, user_id: str) -> None:
+        self._revoke_refresh_tokens(RefreshToken.user_id == uuid.UUID(user_id))
+        self.db.commit()
+
+        token_revocations.revoke_user(user_id)
 
 
 # why execute select? why not just query all? because SQLAlchemy 2.0 style uses select() statements instead of query() method for better clarity and performance.
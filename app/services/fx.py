@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_DOWN, Decimal
+from pathlib import Path
+from typing import NamedTuple, Protocol
+from uuid import UUID, uuid4
+
+import jwt
+from sqlalchemy import URL, select
+from sqlalchemy.orm import Session
+
+from app.core.config import db_settings, security_settings
+from app.models.wallet import Wallet
+from app.schemas.wallet import Currency
+
+logger = logging.getLogger(__name__)
+
+_QUOTE_TOKEN_TYPE = "fx_quote"
+
+# Used when no FX_RATES_FILE is configured; units per 1 USD
+STUB_RATES = {
+    "USD": Decimal("1"),
+    "EUR": Decimal("0.92"),
+    "GBP": Decimal("0.79"),
+}
+
+
+class FxRateUnavailableError(Exception):
+    pass
+
+class InvalidFxQuoteError(Exception):
+    pass
+
+class FxHouseWalletNotConfiguredError(Exception):
+    pass
+
+class FxLiquidityError(Exception):
+    pass
+
+
+class FxQuote(NamedTuple):
+    quote_id: str
+    user_id: str
+    source_currency: Currency
+    destination_currency: Currency
+    source_amount: Decimal
+    destination_amount: Decimal
+    rate: Decimal
+    expires_at: datetime
+
+
+class RateProvider(Protocol):
+    def fetch(self) -> dict[str, Decimal]: ...
+
+
+class StubRateProvider:
+    def __init__(self, rates: dict[str, Decimal] | None = None):
+        self.rates = rates or STUB_RATES
+
+    def fetch(self) -> dict[str, Decimal]:
+        return dict(self.rates)
+
+
+class FileRateProvider:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def fetch(self) -> dict[str, Decimal]:
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        return {currency.upper(): Decimal(str(rate)) for currency, rate in data.items()}
+
+
+class RateCache:
+    # Rates live in a plain dict that is swapped wholesale on refresh, so
+    # readers never take a lock and never touch the DB or the provider,
+    # except for the one request that notices the cache went stale.
+
+    def __init__(
+        self,
+        provider: RateProvider,
+        refresh_seconds: float = db_settings.FX_RATE_REFRESH_SECONDS,
+    ):
+        self.provider = provider
+        self.refresh_seconds = refresh_seconds
+        self._rates: dict[str, Decimal] = {}
+        self._loaded_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> None:
+        try:
+            rates = self.provider.fetch()
+        except Exception:
+            # Keep serving the last good rates; staleness is bounded by quote TTLs
+            logger.warning("FX rate refresh failed", exc_info=True)
+            return
+
+        self._rates = rates
+        self._loaded_at = time.monotonic()
+
+    def _reset_after_fork(self) -> None:
+        # A lock held by another thread at fork time would never be released
+        self._refresh_lock = threading.Lock()
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+
+        # Only one thread refreshes; the others keep using the current rates
+        if self._refresh_lock.acquire(blocking=not self._rates):
+            try:
+                if time.monotonic() - self._loaded_at >= self.refresh_seconds:
+                    self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def get_rate(self, source_currency: str, destination_currency: str) -> Decimal:
+        self._maybe_refresh()
+        rates = self._rates
+
+        try:
+            return rates[destination_currency] / rates[source_currency]
+        except (KeyError, ArithmeticError):
+            raise FxRateUnavailableError(
+                f"No rate for {source_currency}/{destination_currency}."
+            )
+
+
+def build_rate_provider() -> RateProvider:
+    if db_settings.FX_RATES_FILE:
+        return FileRateProvider(db_settings.FX_RATES_FILE)
+
+    return StubRateProvider()
+
+
+rate_cache = RateCache(build_rate_provider())
+os.register_at_fork(after_in_child=rate_cache._reset_after_fork)
+
+
+def create_quote(
+    user_id: str,
+    source_currency: Currency,
+    destination_currency: Currency,
+    amount: Decimal,
+) -> tuple[FxQuote, str]:
+
+    mid_rate = rate_cache.get_rate(source_currency.value, destination_currency.value)
+    # The house keeps the spread
+    rate = mid_rate * (Decimal(1) - Decimal(db_settings.FX_SPREAD_BPS) / Decimal(10_000))
+
+    quote = FxQuote(
+        quote_id=str(uuid4()),
+        user_id=user_id,
+        source_currency=source_currency,
+        destination_currency=destination_currency,
+        source_amount=amount,
+        destination_amount=(amount * rate).quantize(destination_currency.minor_unit, rounding=ROUND_DOWN),
+        rate=rate.quantize(Decimal("0.00000001")),
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=db_settings.FX_QUOTE_TTL_SECONDS),
+    )
+
+    # The quote is a signed token rather than a stored row, so quoting never
+    # hits the DB and any worker process can execute a quote issued by another.
+    token = jwt.encode(
+        payload={
+            "type": _QUOTE_TOKEN_TYPE,
+            "jti": quote.quote_id,
+            "user_id": quote.user_id,
+            "source_currency": quote.source_currency.value,
+            "destination_currency": quote.destination_currency.value,
+            "source_amount": str(quote.source_amount),
+            "destination_amount": str(quote.destination_amount),
+            "rate": str(quote.rate),
+            "exp": quote.expires_at,
+        },
+        algorithm=security_settings.JWT_ALGORITHM,
+        key=security_settings.JWT_SECRET,
+    )
+
+    return quote, token
+
+
+def verify_quote(token: str, user_id: str) -> FxQuote:
+    try:
+        data = jwt.decode(
+            jwt=token,
+            algorithms=[security_settings.JWT_ALGORITHM],
+            key=security_settings.JWT_SECRET,
+        )
+    except jwt.ExpiredSignatureError:
+        raise InvalidFxQuoteError("FX quote has expired.")
+    except jwt.PyJWTError:
+        raise InvalidFxQuoteError("Invalid FX quote.")
+
+    if data.get("type") != _QUOTE_TOKEN_TYPE or data.get("user_id") != user_id:
+        raise InvalidFxQuoteError("Invalid FX quote.")
+
+    return FxQuote(
+        quote_id=data["jti"],
+        user_id=data["user_id"],
+        source_currency=Currency(data["source_currency"]),
+        destination_currency=Currency(data["destination_currency"]),
+        source_amount=Decimal(data["source_amount"]),
+        destination_amount=Decimal(data["destination_amount"]),
+        rate=Decimal(data["rate"]),
+        expires_at=datetime.fromtimestamp(data["exp"], timezone.utc),
+    )
+
+
+# (database, currency) -> house wallet id; these never change, so look each
+# up once. Every shard has its own house wallets, and the database the
+# session is bound to says which shard this is.
+_house_wallet_ids: dict[tuple[URL, str], UUID] = {}
+
+
+def get_fx_house_wallet_id(db: Session, currency: str) -> UUID:
+    key = (db.get_bind().url, currency)
+    wallet_id = _house_wallet_ids.get(key)
+
+    if wallet_id is not None:
+        return wallet_id
+
+    if not db_settings.FX_HOUSE_USER_ID:
+        raise FxHouseWalletNotConfiguredError()
+
+    wallet_id = db.execute(
+        select(Wallet.id).where(
+            Wallet.user_id == UUID(db_settings.FX_HOUSE_USER_ID),
+            Wallet.currency == currency,
+        )
+    ).scalar_one_or_none()
+
+    if wallet_id is None:
+        raise FxHouseWalletNotConfiguredError()
+
+    _house_wallet_ids[key] = wallet_id
+
+    return wallet_id
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import text
+
+from app.core.config import db_settings
+from app.db.session import engine
+from app.schemas.health import (
+    DatabaseHealthRead,
+    DependencyRead,
+    HealthRead,
+    HealthStatus,
+    PoolRead,
+)
+
+
+def _check_database() -> None:
+    with engine.connect() as conn:
+        timeout_ms = int(db_settings.HEALTH_CHECK_TIMEOUT_SECONDS * 1000)
+        conn.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+        conn.execute(text("SELECT 1"))
+
+
+def _check_redis() -> None:
+    from app.db.redis_db import ping_redis
+
+    ping_redis()
+
+
+def pool_usage() -> PoolRead:
+    pool = engine.pool
+    capacity = pool.size() + pool._max_overflow
+
+    return PoolRead(
+        size=pool.size(),
+        max_overflow=pool._max_overflow,
+        checked_out=pool.checkedout(),
+        saturation=round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+    )
+
+
+class Probe:
+    def __init__(self, check: Callable[[], None], samples: int = 20):
+        self.check = check
+        self.latencies: deque[float] = deque(maxlen=samples)
+        self.error: str | None = None
+
+    def result(self) -> DependencyRead:
+        last = self.latencies[-1] if self.latencies else None
+
+        if self.error is not None:
+            status = HealthStatus.DOWN
+        elif last is not None and last > db_settings.HEALTH_LATENCY_THRESHOLD_MS:
+            status = HealthStatus.DEGRADED
+        else:
+            status = HealthStatus.OK
+
+        return DependencyRead(
+            status=status,
+            latency_ms=last,
+            avg_latency_ms=(
+                round(sum(self.latencies) / len(self.latencies), 2)
+                if self.latencies
+                else None
+            ),
+            error=self.error,
+        )
+
+
+class HealthMonitor:
+    # Dependency checks run on their own small thread pool, so a probe still
+    # gets an answer when the request thread pool or the DB pool is exhausted,
+    # and each one is cut off after HEALTH_CHECK_TIMEOUT_SECONDS. Results are
+    # cached for HEALTH_CACHE_SECONDS and only one refresh runs at a time, so
+    # however often the orchestrator polls, Postgres and Redis see at most
+    # one check per window from each worker.
+
+    def __init__(
+        self,
+        cache_seconds: float = db_settings.HEALTH_CACHE_SECONDS,
+        timeout: float = db_settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+    ):
+        self.cache_seconds = cache_seconds
+        self.timeout = timeout
+        self.database = Probe(_check_database)
+        self.redis = Probe(_check_redis)
+        self._checked_at: datetime | None = None
+        self._refreshed = 0.0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="health")
+        self._lock = asyncio.Lock()
+
+    async def _run(self, probe: Probe, pool: PoolRead | None = None) -> None:
+        if pool is not None and pool.saturation >= 1:
+            # Checking out a connection would just queue behind requests;
+            # the saturation itself already marks the worker degraded.
+            return
+
+        started = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(self._executor, probe.check),
+                timeout=self.timeout,
+            )
+        except asyncio.TimeoutError:
+            probe.error = f"No answer within {self.timeout:g}s."
+            probe.latencies.append(round(self.timeout * 1000, 2))
+        except Exception as e:
+            probe.error = f"{type(e).__name__}: {e}"
+        else:
+            probe.error = None
+            probe.latencies.append(round((time.perf_counter() - started) * 1000, 2))
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            # Someone else may have refreshed while we waited for the lock
+            if time.monotonic() - self._refreshed < self.cache_seconds:
+                return
+
+            await asyncio.gather(
+                self._run(self.database, pool_usage()),
+                self._run(self.redis),
+            )
+            self._refreshed = time.monotonic()
+            self._checked_at = datetime.now(timezone.utc)
+
+    async def report(self) -> HealthRead:
+        if time.monotonic() - self._refreshed >= self.cache_seconds:
+            await self.refresh()
+
+        # Pool usage is read live; it costs nothing
+        pool = pool_usage()
+        database = DatabaseHealthRead(**self.database.result().model_dump(), pool=pool)
+
+        if (
+            database.status == HealthStatus.OK
+            and pool.saturation >= db_settings.HEALTH_POOL_SATURATION_THRESHOLD
+        ):
+            database.status = HealthStatus.DEGRADED
+
+        redis = self.redis.result()
+        statuses = {database.status, redis.status}
+
+        if HealthStatus.DOWN in statuses:
+            status = HealthStatus.DOWN
+        elif HealthStatus.DEGRADED in statuses:
+            status = HealthStatus.DEGRADED
+        else:
+            status = HealthStatus.OK
+
+        return HealthRead(
+            status=status,
+            pid=os.getpid(),
+            checked_at=self._checked_at,
+            database=database,
+            redis=redis,
+        )
+
+
+health_monitor = HealthMonitor()
+os.register_at_fork(after_in_child=health_monitor._reset)
@@ -0,0 +1,349 @@
+import threading
+from array import array
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+from app.schemas.transaction import TransactionStatus, TransactionType
+from app.services.transaction import (
+    InvalidJournalError,
+    InvalidTransferError,
+    TransactionNotFoundError,
+    TransactionNotReversibleError,
+    WalletCurrencyMismatchError,
+)
+from app.services.wallet import InsufficientBalanceError, WalletNotFoundError
+
+# Amounts are kept as integer cents, the same 2 decimal places as the
+# Numeric(18, 2) columns, so sums are exact and fit in array("q").
+_CENT = Decimal("0.01")
+
+_TYPES = list(TransactionType)
+_TYPE_CODES = {t: i for i, t in enumerate(_TYPES)}
+_STATUSES = list(TransactionStatus)
+_STATUS_CODES = {s: i for i, s in enumerate(_STATUSES)}
+_COMPLETED = _STATUS_CODES[TransactionStatus.COMPLETED]
+
+# Legs that must net to zero; deposits and withdrawals have a single leg
+# (the money comes from or goes outside the ledger).
+_BALANCED_TYPES = {TransactionType.TRANSFER, TransactionType.JOURNAL}
+
+
+class DuplicateReferenceError(Exception):
+    # What the unique transactions.reference index gives the DB services
+    pass
+
+
+def to_cents(amount: Decimal) -> int:
+    cents = amount / _CENT
+
+    if cents != cents.to_integral_value():
+        raise ValueError("Amounts can have at most 2 decimal places.")
+
+    return int(cents)
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents) * _CENT
+
+
+def _wallet_index(wallet: "MemoryWallet") -> int:
+    return wallet.index
+
+
+def _check_amount(amount: Decimal) -> None:
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero.")
+
+
+class MemoryWallet:
+    __slots__ = ("index", "id", "user_id", "currency", "balance", "held_balance", "version", "lock")
+
+    def __init__(self, index: int, user_id: UUID, currency: str):
+        self.index = index
+        self.id = uuid4()
+        self.user_id = user_id
+        self.currency = currency
+        self.balance = 0
+        self.held_balance = 0
+        self.version = 1
+        self.lock = threading.Lock()
+
+
+class MemoryLedger:
+    # An in-process stand-in for WalletService + TransactionService, for
+    # business-rule tests and capacity simulations that don't need Postgres.
+    # It keeps the rules that matter for money: a debit only goes through if
+    # the available balance (balance - held) covers it, every operation is
+    # all-or-nothing, transfers and journals net to zero, and references are
+    # unique. Holds, spending limits, risk checks and FX are left out.
+    #
+    # Wallets are __slots__ objects, each with its own lock; an operation
+    # locks its wallets in index order, like lock_wallets does in id order,
+    # so operations on different wallets don't wait on each other. The
+    # ledger itself is a handful of parallel arrays (one row per transaction,
+    # one per entry), appended to under a short global lock.
+
+    def __init__(self):
+        self.wallets: list[MemoryWallet] = []
+        self._wallets_by_id: dict[UUID, MemoryWallet] = {}
+        self._references: dict[str, int] = {}
+
+        # transactions: type, status, first entry, entry count
+        self.transaction_types = array("b")
+        self.transaction_statuses = array("b")
+        self._transaction_entries = array("q")
+        self._transaction_entry_counts = array("i")
+        # entries: wallet index, amount in cents
+        self.entry_wallets = array("q")
+        self.entry_amounts = array("q")
+
+        self._log_lock = threading.Lock()
+
+    # Wallets
+
+    def create_wallet(self, user_id: UUID, currency: str) -> MemoryWallet:
+        with self._log_lock:
+            wallet = MemoryWallet(len(self.wallets), user_id, currency)
+            self.wallets.append(wallet)
+            self._wallets_by_id[wallet.id] = wallet
+
+        return wallet
+
+    def get_wallet(self, wallet_id: UUID) -> MemoryWallet:
+        wallet = self._wallets_by_id.get(wallet_id)
+
+        if wallet is None:
+            raise WalletNotFoundError()
+
+        return wallet
+
+    def balance(self, wallet_id: UUID) -> Decimal:
+        return from_cents(self.get_wallet(wallet_id).balance)
+
+    # Operations. Each returns the transaction number (its row in the log).
+
+    def deposit(self, wallet_id: UUID, amount: Decimal, reference: str | None = None) -> int:
+        _check_amount(amount)
+
+        return self.post(TransactionType.DEPOSIT, [(wallet_id, amount)], reference)
+
+    def withdraw(
+        self,
+        user_id: UUID,
+        wallet_id: UUID,
+        amount: Decimal,
+        reference: str | None = None,
+    ) -> int:
+        _check_amount(amount)
+        self._check_owner(user_id, wallet_id)
+
+        return self.post(TransactionType.WITHDRAWAL, [(wallet_id, -amount)], reference)
+
+    def transfer(
+        self,
+        user_id: UUID,
+        source_wallet_id: UUID,
+        destination_wallet_id: UUID,
+        amount: Decimal,
+        reference: str | None = None,
+    ) -> int:
+        _check_amount(amount)
+
+        if source_wallet_id == destination_wallet_id:
+            raise InvalidTransferError()
+
+        self._check_owner(user_id, source_wallet_id)
+
+        return self.post(
+            TransactionType.TRANSFER,
+            [(source_wallet_id, -amount), (destination_wallet_id, amount)],
+            reference,
+        )
+
+    def post_journal(
+        self,
+        user_id: UUID,
+        legs: list[tuple[UUID, Decimal]],
+        reference: str | None = None,
+    ) -> int:
+        if len({wallet_id for wallet_id, _ in legs}) != len(legs):
+            raise InvalidJournalError("Each wallet can appear only once.")
+
+        for wallet_id, amount in legs:
+            if amount < 0:
+                self._check_owner(user_id, wallet_id)
+
+        return self.post(TransactionType.JOURNAL, legs, reference)
+
+    def reverse(self, transaction: int, reference: str | None = None) -> int:
+        legs = self._claim_reversal(transaction)
+
+        try:
+            return self.post(
+                TransactionType.REVERSAL,
+                [(self.wallets[index].id, -from_cents(cents)) for index, cents in legs],
+                reference,
+            )
+        except Exception:
+            # Taking back a credit that was already spent fails like a
+            # withdrawal; the original stays completed.
+            self.transaction_statuses[transaction] = _COMPLETED
+            raise
+
+    def post(
+        self,
+        transaction_type: TransactionType,
+        legs: list[tuple[UUID, Decimal]],
+        reference: str | None = None,
+    ) -> int:
+        return self.post_cents(
+            transaction_type,
+            [(self.get_wallet(wallet_id).index, to_cents(amount)) for wallet_id, amount in legs],
+            reference,
+        )
+
+    def post_cents(
+        self,
+        transaction_type: TransactionType,
+        legs: list[tuple[int, int]],
+        reference: str | None = None,
+    ) -> int:
+        # The one write path: legs of (wallet index, cents), applied all at
+        # once or not at all. Simulations and replays call it directly and
+        # skip the UUID lookups and Decimal conversions of the methods above.
+        if not legs:
+            raise InvalidJournalError("A transaction needs at least one leg.")
+
+        wallets = self.wallets
+        changes = [(wallets[index], cents) for index, cents in legs]
+
+        for _, cents in changes:
+            if cents == 0:
+                raise InvalidJournalError("Legs can't be zero.")
+
+        if transaction_type in _BALANCED_TYPES:
+            if sum(cents for _, cents in changes) != 0:
+                raise InvalidJournalError("Legs must net to zero.")
+
+            currency = changes[0][0].currency
+            for wallet, _ in changes:
+                if wallet.currency != currency:
+                    raise WalletCurrencyMismatchError(
+                        "Source and destination wallets must use the same currency."
+                    )
+
+        if reference is not None:
+            with self._log_lock:
+                if reference in self._references:
+                    raise DuplicateReferenceError(reference)
+                self._references[reference] = -1
+
+        if len(changes) == 1:
+            locked = [changes[0][0]]
+        else:
+            locked = sorted({wallet for wallet, _ in changes}, key=_wallet_index)
+
+        for wallet in locked:
+            wallet.lock.acquire()
+
+        try:
+            # Check every debit before touching anything. A replayed
+            # transaction can touch a wallet twice: then check its net change.
+            if len(locked) == len(changes):
+                debits = changes
+            else:
+                net = {}
+                for wallet, cents in changes:
+                    net[wallet] = net.get(wallet, 0) + cents
+                debits = net.items()
+
+            for wallet, cents in debits:
+                if cents < 0 and wallet.balance - wallet.held_balance < -cents:
+                    raise InsufficientBalanceError()
+
+            for wallet, cents in changes:
+                wallet.balance += cents
+                wallet.version += 1
+
+            with self._log_lock:
+                transaction = len(self.transaction_types)
+                self.transaction_types.append(_TYPE_CODES[transaction_type])
+                self.transaction_statuses.append(_COMPLETED)
+                self._transaction_entries.append(len(self.entry_amounts))
+                self._transaction_entry_counts.append(len(legs))
+
+                for index, cents in legs:
+                    self.entry_wallets.append(index)
+                    self.entry_amounts.append(cents)
+
+                if reference is not None:
+                    self._references[reference] = transaction
+
+        except Exception:
+            if reference is not None:
+                with self._log_lock:
+                    del self._references[reference]
+            raise
+
+        finally:
+            for wallet in locked:
+                wallet.lock.release()
+
+        return transaction
+
+    def _check_owner(self, user_id: UUID, wallet_id: UUID) -> None:
+        # Someone else's wallet looks the same as a missing one, as in the API
+        if self.get_wallet(wallet_id).user_id != user_id:
+            raise WalletNotFoundError()
+
+    def _claim_reversal(self, transaction: int) -> list[tuple[int, int]]:
+        with self._log_lock:
+            if not 0 <= transaction < len(self.transaction_types):
+                raise TransactionNotFoundError()
+
+            if (
+                self.transaction_statuses[transaction] != _COMPLETED
+                or self.transaction_types[transaction] == _TYPE_CODES[TransactionType.REVERSAL]
+            ):
+                raise TransactionNotReversibleError()
+
+            # Claimed like the conditional UPDATE does: only one caller wins
+            self.transaction_statuses[transaction] = _STATUS_CODES[TransactionStatus.REVERSED]
+
+            return list(self.entries(transaction))
+
+    # Reading the log
+
+    def entries(self, transaction: int):
+        first = self._transaction_entries[transaction]
+
+        for i in range(first, first + self._transaction_entry_counts[transaction]):
+            yield self.entry_wallets[i], self.entry_amounts[i]
+
+    def transaction_type(self, transaction: int) -> TransactionType:
+        return _TYPES[self.transaction_types[transaction]]
+
+    def transaction_status(self, transaction: int) -> TransactionStatus:
+        return _STATUSES[self.transaction_statuses[transaction]]
+
+    def ledger_balances(self) -> list[int]:
+        # Every wallet's balance rebuilt from its entries, in cents
+        balances = [0] * len(self.wallets)
+
+        for index, cents in zip(self.entry_wallets, self.entry_amounts):
+            balances[index] += cents
+
+        return balances
+
+    def check_integrity(self) -> list[str]:
+        # What the replay tool and reconciliation check against Postgres:
+        # balances agree with the ledger and nobody is overdrawn.
+        problems = []
+
+        for wallet, ledger_balance in zip(self.wallets, self.ledger_balances()):
+            if wallet.balance != ledger_balance:
+                problems.append(f"wallet {wallet.id}: balance {wallet.balance} != ledger {ledger_balance}")
+            if wallet.balance < 0:
+                problems.append(f"wallet {wallet.id}: negative balance {wallet.balance}")
+
+        return problems
@@ -0,0 +1,26 @@
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.outbox import OutboxEvent
+from app.schemas.outbox import OutboxEventType
+
+
+def create_outbox_event(
+    db: Session,
+    event_type: OutboxEventType,
+    aggregate_id: UUID,
+    payload: dict,
+) -> OutboxEvent:
+
+    event = OutboxEvent(
+        event_type=event_type.value,
+        aggregate_id=aggregate_id,
+        payload=payload,
+    )
+
+    # No flush here: the event is written by the caller's next flush/commit,
+    # so it lands in the same DB transaction as the money movement it describes.
+    db.add(event)
+
+    return event
@@ -0,0 +1,155 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from app.core.config import db_settings
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+}
+
+
+class RateLimitExceededError(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class RateLimitRule(NamedTuple):
+    capacity: int
+    refill_per_second: float
+
+
+def parse_rate_limit(value: str) -> RateLimitRule:
+    # "30/minute" -> bucket of 30 tokens refilled at 0.5 tokens/second
+    count, _, period = value.partition("/")
+    seconds = _PERIODS[period.strip().lower()]
+    capacity = int(count)
+
+    return RateLimitRule(capacity=capacity, refill_per_second=capacity / seconds)
+
+
+TakeTokens = Callable[[str, int, float, int, int], tuple[int, int]]
+
+
+def _take_from_redis(
+    key: str,
+    capacity: int,
+    refill_per_second: float,
+    requested: int,
+    returned: int,
+) -> tuple[int, int]:
+    # Imported lazily so the limiter can be built (and tested) without Redis.
+    from app.db.redis_db import take_rate_limit_tokens
+
+    return take_rate_limit_tokens(key, capacity, refill_per_second, requested, returned)
+
+
+class RateLimiter:
+    # The Redis bucket is the source of truth. To keep Redis off the hot path,
+    # each process reserves a small lease of tokens at once and spends it
+    # locally, so a client well under its limit costs one Redis call per lease
+    # rather than one per request. Near the limit the Lua script only grants
+    # what is left, so leases shrink to single tokens and stay exact.
+    # A lease starts at one token and doubles with what the previous one
+    # actually served, up to lease_fraction of the bucket. Tokens left in an
+    # expired lease go back to Redis with the next call, so a client under
+    # its limit never loses them.
+
+    def __init__(
+        self,
+        rules: dict[str, str],
+        take_tokens: TakeTokens = _take_from_redis,
+        lease_fraction: float = db_settings.RATE_LIMIT_LOCAL_LEASE_FRACTION,
+        lease_ttl: float = db_settings.RATE_LIMIT_LOCAL_LEASE_TTL_SECONDS,
+        enabled: bool = db_settings.RATE_LIMIT_ENABLED,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rules = {name: parse_rate_limit(value) for name, value in rules.items()}
+        self.take_tokens = take_tokens
+        self.lease_fraction = lease_fraction
+        self.lease_ttl = lease_ttl
+        self.enabled = enabled
+        self.clock = clock
+
+        # key -> [tokens left, monotonic expiry, lease size]
+        self._leases: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, route: str, principal: str, identity: str) -> None:
+        if not self.enabled:
+            return
+
+        name = f"{route}:{principal}"
+        rule = self.rules.get(name)
+
+        if rule is None:
+            return
+
+        key = f"rate:{name}:{identity}"
+        now = self.clock()
+        max_lease = max(1, int(rule.capacity * self.lease_fraction))
+
+        with self._lock:
+            lease = self._leases.get(key)
+
+            if lease is not None and lease[0] > 0 and lease[1] > now:
+                lease[0] -= 1
+                return
+
+            # Taken out under the lock so only one thread hands its tokens back
+            lease = self._leases.pop(key, None)
+
+        if lease is None:
+            returned, lease_size = 0, 1
+        else:
+            returned = lease[0]
+            lease_size = min(max_lease, max(1, 2 * (lease[2] - returned)))
+
+        try:
+            granted, retry_after_ms = self.take_tokens(
+                key,
+                rule.capacity,
+                rule.refill_per_second,
+                lease_size,
+                returned,
+            )
+        except Exception:
+            # Fail open: a Redis outage should not take the API down with it.
+            logger.warning("Rate limit check failed for %s", key, exc_info=True)
+            return
+
+        if granted == 0:
+            raise RateLimitExceededError(
+                retry_after=max(1, math.ceil(retry_after_ms / 1000))
+            )
+
+        with self._lock:
+            self._leases[key] = [granted - 1, now + self.lease_ttl, granted]
+
+            if len(self._leases) > 100_000:
+                self._evict_expired(now)
+
+    def _reset_after_fork(self) -> None:
+        # Leases are per process; a forked worker reusing the parent's would
+        # spend tokens the parent (or a sibling) spends as well.
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float) -> None:
+        self._leases = {
+            key: lease
+            for key, lease in self._leases.items()
+            if lease[1] > now
+        }
+
+
+rate_limiter = RateLimiter(rules=db_settings.RATE_LIMITS)
+os.register_at_fork(after_in_child=rate_limiter._reset_after_fork)
@@ -0,0 +1,188 @@
+import csv
+import uuid
+from typing import NamedTuple
+
+from sqlalchemy import BigInteger, Integer, and_, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.config import db_settings
+from app.db.session import SessionLocal, engine
+from app.db.types import from_minor_units, minor_units
+from app.models.archive import WalletArchiveBalance
+from app.models.ledger import LedgerEntry
+from app.models.wallet import Wallet
+from app.schemas.transaction import format_minor_units
+
+REPORT_COLUMNS = ["wallet_id", "balance", "ledger_balance", "difference", "status"]
+
+
+class ReplayResult(NamedTuple):
+    partition: int
+    wallets: int
+    entries: int
+    mismatched: int
+    fixed: int
+    # Changed by a live write after the replay's snapshot, so left alone
+    skipped: int
+
+
+def partition_bounds(
+    partition: int,
+    partitions: int,
+) -> tuple[uuid.UUID, uuid.UUID | None]:
+    # Wallet ids are random (uuid4), so equal slices of the id space are
+    # hash partitions of the wallets, and each one is still a single range
+    # scan over the (wallet_id, created_at) index.
+    space = 1 << 128
+    lower = uuid.UUID(int=partition * space // partitions)
+    upper = None if partition == partitions - 1 else uuid.UUID(int=(partition + 1) * space // partitions)
+
+    return lower, upper
+
+
+def partition_stream(lower: uuid.UUID, upper: uuid.UUID | None):
+    # Every wallet in the range with its ledger entries in (wallet_id,
+    # created_at) order; wallets without entries come through once with a
+    # NULL amount. The starting point is the archived carry-forward. The
+    # range goes on both sides of the join, so the ledger side is a bounded
+    # scan of the (wallet_id, created_at) index as well.
+    wallet_range = [Wallet.id >= lower]
+    entry_range = [LedgerEntry.wallet_id >= lower]
+
+    if upper is not None:
+        wallet_range.append(Wallet.id < upper)
+        entry_range.append(LedgerEntry.wallet_id < upper)
+
+    # Amounts come back as integer minor units, so the replay adds up ints
+    # rather than Decimals.
+    return (
+        select(
+            Wallet.id,
+            minor_units(Wallet.balance),
+            Wallet.version,
+            func.coalesce(minor_units(WalletArchiveBalance.carried_balance), 0),
+            minor_units(LedgerEntry.amount),
+        )
+        .select_from(Wallet)
+        .outerjoin(WalletArchiveBalance, WalletArchiveBalance.wallet_id == Wallet.id)
+        .outerjoin(LedgerEntry, and_(LedgerEntry.wallet_id == Wallet.id, *entry_range))
+        .where(*wallet_range)
+        .order_by(Wallet.id, LedgerEntry.created_at)
+    )
+
+
+def apply_corrections(db, mismatches: list[tuple]) -> set[uuid.UUID]:
+    # One UPDATE ... FROM (VALUES ...) per batch. Compare-and-swap on the
+    # version seen in the snapshot: a wallet a live transaction has touched
+    # since then is skipped rather than overwritten with a stale total.
+    corrections = values(
+        column("id", UUID(as_uuid=True)),
+        column("ledger_balance", BigInteger),
+        column("seen_version", Integer),
+        name="corrections",
+    ).data([
+        (wallet_id, ledger_balance, version)
+        for wallet_id, _, ledger_balance, version in mismatches
+    ])
+
+    fixed = db.execute(
+        update(Wallet)
+        .where(
+            Wallet.id == corrections.c.id,
+            Wallet.version == corrections.c.seen_version,
+        )
+        .values(
+            balance=from_minor_units(corrections.c.ledger_balance),
+            version=Wallet.version + 1,
+        )
+        .returning(Wallet.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+
+    return set(fixed)
+
+
+def replay_partition(
+    partition: int,
+    partitions: int,
+    fix: bool = False,
+    report_path: str | None = None,
+    batch_size: int = db_settings.REPLAY_BATCH_SIZE,
+    fetch_size: int = db_settings.REPLAY_FETCH_SIZE,
+) -> ReplayResult:
+
+    lower, upper = partition_bounds(partition, partitions)
+    wallets = entries = mismatched = fixed = skipped = 0
+    mismatches: list[tuple] = []
+
+    report_file = open(report_path, "w", newline="") if report_path else None
+    report = csv.writer(report_file) if report_file else None
+
+    def flush() -> None:
+        nonlocal fixed, skipped
+
+        corrected = apply_corrections(db, mismatches) if fix else set()
+        fixed += len(corrected)
+        skipped += len(mismatches) - len(corrected) if fix else 0
+
+        if report is not None:
+            for wallet_id, balance, ledger_balance, _ in mismatches:
+                status = "mismatch"
+                if fix:
+                    status = "fixed" if wallet_id in corrected else "changed"
+
+                report.writerow([
+                    wallet_id,
+                    format_minor_units(balance),
+                    format_minor_units(ledger_balance),
+                    format_minor_units(ledger_balance - balance),
+                    status,
+                ])
+
+        mismatches.clear()
+
+    try:
+        with (
+            # Read side: one snapshot, streamed through a server-side cursor,
+            # so memory stays at fetch_size rows whatever the ledger size.
+            engine.connect().execution_options(
+                isolation_level="REPEATABLE READ",
+                stream_results=True,
+                yield_per=fetch_size,
+            ) as conn,
+            SessionLocal() as db,
+        ):
+            current = None
+
+            for wallet_id, balance, version, carried, amount in conn.execute(
+                partition_stream(lower, upper)
+            ):
+                if wallet_id != current:
+                    if current is not None and ledger_balance != current_balance:
+                        mismatches.append((current, current_balance, ledger_balance, current_version))
+                        mismatched += 1
+
+                        if len(mismatches) >= batch_size:
+                            flush()
+
+                    current, current_balance, current_version = wallet_id, balance, version
+                    ledger_balance = carried
+                    wallets += 1
+
+                if amount is not None:
+                    ledger_balance += amount
+                    entries += 1
+
+            if current is not None and ledger_balance != current_balance:
+                mismatches.append((current, current_balance, ledger_balance, current_version))
+                mismatched += 1
+
+            if mismatches:
+                flush()
+
+    finally:
+        if report_file is not None:
+            report_file.close()
+
+    return ReplayResult(partition, wallets, entries, mismatched, fixed, skipped)
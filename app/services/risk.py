@@ -0,0 +1,252 @@
+import os
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from typing import Callable, NamedTuple, Protocol
+from uuid import UUID
+
+from app.core.config import db_settings
+
+_WINDOWS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+_PARTIES = ("sender", "receiver", "pair")
+_ZERO = Decimal("0")
+
+
+class TransferRisk(NamedTuple):
+    sender_id: UUID
+    receiver_id: UUID
+    currency: str
+    amount: Decimal
+
+
+class VelocityLimit(NamedTuple):
+    count: int | None
+    amount: Decimal | None
+
+
+def parse_velocity_limits(
+    limits: dict[str, dict[str, Decimal]],
+) -> dict[tuple[str, str], VelocityLimit]:
+    # {"sender:minute": {"count": 10, "amount": "5000"}} -> {("sender", "minute"): ...}
+    parsed = {}
+
+    for name, value in limits.items():
+        party, _, window = name.partition(":")
+
+        if party not in _PARTIES or window not in _WINDOWS:
+            raise ValueError(f"Unknown velocity limit: {name}")
+
+        count = value.get("count")
+        parsed[(party, window)] = VelocityLimit(
+            count=int(count) if count is not None else None,
+            amount=value.get("amount"),
+        )
+
+    return parsed
+
+
+class SlidingWindow:
+    # The window is split into slots; only slots that saw a transfer are kept
+    # (oldest first), with running totals. Expired slots drop off the front
+    # as time moves on, so adding and reading are O(1) amortised and an idle
+    # key costs next to nothing. The window moves one slot at a time, so it
+    # can reach up to one slot (1/slots of the window) further back than exact.
+    __slots__ = ("slot_seconds", "size", "slots", "count", "amount")
+
+    def __init__(self, seconds: float, slots: int):
+        self.slot_seconds = seconds / slots
+        self.size = slots
+        # [slot number, count, amount], oldest first
+        self.slots: deque[list] = deque()
+        self.count = 0
+        self.amount = _ZERO
+
+    def _advance(self, now: float) -> int:
+        slot = int(now // self.slot_seconds)
+        oldest = slot - self.size
+
+        while self.slots and self.slots[0][0] <= oldest:
+            _, count, amount = self.slots.popleft()
+            self.count -= count
+            self.amount -= amount
+
+        return slot
+
+    def totals(self, now: float) -> tuple[int, Decimal]:
+        self._advance(now)
+
+        return self.count, self.amount
+
+    def add(self, now: float, amount: Decimal) -> None:
+        slot = self._advance(now)
+
+        if self.slots and self.slots[-1][0] == slot:
+            self.slots[-1][1] += 1
+            self.slots[-1][2] += amount
+        else:
+            self.slots.append([slot, 1, amount])
+
+        self.count += 1
+        self.amount += amount
+
+
+class RiskCheck(Protocol):
+    # assess runs before the transfer is written and returns the reasons to
+    # send it to review (empty if none); record runs once it is committed.
+    def assess(self, transfer: TransferRisk) -> list[str]: ...
+
+    # Several transfers written together (a journal's legs): each is
+    # assessed as if the ones before it had been recorded.
+    def assess_many(self, transfers: list[TransferRisk]) -> list[str]: ...
+
+    def record(self, transfer: TransferRisk) -> None: ...
+
+
+class VelocityCheck:
+    # Counts and amounts per sender, receiver and sender/receiver pair over
+    # the last minute, hour and day, kept in process memory (each API worker
+    # has its own counters). Amounts are per currency, so the counters are too.
+
+    def __init__(
+        self,
+        limits: dict[str, dict[str, Decimal]],
+        slots: int = db_settings.RISK_VELOCITY_SLOTS,
+        idle_seconds: float = _WINDOWS["day"],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = parse_velocity_limits(limits)
+        # party -> the windows it has limits on
+        self.windows: dict[str, list[str]] = {}
+        for party, window in self.limits:
+            self.windows.setdefault(party, []).append(window)
+        self.slots = slots
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+
+        # (party, id, currency) -> ({window: SlidingWindow}, last used)
+        self._counters: dict[tuple, tuple[dict[str, SlidingWindow], list[float]]] = {}
+        self._lock = threading.Lock()
+        self._evicted_at = clock()
+
+    def _keys(self, transfer: TransferRisk) -> dict[str, tuple]:
+        ids = {
+            "sender": transfer.sender_id,
+            "receiver": transfer.receiver_id,
+            "pair": (transfer.sender_id, transfer.receiver_id),
+        }
+
+        return {party: (party, ids[party], transfer.currency) for party in self.windows}
+
+    def assess(self, transfer: TransferRisk) -> list[str]:
+        return self.assess_many([transfer])
+
+    def assess_many(self, transfers: list[TransferRisk]) -> list[str]:
+        now = self.clock()
+        reasons = []
+        # key -> [count, amount] of the earlier transfers in this batch
+        pending: dict[tuple, list] = {}
+
+        with self._lock:
+            for transfer in transfers:
+                keys = self._keys(transfer)
+
+                for (party, window), limit in self.limits.items():
+                    counter = self._counters.get(keys[party])
+
+                    if counter is None:
+                        count, amount = 0, _ZERO
+                    else:
+                        count, amount = counter[0][window].totals(now)
+
+                    batch_count, batch_amount = pending.get(keys[party], (0, _ZERO))
+                    count += batch_count
+                    amount += batch_amount
+
+                    # Would this transfer take the party over the limit?
+                    if limit.count is not None and count + 1 > limit.count:
+                        reasons.append(f"{party} transfer count over {limit.count} per {window}")
+                    if limit.amount is not None and amount + transfer.amount > limit.amount:
+                        reasons.append(f"{party} amount over {limit.amount} per {window}")
+
+                for key in keys.values():
+                    totals = pending.setdefault(key, [0, _ZERO])
+                    totals[0] += 1
+                    totals[1] += transfer.amount
+
+        # Several transfers can trip the same limit; report it once
+        return list(dict.fromkeys(reasons))
+
+    def record(self, transfer: TransferRisk) -> None:
+        now = self.clock()
+
+        with self._lock:
+            for party, key in self._keys(transfer).items():
+                counter = self._counters.get(key)
+
+                if counter is None:
+                    counter = self._counters[key] = (
+                        {
+                            window: SlidingWindow(_WINDOWS[window], self.slots)
+                            for window in self.windows[party]
+                        },
+                        [now],
+                    )
+
+                for window in counter[0].values():
+                    window.add(now, transfer.amount)
+                counter[1][0] = now
+
+            if now - self._evicted_at > 60:
+                self._evict_idle(now)
+
+    def _evict_idle(self, now: float) -> None:
+        # Nothing left in any window once a key has been idle for a day
+        self._counters = {
+            key: counter
+            for key, counter in self._counters.items()
+            if now - counter[1][0] < self.idle_seconds
+        }
+        self._evicted_at = now
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+
+class RiskPipeline:
+    def __init__(
+        self,
+        checks: list[RiskCheck],
+        enabled: bool = db_settings.RISK_CHECKS_ENABLED,
+    ):
+        self.checks = checks
+        self.enabled = enabled
+
+    def assess(self, transfer: TransferRisk) -> list[str]:
+        if not self.enabled:
+            return []
+
+        return [reason for check in self.checks for reason in check.assess(transfer)]
+
+    def assess_many(self, transfers: list[TransferRisk]) -> list[str]:
+        if not self.enabled or not transfers:
+            return []
+
+        return [reason for check in self.checks for reason in check.assess_many(transfers)]
+
+    def record(self, transfer: TransferRisk) -> None:
+        if not self.enabled:
+            return
+
+        for check in self.checks:
+            check.record(transfer)
+
+
+velocity_check = VelocityCheck(limits=db_settings.RISK_VELOCITY_LIMITS)
+os.register_at_fork(after_in_child=velocity_check._reset_after_fork)
+
+risk_pipeline = RiskPipeline(checks=[velocity_check])
@@ -0,0 +1,341 @@
+import calendar
+import logging
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import db_settings
+from app.models.scheduled_transfer import ScheduledTransfer
+from app.schemas.scheduled_transfer import (
+    CreateScheduledTransfer,
+    ScheduledTransferStatus,
+    TransferFrequency,
+)
+from app.services.transaction import (
+    InvalidTransferError,
+    TransactionService,
+    WalletCurrencyMismatchError,
+)
+from app.services.wallet import (
+    InsufficientBalanceError,
+    SpendingLimitExceededError,
+    WalletNotFoundError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledTransferNotFoundError(Exception):
+    pass
+
+
+class ScheduledTransferNotActiveError(Exception):
+    pass
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    # Clamp to the last day of shorter months (31st -> 30th/28th)
+    day = min(value.day, calendar.monthrange(year, month)[1])
+
+    return value.replace(year=year, month=month, day=day)
+
+
+def occurrence_at(
+    anchor_at: datetime,
+    frequency: TransferFrequency,
+    index: int,
+) -> datetime:
+
+    if frequency == TransferFrequency.DAILY:
+        return anchor_at + timedelta(days=index)
+    if frequency == TransferFrequency.WEEKLY:
+        return anchor_at + timedelta(weeks=index)
+    if frequency == TransferFrequency.MONTHLY:
+        return add_months(anchor_at, index)
+
+    return anchor_at
+
+
+def spread_offset(schedule_id: UUID) -> timedelta:
+    if db_settings.SCHEDULER_SPREAD_SECONDS <= 0:
+        return timedelta(0)
+
+    return timedelta(seconds=schedule_id.int % db_settings.SCHEDULER_SPREAD_SECONDS)
+
+
+def next_occurrence(
+    schedule_id: UUID,
+    anchor_at: datetime,
+    frequency: TransferFrequency,
+    after: int,
+    now: datetime,
+) -> tuple[int, datetime]:
+
+    # Occurrences missed while the schedule was paused or the workers were
+    # down are skipped rather than paid out all at once.
+    index = after + 1
+    run_at = occurrence_at(anchor_at, frequency, index) + spread_offset(schedule_id)
+
+    while run_at <= now:
+        index += 1
+        run_at = occurrence_at(anchor_at, frequency, index) + spread_offset(schedule_id)
+
+    return index, run_at
+
+
+def scheduled_reference(schedule_id: UUID, occurrence: int) -> str:
+    # Unique per occurrence. If a worker dies after the transfer committed but
+    # before the schedule advanced, the retry hits the unique reference
+    # constraint instead of paying twice.
+    return f"scheduled:{schedule_id}:{occurrence}"
+
+
+class ScheduledTransferService:
+    def __init__(
+        self,
+        db: Session,
+        transaction_service: TransactionService,
+    ):
+        self.db = db
+        self.transaction_service = transaction_service
+        self.wallet_service = transaction_service.wallet_service
+
+    def create(
+        self,
+        user_id: UUID,
+        data: CreateScheduledTransfer,
+    ) -> ScheduledTransfer:
+
+        if data.source_wallet_id == data.destination_wallet_id:
+            raise InvalidTransferError(
+                "Source and destination wallets must be different."
+            )
+
+        try:
+            source_wallet = self.wallet_service.get_wallet_by_user_id(
+                user_id=user_id,
+                wallet_id=data.source_wallet_id,
+            )
+            destination_wallet = self.wallet_service.get_wallet_by_id(
+                wallet_id=data.destination_wallet_id,
+            )
+
+            if source_wallet.currency != destination_wallet.currency:
+                raise WalletCurrencyMismatchError(
+                    "Source and destination wallets must use "
+                    "the same currency."
+                )
+
+            schedule = ScheduledTransfer(
+                user_id=user_id,
+                source_wallet_id=data.source_wallet_id,
+                destination_wallet_id=data.destination_wallet_id,
+                amount=data.amount,
+                frequency=data.frequency,
+                status=ScheduledTransferStatus.ACTIVE,
+                anchor_at=data.start_at,
+                next_run_at=data.start_at,
+            )
+
+            self.db.add(schedule)
+            self.db.flush()
+
+            schedule.next_run_at = data.start_at + spread_offset(schedule.id)
+
+            self.db.commit()
+            self.db.refresh(schedule)
+
+            return schedule
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def list_for_user(self, user_id: UUID) -> list[ScheduledTransfer]:
+        return self.db.execute(
+            select(ScheduledTransfer)
+            .where(ScheduledTransfer.user_id == user_id)
+            .order_by(ScheduledTransfer.created_at.desc())
+        ).scalars().all()
+
+    def cancel(
+        self,
+        user_id: UUID,
+        schedule_id: UUID,
+    ) -> ScheduledTransfer:
+
+        schedule = self.db.execute(
+            update(ScheduledTransfer)
+            .where(
+                ScheduledTransfer.id == schedule_id,
+                ScheduledTransfer.user_id == user_id,
+                ScheduledTransfer.status == ScheduledTransferStatus.ACTIVE,
+            )
+            .values(status=ScheduledTransferStatus.CANCELLED)
+            .returning(ScheduledTransfer)
+        ).scalar_one_or_none()
+
+        if schedule is None:
+            exists = self.db.execute(
+                select(ScheduledTransfer.id).where(
+                    ScheduledTransfer.id == schedule_id,
+                    ScheduledTransfer.user_id == user_id,
+                )
+            ).first()
+            self.db.rollback()
+
+            # Completed, failed and cancelled schedules stay as they are
+            if exists is not None:
+                raise ScheduledTransferNotActiveError()
+
+            raise ScheduledTransferNotFoundError()
+
+        self.db.commit()
+        self.db.refresh(schedule)
+
+        return schedule
+
+    def claim_due(
+        self,
+        batch_size: int = db_settings.SCHEDULER_BATCH_SIZE,
+        lease_seconds: int = db_settings.SCHEDULER_LEASE_SECONDS,
+    ) -> list:
+
+        # Served by the partial index on active schedules' next_run_at.
+        # SKIP LOCKED lets any number of workers pull disjoint batches.
+        due = (
+            select(ScheduledTransfer.id)
+            .where(
+                ScheduledTransfer.status == ScheduledTransferStatus.ACTIVE,
+                ScheduledTransfer.next_run_at <= func.now(),
+            )
+            .order_by(ScheduledTransfer.next_run_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+
+        # Pushing next_run_at forward by the lease "claims" the batch, so the
+        # row locks can be released straight away instead of being held while
+        # the transfers run. A crashed worker's jobs reappear after the lease.
+        jobs = self.db.execute(
+            update(ScheduledTransfer)
+            .where(ScheduledTransfer.id.in_(due))
+            .values(next_run_at=func.now() + timedelta(seconds=lease_seconds))
+            .returning(
+                ScheduledTransfer.id,
+                ScheduledTransfer.user_id,
+                ScheduledTransfer.source_wallet_id,
+                ScheduledTransfer.destination_wallet_id,
+                ScheduledTransfer.amount,
+                ScheduledTransfer.frequency,
+                ScheduledTransfer.anchor_at,
+                ScheduledTransfer.occurrence,
+                ScheduledTransfer.run_count,
+                ScheduledTransfer.next_run_at,
+            )
+        ).all()
+
+        self.db.commit()
+
+        return jobs
+
+    def run_due(
+        self,
+        batch_size: int = db_settings.SCHEDULER_BATCH_SIZE,
+    ) -> int:
+
+        jobs = self.claim_due(batch_size=batch_size)
+        updates = []
+
+        for job in jobs:
+            status = ScheduledTransferStatus.ACTIVE
+            error = None
+
+            try:
+                self.transaction_service.transfer(
+                    user_id=job.user_id,
+                    source_wallet_id=job.source_wallet_id,
+                    destination_wallet_id=job.destination_wallet_id,
+                    amount=job.amount,
+                    reference=scheduled_reference(job.id, job.occurrence),
+                )
+            except IntegrityError:
+                # This occurrence already went through on an earlier attempt
+                pass
+            except InsufficientBalanceError:
+                # Skip this occurrence but keep the standing order
+                error = "Insufficient wallet balance."
+            except SpendingLimitExceededError as e:
+                error = str(e)
+            except (WalletNotFoundError, WalletCurrencyMismatchError) as e:
+                status = ScheduledTransferStatus.FAILED
+                error = type(e).__name__
+            except Exception as e:
+                # Anything else (a dropped connection, a deadlock) may be
+                # transient: keep the occurrence and let it run again when the
+                # lease runs out. The reference makes the retry safe.
+                logger.exception("Scheduled transfer %s failed", job.id)
+                updates.append({
+                    "job_id": job.id,
+                    "occurrence": job.occurrence,
+                    "run_count": job.run_count,
+                    "status": status,
+                    "last_error": type(e).__name__,
+                    "last_run_at": datetime.now(timezone.utc),
+                    "next_run_at": job.next_run_at,
+                })
+                continue
+
+            frequency = TransferFrequency(job.frequency)
+            now = datetime.now(timezone.utc)
+
+            if frequency == TransferFrequency.ONCE:
+                # A one-off only has this occurrence: if it was skipped, the
+                # schedule failed rather than completed.
+                if error is not None:
+                    status = ScheduledTransferStatus.FAILED
+                elif status == ScheduledTransferStatus.ACTIVE:
+                    status = ScheduledTransferStatus.COMPLETED
+
+                occurrence, next_run_at = job.occurrence + 1, now
+            else:
+                occurrence, next_run_at = next_occurrence(
+                    job.id,
+                    job.anchor_at,
+                    frequency,
+                    after=job.occurrence,
+                    now=now,
+                )
+
+            updates.append({
+                "job_id": job.id,
+                "occurrence": occurrence,
+                "run_count": job.run_count + 1,
+                "status": status,
+                "last_error": error,
+                "last_run_at": now,
+                "next_run_at": next_run_at,
+            })
+
+        if updates:
+            # One executemany for the whole batch instead of a commit per job.
+            # Only still-active schedules take the outcome, so one cancelled
+            # while its batch was running stays cancelled.
+            self.db.execute(
+                update(ScheduledTransfer.__table__)
+                .where(
+                    ScheduledTransfer.id == bindparam("job_id"),
+                    ScheduledTransfer.status == ScheduledTransferStatus.ACTIVE,
+                ),
+                updates,
+            )
+            self.db.commit()
+
+        return len(jobs)
@@ -0,0 +1,451 @@
+from datetime import timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import db_settings
+from app.db.sharding import MAIN_SHARD, ShardMap, shard_map
+from app.models.transaction import Transaction
+from app.models.transfer_saga import TransferSaga
+from app.models.user import User
+from app.models.wallet import Wallet
+from app.models.wallet_shard import WalletShard
+from app.schemas.transaction import SagaStatus, TransactionStatus, TransactionType
+from app.schemas.wallet import Currency
+from app.services.fx import FxQuote
+from app.services.risk import RiskPipeline, TransferRisk, risk_pipeline
+from app.services.transaction import (
+    TransactionService,
+    WalletCurrencyMismatchError,
+    create_ledger_entry,
+    create_transaction,
+    record_status_change,
+)
+from app.services.wallet import WalletNotFoundError, WalletService
+
+
+class TransferReviewRequiredError(Exception):
+    def __init__(self, reasons: list[str]):
+        self.reasons = reasons
+        super().__init__("Transfer needs review: " + "; ".join(reasons))
+
+
+class CrossShardFxTransferError(Exception):
+    pass
+
+
+def _copy_user_to_shard(shard_db: Session, user: User) -> None:
+    copy = (
+        insert(User)
+        .values(
+            id=user.id,
+            email=user.email,
+            # Only there for the foreign key; logins use the catalog
+            hashed_password="!",
+            shard=user.shard,
+        )
+        # The same user again (a retried signup) is fine, nothing else is
+        .on_conflict_do_nothing(index_elements=["id"])
+    )
+
+    try:
+        shard_db.execute(copy)
+    except IntegrityError:
+        # The email is taken on the shard by another id: the copy left by an
+        # earlier signup whose catalog commit failed after the shard's. The
+        # catalog just accepted this email, so that user doesn't exist, and
+        # its wallets never made it into the directory (nothing can have
+        # reached them). Remove both and copy again.
+        shard_db.rollback()
+        orphans = select(User.id).where(User.email == user.email, User.id != user.id)
+        shard_db.execute(delete(Wallet).where(Wallet.user_id.in_(orphans)))
+        shard_db.execute(delete(User).where(User.id.in_(orphans)))
+        shard_db.execute(copy)
+
+
+def create_shard_wallets(
+    db: Session,
+    user: User,
+    currencies: list[Currency] | None = None,
+    shard_map: ShardMap = shard_map,
+) -> list[UUID]:
+
+    # db is the catalog session the user was just added in. The wallets go
+    # to the user's home shard with a copy of the user row for their foreign
+    # key, and the catalog records where they went. The shard commits first:
+    # if the catalog then fails, the wallets are left unreachable, not lost.
+    with shard_map.session(user.shard) as shard_db:
+        _copy_user_to_shard(shard_db, user)
+        wallet_ids = [
+            wallet.id
+            for wallet in WalletService(shard_db).create_wallets(str(user.id), currencies=currencies)
+        ]
+        shard_db.commit()
+
+    db.add_all(
+        WalletShard(wallet_id=wallet_id, user_id=user.id, shard=user.shard)
+        for wallet_id in wallet_ids
+    )
+
+    return wallet_ids
+
+
+def create_fx_house_wallets(
+    db: Session,
+    house_user_id: UUID,
+    currencies: list[Currency] | None = None,
+    shard_map: ShardMap = shard_map,
+) -> dict[str, list[UUID]]:
+
+    # FX transfers run on the caller's home shard, so every shard needs its
+    # own house wallets. db is the catalog session (and shard main); the
+    # house user is copied to the other shards like a signup would, and only
+    # the currencies a shard is missing are created. Safe to run again after
+    # adding a shard or a currency.
+    house_user = db.get(User, house_user_id)
+
+    if house_user is None:
+        raise ValueError(f"FX house user {house_user_id} does not exist")
+
+    currencies = currencies or list(Currency)
+    created = {}
+
+    for shard in shard_map.names:
+        shard_db = db if shard == MAIN_SHARD else shard_map.session(shard)
+
+        try:
+            if shard != MAIN_SHARD:
+                _copy_user_to_shard(shard_db, house_user)
+
+            existing = set(shard_db.execute(
+                select(Wallet.currency).where(Wallet.user_id == house_user.id)
+            ).scalars())
+            missing = [currency for currency in currencies if currency.value not in existing]
+            wallet_ids = [
+                wallet.id
+                for wallet in WalletService(shard_db).create_wallets(str(house_user.id), currencies=missing)
+            ] if missing else []
+
+            if shard != MAIN_SHARD:
+                shard_db.commit()
+                db.add_all(
+                    WalletShard(wallet_id=wallet_id, user_id=house_user.id, shard=shard)
+                    for wallet_id in wallet_ids
+                )
+        finally:
+            if shard_db is not db:
+                shard_db.close()
+
+        created[shard] = wallet_ids
+
+    return created
+
+
+class ShardedTransferService:
+    # Transfers from the caller's wallets, which all live on their home
+    # shard. A destination on the same shard is a plain local transfer (one
+    # DB transaction); one on another shard goes through a transfer saga.
+
+    def __init__(
+        self,
+        catalog_db: Session,
+        transaction_service: TransactionService,
+        home_shard: str,
+        shard_map: ShardMap = shard_map,
+        risk_pipeline: RiskPipeline = risk_pipeline,
+    ):
+        self.catalog_db = catalog_db
+        self.transaction_service = transaction_service
+        self.home_shard = home_shard
+        self.shard_map = shard_map
+        self.risk_pipeline = risk_pipeline
+
+    def transfer(
+        self,
+        user_id: UUID,
+        source_wallet_id: UUID,
+        destination_wallet_id: UUID,
+        amount: Decimal,
+        reference: str | None = None,
+    ):
+        destination_shard = self.shard_map.shard_for_wallet(self.catalog_db, destination_wallet_id)
+
+        if destination_shard == self.home_shard:
+            return self.transaction_service.transfer(
+                user_id=user_id,
+                source_wallet_id=source_wallet_id,
+                destination_wallet_id=destination_wallet_id,
+                amount=amount,
+                reference=reference,
+            )
+
+        return self._cross_shard_transfer(
+            user_id=user_id,
+            source_wallet_id=source_wallet_id,
+            destination_wallet_id=destination_wallet_id,
+            destination_shard=destination_shard,
+            amount=amount,
+            reference=reference,
+        )
+
+    def fx_transfer(
+        self,
+        user_id: UUID,
+        source_wallet_id: UUID,
+        destination_wallet_id: UUID,
+        quote: FxQuote,
+        reference: str | None = None,
+    ):
+        # The four FX legs move through the house wallets of the caller's
+        # shard in one local transaction. There is no FX saga, so the
+        # destination has to live on that shard too.
+        destination_shard = self.shard_map.shard_for_wallet(self.catalog_db, destination_wallet_id)
+
+        if destination_shard != self.home_shard:
+            raise CrossShardFxTransferError()
+
+        return self.transaction_service.fx_transfer(
+            user_id=user_id,
+            source_wallet_id=source_wallet_id,
+            destination_wallet_id=destination_wallet_id,
+            quote=quote,
+            reference=reference,
+        )
+
+    def _cross_shard_transfer(
+        self,
+        user_id: UUID,
+        source_wallet_id: UUID,
+        destination_wallet_id: UUID,
+        destination_shard: str,
+        amount: Decimal,
+        reference: str | None,
+    ):
+
+        if amount <= 0:
+            raise ValueError("Amount must be greater than zero.")
+
+        db = self.transaction_service.db
+        wallet_service = self.transaction_service.wallet_service
+
+        try:
+            source_wallet = wallet_service.get_wallet_by_user_id(
+                user_id=user_id,
+                wallet_id=source_wallet_id,
+            )
+
+            with self.shard_map.session(destination_shard) as destination_db:
+                destination_wallet = WalletService(destination_db).get_wallet_by_id(
+                    wallet_id=destination_wallet_id,
+                )
+
+            if source_wallet.currency != destination_wallet.currency:
+                raise WalletCurrencyMismatchError(
+                    "Source and destination wallets must use "
+                    "the same currency."
+                )
+
+            # A saga can't be parked for review like a local transfer (the
+            # approval would have to span shards), so a flagged one is refused.
+            risk = TransferRisk(
+                sender_id=source_wallet.user_id,
+                receiver_id=destination_wallet.user_id,
+                currency=source_wallet.currency,
+                amount=amount,
+            )
+            reasons = self.risk_pipeline.assess(risk)
+
+            if reasons:
+                raise TransferReviewRequiredError(reasons)
+
+            # 1. Debit on the home shard, with the saga record, in one local
+            # transaction. The transfer stays pending until the credit lands.
+            transaction = create_transaction(
+                db,
+                transaction_type=TransactionType.TRANSFER,
+                reference=reference,
+                status=TransactionStatus.PENDING,
+            )
+            source_wallet = wallet_service.decrease_balance(
+                wallet_id=source_wallet.id,
+                amount=amount,
+            )
+            wallet_service.consume_spending_limits(source_wallet, amount)
+            create_ledger_entry(
+                db,
+                wallet_id=source_wallet.id,
+                transaction_id=transaction.id,
+                amount=-amount,
+            )
+            db.add(
+                TransferSaga(
+                    transaction_id=transaction.id,
+                    source_wallet_id=source_wallet.id,
+                    destination_wallet_id=destination_wallet.id,
+                    destination_shard=destination_shard,
+                    amount=amount,
+                )
+            )
+
+            db.commit()
+            self.risk_pipeline.record(risk)
+
+        except Exception:
+            db.rollback()
+            raise
+
+        # 2. and 3. The money has left the source wallet; from here the saga
+        # only moves forward. If the destination shard can't be reached now,
+        # the transfer is returned pending and the saga worker finishes it.
+        advance_saga(db, transaction.id, shard_map=self.shard_map)
+
+        db.refresh(transaction)
+        db.refresh(source_wallet)
+
+        return (
+            transaction,
+            source_wallet,
+            destination_wallet,
+        )
+
+
+def _apply_credit(saga: TransferSaga, shard_map: ShardMap) -> None:
+    # Step 2, on the destination shard. The credit's transaction reuses the
+    # saga's transaction id, so running it twice (a retry after a lost
+    # commit acknowledgement) hits the primary key and counts as done.
+    with shard_map.session(saga.destination_shard) as db:
+        try:
+            create_transaction(
+                db,
+                transaction_type=TransactionType.TRANSFER,
+                transaction_id=saga.transaction_id,
+            )
+        except IntegrityError:
+            db.rollback()
+            return
+
+        WalletService(db).increase_balance(
+            wallet_id=saga.destination_wallet_id,
+            amount=saga.amount,
+        )
+        create_ledger_entry(
+            db,
+            wallet_id=saga.destination_wallet_id,
+            transaction_id=saga.transaction_id,
+            amount=saga.amount,
+        )
+
+        db.commit()
+
+
+def _compensate(db: Session, saga: TransferSaga) -> None:
+    # The destination can't take the credit (its wallet is gone): refund the
+    # source wallet under the same transaction, which ends up failed with
+    # two entries that net to zero.
+    WalletService(db).increase_balance(
+        wallet_id=saga.source_wallet_id,
+        amount=saga.amount,
+    )
+    create_ledger_entry(
+        db,
+        wallet_id=saga.source_wallet_id,
+        transaction_id=saga.transaction_id,
+        amount=saga.amount,
+    )
+    db.execute(
+        update(Transaction)
+        .where(Transaction.id == saga.transaction_id)
+        .values(status=TransactionStatus.FAILED)
+    )
+    record_status_change(db, saga.transaction_id, TransactionStatus.PENDING, TransactionStatus.FAILED)
+    saga.status = SagaStatus.COMPENSATED
+
+
+def advance_saga(
+    db: Session,
+    transaction_id: UUID,
+    shard_map: ShardMap = shard_map,
+) -> SagaStatus | None:
+
+    # db is a session on the saga's (source) shard. The saga row stays locked
+    # while the credit is applied, so the request and the worker never drive
+    # the same saga at once; None if it is finished or being handled.
+    saga = db.execute(
+        select(TransferSaga)
+        .where(
+            TransferSaga.transaction_id == transaction_id,
+            TransferSaga.status == SagaStatus.PENDING,
+        )
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+
+    if saga is None:
+        db.rollback()
+        return None
+
+    try:
+        _apply_credit(saga, shard_map)
+
+    except WalletNotFoundError:
+        _compensate(db, saga)
+
+    except Exception as e:
+        # Destination shard down or similar: keep it pending for the worker
+        saga.attempts += 1
+        saga.last_error = repr(e)[:500]
+        saga.updated_at = func.now()
+        db.commit()
+
+        return SagaStatus.PENDING
+
+    else:
+        # 3. Complete the transfer on the source shard
+        db.execute(
+            update(Transaction)
+            .where(Transaction.id == saga.transaction_id)
+            .values(status=TransactionStatus.COMPLETED)
+        )
+        record_status_change(db, saga.transaction_id, TransactionStatus.PENDING, TransactionStatus.COMPLETED)
+        saga.status = SagaStatus.COMPLETED
+
+    saga.attempts += 1
+    saga.updated_at = func.now()
+    status = SagaStatus(saga.status)
+    db.commit()
+
+    return status
+
+
+def resume_sagas(
+    db: Session,
+    retry_after_seconds: int = db_settings.SAGA_RETRY_AFTER_SECONDS,
+    batch_size: int = db_settings.SAGA_BATCH_SIZE,
+    shard_map: ShardMap = shard_map,
+) -> dict[SagaStatus, int]:
+
+    # Pending sagas on db's shard that nobody has touched for a while: the
+    # request that started them crashed, or the destination was down.
+    due = db.execute(
+        select(TransferSaga.transaction_id)
+        .where(
+            TransferSaga.status == SagaStatus.PENDING,
+            TransferSaga.updated_at <= func.now() - timedelta(seconds=retry_after_seconds),
+        )
+        .order_by(TransferSaga.updated_at)
+        .limit(batch_size)
+    ).scalars().all()
+    db.rollback()
+
+    outcomes = {status: 0 for status in SagaStatus}
+
+    for transaction_id in due:
+        status = advance_saga(db, transaction_id, shard_map=shard_map)
+
+        if status is not None:
+            outcomes[status] += 1
+
+    return outcomes
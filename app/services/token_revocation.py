@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+import time
+
+from app.core.config import db_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationCache:
+    # Revocation is a per-user watermark: access tokens issued before it are
+    # invalid. Access tokens are short-lived, so only watermarks younger than
+    # their lifetime are ever needed; that set is small enough to keep in
+    # every process. Checking a token is then a dict lookup, and new
+    # watermarks arrive over Redis pub/sub instead of being polled for.
+
+    def __init__(
+        self,
+        channel: str = db_settings.TOKEN_REVOCATION_CHANNEL,
+        token_ttl_seconds: float = db_settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    ):
+        self.channel = channel
+        self.token_ttl_seconds = token_ttl_seconds
+
+        # user id -> unix time before which their tokens are revoked
+        self._watermarks: dict[str, float] = {}
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def is_revoked(self, user_id: str, issued_at: float) -> bool:
+        if not self._started:
+            self._start()
+
+        return issued_at < self._watermarks.get(user_id, 0.0)
+
+    def revoke_user(self, user_id: str) -> None:
+        from app.db.redis_db import set_token_watermark
+
+        revoked_before = time.time()
+        # Applied locally straight away; other processes get it via pub/sub
+        self._watermarks[user_id] = revoked_before
+
+        set_token_watermark(
+            user_id,
+            revoked_before,
+            channel=self.channel,
+            keep_seconds=self.token_ttl_seconds,
+        )
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+
+            # One synchronous load, so a fresh process doesn't accept tokens
+            # revoked before it started while the listener is connecting.
+            try:
+                self._load()
+            except Exception:
+                logger.warning("Could not load token watermarks", exc_info=True)
+
+            thread = threading.Thread(
+                target=self._listen,
+                name="token-revocations",
+                daemon=True,
+            )
+            thread.start()
+            self._started = True
+
+    def _reset_after_fork(self) -> None:
+        # The listener thread doesn't survive a fork; start a new one on first use
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def _load(self) -> None:
+        from app.db.redis_db import get_token_watermarks
+
+        watermarks = get_token_watermarks(since=time.time() - self.token_ttl_seconds)
+
+        for user_id, revoked_before in watermarks.items():
+            if revoked_before > self._watermarks.get(user_id, 0.0):
+                self._watermarks[user_id] = revoked_before
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.token_ttl_seconds
+        self._watermarks = {
+            user_id: revoked_before
+            for user_id, revoked_before in self._watermarks.items()
+            if revoked_before > cutoff
+        }
+
+    def _listen(self) -> None:
+        from app.db.redis_db import subscribe_to_token_watermarks
+
+        while True:
+            try:
+                # Subscribe before loading, so nothing published in between is lost
+                pubsub = subscribe_to_token_watermarks(self.channel)
+                self._load()
+
+                pruned_at = time.monotonic()
+
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+
+                    if message is not None:
+                        user_id, revoked_before = message["data"].decode().split()
+
+                        if float(revoked_before) > self._watermarks.get(user_id, 0.0):
+                            self._watermarks[user_id] = float(revoked_before)
+
+                    if time.monotonic() - pruned_at > self.token_ttl_seconds:
+                        self._prune()
+                        pruned_at = time.monotonic()
+
+            except Exception:
+                # Keep serving the watermarks we have and resync on reconnect
+                logger.warning("Token revocation listener failed", exc_info=True)
+                time.sleep(1)
+
+
+token_revocations = TokenRevocationCache()
+os.register_at_fork(after_in_child=token_revocations._reset_after_fork)
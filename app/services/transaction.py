@@ -1,19 +1,49 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
-from pydantic import TypeAdapter
 
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select, update
+from sqlalchemy import Select, Text, cast, func, insert, select, update
 from decimal import Decimal
 
+from app.core.config import db_settings
+from app.db.types import minor_units
+from app.models.archive import ArchivedLedgerEntry, ArchivedTransaction
+from app.models.hold import Hold
+from app.models.idempotency import IdempotencyKey
 from app.models.transaction import Transaction
+from app.models.transfer_review import TransferReview
 from app.models.ledger import LedgerEntry
 from app.models.user import User
 
 from app.models.wallet import Wallet
-from app.schemas.transaction import RecentTransactionRead, TransactionStatus, TransactionType
+from app.schemas.hold import HoldStatus
+from app.schemas.outbox import OutboxEventType
+from app.schemas.transaction import (
+    BulkReversalRead,
+    JournalLeg,
+    JournalLegRead,
+    JournalRead,
+    RecentTransactionListAdapter,
+    RecentTransactionRead,
+    RecentTransactionRow,
+    TransactionFilter,
+    TransactionStatus,
+    TransactionType,
+    format_minor_units,
+)
 
-from app.services.wallet import WalletService
+from app.services.fx import (
+    FxLiquidityError,
+    FxQuote,
+    InvalidFxQuoteError,
+    get_fx_house_wallet_id,
+)
+from app.services.archive import archive_cutoff
+from app.services.outbox import create_outbox_event
+from app.services.risk import RiskPipeline, TransferRisk, risk_pipeline
+from app.services.wallet import InsufficientBalanceError, WalletNotFoundError, WalletService
 
 
 class InvalidTransferError(Exception):
@@ -25,26 +55,99 @@ class WalletCurrencyMismatchError(Exception):
 class SameWalletTransferError(Exception):
     pass
 
+class TransactionNotFoundError(Exception):
+    pass
+
+class TransactionNotReversibleError(Exception):
+    pass
+
+class HoldNotFoundError(Exception):
+    pass
+
+class HoldNotActiveError(Exception):
+    pass
+
+class InvalidHoldAmountError(Exception):
+    pass
+
+class TransferNotPendingError(Exception):
+    pass
+
+class InvalidJournalError(Exception):
+    pass
+
+class JournalReviewRequiredError(Exception):
+    def __init__(self, reasons: list[str]):
+        self.reasons = reasons
+        super().__init__("Journal needs review: " + "; ".join(reasons))
+
+
+class FxTransferReviewRequiredError(Exception):
+    def __init__(self, reasons: list[str]):
+        self.reasons = reasons
+        super().__init__("FX transfer needs review: " + "; ".join(reasons))
+
 
 
 def create_transaction(
     db: Session,
     transaction_type: TransactionType,
     reference: str | None = None,
+    reversal_of_id: UUID | None = None,
+    status: TransactionStatus = TransactionStatus.COMPLETED,
+    transaction_id: UUID | None = None,
 ) -> Transaction:
 
     transaction = Transaction(
+        # Set when one transaction spans shards: both halves share the id
+        id=transaction_id,
         type=transaction_type,
-        status=TransactionStatus.COMPLETED,
+        status=status,
         reference=reference,
+        reversal_of_id=reversal_of_id,
     )
 
     db.add(transaction)
     db.flush()
 
+    create_outbox_event(
+        db,
+        event_type=OutboxEventType.TRANSACTION_CREATED,
+        aggregate_id=transaction.id,
+        payload={
+            "transaction_id": str(transaction.id),
+            "type": TransactionType(transaction.type).value,
+            "status": TransactionStatus(transaction.status).value,
+            "reference": transaction.reference,
+            "reversal_of_id": str(reversal_of_id) if reversal_of_id else None,
+        },
+    )
+
     return transaction
 
 
+def record_status_change(
+    db: Session,
+    transaction_id: UUID,
+    previous_status: TransactionStatus,
+    status: TransactionStatus,
+) -> None:
+
+    # transaction.created only carries the first status. Anything that moves
+    # a transaction on afterwards (review decisions, sagas, reversals)
+    # announces it, in the same DB transaction as the update.
+    create_outbox_event(
+        db,
+        event_type=OutboxEventType.TRANSACTION_STATUS_CHANGED,
+        aggregate_id=transaction_id,
+        payload={
+            "transaction_id": str(transaction_id),
+            "previous_status": previous_status.value,
+            "status": status.value,
+        },
+    )
+
+
 def create_ledger_entry(
     db: Session,
     wallet_id: UUID,
@@ -61,51 +164,237 @@ def create_ledger_entry(
     db.add(entry)
     db.flush()
 
+    create_outbox_event(
+        db,
+        event_type=OutboxEventType.LEDGER_ENTRY_CREATED,
+        aggregate_id=transaction_id,
+        payload={
+            "ledger_entry_id": str(entry.id),
+            "transaction_id": str(transaction_id),
+            "wallet_id": str(wallet_id),
+            "amount": str(amount),
+        },
+    )
+
     return entry
 
 
+def create_ledger_entries(
+    db: Session,
+    transaction_id: UUID,
+    amounts: list[tuple[UUID, Decimal]],
+) -> list[LedgerEntry]:
+
+    # All legs in one multi-row INSERT ... RETURNING, in the order given
+    entries = db.scalars(
+        insert(LedgerEntry).returning(LedgerEntry, sort_by_parameter_order=True),
+        [
+            {"wallet_id": wallet_id, "transaction_id": transaction_id, "amount": amount}
+            for wallet_id, amount in amounts
+        ],
+    ).all()
+
+    for entry in entries:
+        create_outbox_event(
+            db,
+            event_type=OutboxEventType.LEDGER_ENTRY_CREATED,
+            aggregate_id=transaction_id,
+            payload={
+                "ledger_entry_id": str(entry.id),
+                "transaction_id": str(transaction_id),
+                "wallet_id": str(entry.wallet_id),
+                "amount": str(entry.amount),
+            },
+        )
+
+    return entries
+
+
 # extra info: A transaction creates one or more ledger entries.
 
 
+def history_query(
+    wallet_id: UUID | None = None,
+    limit: int = 20,
+    filters: TransactionFilter | None = None,
+    archived: bool = False,
+    lean: bool = False,
+) -> Select:
+
+    # The archive tables have the same columns, so one query serves both
+    if archived:
+        transactions, entries = ArchivedTransaction, ArchivedLedgerEntry
+    else:
+        transactions, entries = Transaction, LedgerEntry
+
+    # A wallet's history is walked through the (wallet_id, created_at)
+    # ledger index; a search across all wallets starts from the
+    # transactions indexes instead and joins in via transaction_id.
+    if wallet_id is not None:
+        created_at = entries.created_at
+    else:
+        created_at = transactions.created_at
+
+    if lean:
+        # Lean rows: ids come back as text and amounts as integer cents, so
+        # no UUID or Decimal object is built per row (RecentTransactionRow)
+        columns = (
+            cast(transactions.id, Text).label("transaction_id"),
+            transactions.type,
+            transactions.status,
+            minor_units(entries.amount).label("amount_minor"),
+            cast(entries.wallet_id, Text).label("wallet_id"),
+            transactions.reference,
+            transactions.created_at,
+        )
+    else:
+        columns = (
+            transactions.id.label("transaction_id"),
+            transactions.type,
+            transactions.status,
+            entries.amount,
+            entries.wallet_id,
+            transactions.reference,
+            transactions.created_at,
+        )
+
+    stmt = (
+        select(*columns)
+        .join(
+            entries,
+            entries.transaction_id == transactions.id,
+        )
+        .order_by(created_at.desc())
+        .limit(limit)
+    )
+
+    if wallet_id is not None:
+        stmt = stmt.where(entries.wallet_id == wallet_id)
+
+    if filters is not None:
+        if filters.type is not None:
+            stmt = stmt.where(transactions.type == filters.type.value)
+        if filters.reference is not None:
+            # LIKE 'prefix%' can use the text_pattern_ops index
+            stmt = stmt.where(
+                transactions.reference.startswith(filters.reference, autoescape=True)
+            )
+        if filters.start is not None:
+            stmt = stmt.where(created_at >= filters.start)
+        if filters.end is not None:
+            stmt = stmt.where(created_at < filters.end)
+        # Amount has no index of its own; it narrows rows found through the ones above
+        if filters.min_amount is not None:
+            stmt = stmt.where(func.abs(entries.amount, type_=entries.amount.type) >= filters.min_amount)
+        if filters.max_amount is not None:
+            stmt = stmt.where(func.abs(entries.amount, type_=entries.amount.type) <= filters.max_amount)
+
+    return stmt
+
+
+def reaches_archive(filters: TransactionFilter | None, archived_until: datetime | None) -> bool:
+    # archived_until is the newest archived row that could match (None:
+    # nothing archived). Without a start date, or with one at or before it,
+    # a short page may continue into the archive.
+    if archived_until is None:
+        return False
+
+    return filters is None or filters.start is None or filters.start <= archived_until
+
+
 class TransactionService:
     def __init__(
         self,
         db: Session,
         wallet_service: WalletService,
+        risk_pipeline: RiskPipeline = risk_pipeline,
     ):
         self.db = db
         self.wallet_service = wallet_service
+        self.risk_pipeline = risk_pipeline
+
+    def _history_rows(
+        self,
+        wallet_id: UUID | None,
+        limit: int,
+        filters: TransactionFilter | None,
+        lean: bool = False,
+    ) -> list:
+
+        stmt = history_query(wallet_id=wallet_id, limit=limit, filters=filters, lean=lean)
+        rows = self.db.execute(stmt).all()
+
+        # Read through to the archive only when the hot tables couldn't fill
+        # the page and the wallet has archived rows at all. The wallet is
+        # normally already in the session (the caller checked ownership), so
+        # its watermark costs no query. Searches across all wallets go by the
+        # archive horizon instead.
+        if len(rows) < limit:
+            if wallet_id is None:
+                archived_until = archive_cutoff()
+            else:
+                wallet = self.db.get(Wallet, wallet_id)
+                archived_until = wallet.archived_until if wallet is not None else None
+
+            if not reaches_archive(filters, archived_until):
+                return rows
+
+            archived = self.db.execute(
+                history_query(
+                    wallet_id=wallet_id,
+                    limit=limit - len(rows),
+                    filters=filters,
+                    archived=True,
+                    lean=lean,
+                )
+            ).all()
+            # Old transactions excluded from archiving can still be hot
+            rows = sorted([*rows, *archived], key=lambda row: row.created_at, reverse=True)
+
+        return rows
 
     def get_recent_transactions(
         self,
         wallet_id: UUID | None = None,
         limit: int = 20,
-    ):
-        
-        stmt = (
-            select(
-                Transaction.id.label("transaction_id"),
-                Transaction.type,
-                Transaction.status,
-                LedgerEntry.amount,
-                LedgerEntry.wallet_id,
-                Transaction.reference,
-                Transaction.created_at,
-            )
-            .join(
-                LedgerEntry,
-                LedgerEntry.transaction_id == Transaction.id,
-            )
-            .where(
-                LedgerEntry.wallet_id == wallet_id,
-            )
-            .order_by(LedgerEntry.created_at.desc())
-            .limit(limit)
-        )
+        filters: TransactionFilter | None = None,
+    ) -> list[RecentTransactionRead]:
+
+        rows = self._history_rows(wallet_id, limit, filters)
+
+        return RecentTransactionListAdapter.validate_python([row._mapping for row in rows])
 
-        rows = self.db.execute(stmt).mappings().all()
+    def get_recent_transaction_rows(
+        self,
+        wallet_id: UUID | None = None,
+        limit: int = 20,
+        filters: TransactionFilter | None = None,
+    ) -> list[RecentTransactionRow]:
 
-        return TypeAdapter(list[RecentTransactionRead]).validate_python(rows)
+        # Same page as get_recent_transactions, without the per-row model
+        # validation: for the history endpoints and exports.
+        rows = self._history_rows(wallet_id, limit, filters, lean=True)
+
+        return [
+            RecentTransactionRow(
+                transaction_type,
+                status,
+                reference,
+                created_at,
+                transaction_id,
+                entry_wallet_id,
+                format_minor_units(amount_minor),
+            )
+            for (
+                transaction_id,
+                transaction_type,
+                status,
+                amount_minor,
+                entry_wallet_id,
+                reference,
+                created_at,
+            ) in rows
+        ]
 
     def deposit(
         self,
@@ -113,6 +402,7 @@ class TransactionService:
         wallet_id: UUID,
         amount: Decimal,
         reference: str | None = None,
+        expected_version: int | None = None,
     ):
         try:
             # 1. Verify the wallet belongs to current user
@@ -130,6 +420,7 @@ class TransactionService:
             wallet = self.wallet_service.increase_balance(
                 wallet_id=wallet_id,
                 amount=amount,
+                expected_version=expected_version,
             )
 
             ledger_entry = create_ledger_entry(
@@ -160,6 +451,7 @@ class TransactionService:
         wallet_id: UUID,
         amount: Decimal,
         reference: str | None = None,
+        expected_version: int | None = None,
     ):
         try:
             # 1. Verify the wallet belongs to current user
@@ -177,7 +469,9 @@ class TransactionService:
             wallet = self.wallet_service.decrease_balance(
                 wallet_id=wallet_id,
                 amount=amount,
+                expected_version=expected_version,
             )
+            self.wallet_service.consume_spending_limits(wallet, amount)
 
             ledger_entry = create_ledger_entry(
                 self.db,
@@ -239,26 +533,58 @@ class TransactionService:
                     "the same currency."
                 )
 
-            # 4. Create ONE transaction
+            # 4. Risk checks, from in-memory counters. A flagged transfer is
+            # parked for review instead of being rejected.
+            risk = TransferRisk(
+                sender_id=source_wallet.user_id,
+                receiver_id=destination_wallet.user_id,
+                currency=source_wallet.currency,
+                amount=amount,
+            )
+            reasons = self.risk_pipeline.assess(risk)
+
+            if reasons:
+                transaction, source_wallet = self._park_transfer(
+                    source_wallet_id=source_wallet.id,
+                    destination_wallet_id=destination_wallet.id,
+                    amount=amount,
+                    reference=reference,
+                    reasons=reasons,
+                )
+
+                self.db.commit()
+                self.risk_pipeline.record(risk)
+
+                self.db.refresh(transaction)
+                self.db.refresh(source_wallet)
+
+                return (
+                    transaction,
+                    source_wallet,
+                    destination_wallet,
+                )
+
+            # 5. Create ONE transaction
             transaction = create_transaction(
                 self.db,
                 transaction_type=TransactionType.TRANSFER,
                 reference=reference,
             )
 
-            # 5. Decrease source wallet
+            # 6. Decrease source wallet
             source_wallet = self.wallet_service.decrease_balance(
                 wallet_id=source_wallet.id,
                 amount=amount,
             )
+            self.wallet_service.consume_spending_limits(source_wallet, amount)
 
-            # 6. Increase destination wallet
+            # 7. Increase destination wallet
             destination_wallet = self.wallet_service.increase_balance(
                 wallet_id=destination_wallet.id,
                 amount=amount,
             )
 
-            # 7. Create SOURCE ledger entry
+            # 8. Create SOURCE ledger entry
             source_entry = create_ledger_entry(
                 self.db,
                 wallet_id=source_wallet.id,
@@ -266,7 +592,7 @@ class TransactionService:
                 amount=-amount,
             )
 
-            # 8. Create DESTINATION ledger entry
+            # 9. Create DESTINATION ledger entry
             destination_entry = create_ledger_entry(
                 self.db,
                 wallet_id=destination_wallet.id,
@@ -274,8 +600,9 @@ class TransactionService:
                 amount=amount,
             )
 
-            # 9. Commit EVERYTHING together
+            # 10. Commit EVERYTHING together
             self.db.commit()
+            self.risk_pipeline.record(risk)
 
             self.db.refresh(transaction)
             self.db.refresh(source_entry)
@@ -291,4 +618,791 @@ class TransactionService:
 
         except Exception:
             self.db.rollback()
-            raise
\ No newline at end of file
+            raise
+
+    def _park_transfer(
+        self,
+        source_wallet_id: UUID,
+        destination_wallet_id: UUID,
+        amount: Decimal,
+        reference: str | None,
+        reasons: list[str],
+    ) -> tuple[Transaction, Wallet]:
+
+        transaction = create_transaction(
+            self.db,
+            transaction_type=TransactionType.TRANSFER,
+            reference=reference,
+            status=TransactionStatus.PENDING,
+        )
+
+        # Held like a hold, so the sender can't spend it twice while the
+        # transfer waits; nothing is debited or credited yet.
+        source_wallet = self.wallet_service.reserve_balance(
+            wallet_id=source_wallet_id,
+            amount=amount,
+        )
+
+        self.db.add(
+            TransferReview(
+                transaction_id=transaction.id,
+                source_wallet_id=source_wallet_id,
+                destination_wallet_id=destination_wallet_id,
+                amount=amount,
+                reasons="\n".join(reasons),
+            )
+        )
+        self.db.flush()
+
+        return transaction, source_wallet
+
+    def _decide_review(
+        self,
+        transaction_id: UUID,
+        reviewer_id: UUID,
+        status: TransactionStatus,
+    ) -> TransferReview:
+
+        review = self.db.get(TransferReview, transaction_id)
+
+        if review is None:
+            raise TransactionNotFoundError()
+
+        # Same conditional-update idea as reversals: only one decision can
+        # move the transaction out of pending.
+        decided = self.db.execute(
+            update(Transaction)
+            .where(
+                Transaction.id == transaction_id,
+                Transaction.status == TransactionStatus.PENDING,
+            )
+            .values(status=status)
+            .returning(Transaction.id)
+        ).scalar_one_or_none()
+
+        if decided is None:
+            raise TransferNotPendingError()
+
+        record_status_change(self.db, transaction_id, TransactionStatus.PENDING, status)
+
+        review.reviewed_by = reviewer_id
+        review.reviewed_at = func.now()
+        self.db.flush()
+
+        return review
+
+    def approve_transfer(
+        self,
+        transaction_id: UUID,
+        reviewer_id: UUID,
+    ) -> TransferReview:
+
+        try:
+            review = self._decide_review(
+                transaction_id,
+                reviewer_id,
+                TransactionStatus.COMPLETED,
+            )
+
+            # Debit the held amount and credit the destination, like a
+            # regular transfer from here on
+            source_wallet = self.wallet_service.capture_held_balance(
+                wallet_id=review.source_wallet_id,
+                held_amount=review.amount,
+                amount=review.amount,
+            )
+            self.wallet_service.consume_spending_limits(source_wallet, review.amount)
+
+            self.wallet_service.increase_balance(
+                wallet_id=review.destination_wallet_id,
+                amount=review.amount,
+            )
+
+            create_ledger_entry(
+                self.db,
+                wallet_id=review.source_wallet_id,
+                transaction_id=transaction_id,
+                amount=-review.amount,
+            )
+            create_ledger_entry(
+                self.db,
+                wallet_id=review.destination_wallet_id,
+                transaction_id=transaction_id,
+                amount=review.amount,
+            )
+
+            self.db.commit()
+            self.db.refresh(review)
+
+            return review
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def reject_transfer(
+        self,
+        transaction_id: UUID,
+        reviewer_id: UUID,
+    ) -> TransferReview:
+
+        try:
+            review = self._decide_review(
+                transaction_id,
+                reviewer_id,
+                TransactionStatus.FAILED,
+            )
+
+            self.wallet_service.release_held_balance(
+                wallet_id=review.source_wallet_id,
+                amount=review.amount,
+            )
+
+            self.db.commit()
+            self.db.refresh(review)
+
+            return review
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def get_transfer_reviews(
+        self,
+        pending_only: bool = True,
+        limit: int = 50,
+    ) -> list:
+
+        stmt = (
+            select(TransferReview, Transaction.status)
+            .join(Transaction, Transaction.id == TransferReview.transaction_id)
+            .order_by(TransferReview.created_at)
+            .limit(limit)
+        )
+
+        if pending_only:
+            stmt = stmt.where(TransferReview.reviewed_at.is_(None))
+
+        return self.db.execute(stmt).all()
+
+    def _reverse_transaction(
+        self,
+        transaction_id: UUID,
+        reference: str | None = None,
+    ) -> Transaction:
+
+        # 1. Flip the original to REVERSED in one conditional UPDATE. Only one
+        # caller can win this, which guards against double reversal (the
+        # unique reversal_of_id column is the second line of defence).
+        flipped = self.db.execute(
+            update(Transaction)
+            .where(
+                Transaction.id == transaction_id,
+                Transaction.status == TransactionStatus.COMPLETED,
+                Transaction.type != TransactionType.REVERSAL,
+            )
+            .values(status=TransactionStatus.REVERSED)
+            .returning(Transaction.type)
+        ).scalar_one_or_none()
+
+        if flipped is None:
+            if self.db.get(Transaction, transaction_id) is None:
+                raise TransactionNotFoundError()
+            raise TransactionNotReversibleError()
+
+        record_status_change(
+            self.db,
+            transaction_id,
+            TransactionStatus.COMPLETED,
+            TransactionStatus.REVERSED,
+        )
+
+        # 2. Load the original legs and lock their wallets in id order
+        entries = self.db.execute(
+            select(LedgerEntry.wallet_id, LedgerEntry.amount)
+            .where(LedgerEntry.transaction_id == transaction_id)
+            .order_by(LedgerEntry.wallet_id)
+        ).all()
+
+        # One half of a cross-shard transfer (app.services.sharding): the
+        # other leg is on another shard, so it can't be reversed from here.
+        if flipped == TransactionType.TRANSFER and sum(entry.amount for entry in entries) != 0:
+            raise TransactionNotReversibleError()
+
+        self.wallet_service.lock_wallets([entry.wallet_id for entry in entries])
+
+        # 3. Create the compensating transaction linked to the original
+        reversal = create_transaction(
+            self.db,
+            transaction_type=TransactionType.REVERSAL,
+            reference=reference,
+            reversal_of_id=transaction_id,
+        )
+
+        # 4. Mirror every leg. Taking back a credit goes through the same
+        # conditional debit as a withdrawal, so a wallet that already spent
+        # the money raises InsufficientBalanceError instead of going negative.
+        for entry in entries:
+            if entry.amount > 0:
+                self.wallet_service.decrease_balance(
+                    wallet_id=entry.wallet_id,
+                    amount=entry.amount,
+                )
+            else:
+                self.wallet_service.increase_balance(
+                    wallet_id=entry.wallet_id,
+                    amount=-entry.amount,
+                )
+
+            create_ledger_entry(
+                self.db,
+                wallet_id=entry.wallet_id,
+                transaction_id=reversal.id,
+                amount=-entry.amount,
+            )
+
+        return reversal
+
+    def reverse(
+        self,
+        transaction_id: UUID,
+        reference: str | None = None,
+    ) -> Transaction:
+        try:
+            reversal = self._reverse_transaction(
+                transaction_id=transaction_id,
+                reference=reference,
+            )
+
+            self.db.commit()
+            self.db.refresh(reversal)
+
+            return reversal
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def reverse_many(
+        self,
+        transaction_ids: list[UUID],
+        batch_size: int = 100,
+    ) -> BulkReversalRead:
+
+        report = BulkReversalRead()
+
+        # Each batch is its own DB transaction, so wallet locks are only held
+        # for one batch at a time instead of for the whole run.
+        for start in range(0, len(transaction_ids), batch_size):
+            batch = transaction_ids[start:start + batch_size]
+
+            try:
+                # Lock every wallet the batch touches up front, in id order.
+                wallet_ids = self.db.execute(
+                    select(LedgerEntry.wallet_id)
+                    .where(LedgerEntry.transaction_id.in_(batch))
+                    .distinct()
+                ).scalars().all()
+
+                self.wallet_service.lock_wallets(wallet_ids)
+
+                for transaction_id in batch:
+                    # A SAVEPOINT per transaction: one bad row is reported
+                    # and skipped without aborting the rest of the batch.
+                    try:
+                        with self.db.begin_nested():
+                            self._reverse_transaction(transaction_id)
+                    except (
+                        TransactionNotFoundError,
+                        TransactionNotReversibleError,
+                        InsufficientBalanceError,
+                        IntegrityError,
+                    ) as e:
+                        report.failed[transaction_id] = type(e).__name__
+                        continue
+
+                    report.reversed.append(transaction_id)
+
+                self.db.commit()
+
+            except Exception:
+                self.db.rollback()
+                raise
+
+        return report
+
+    def _get_user_hold(
+        self,
+        user_id: UUID,
+        hold_id: UUID,
+    ) -> Hold:
+
+        hold = self.db.execute(
+            select(Hold)
+            .join(Wallet, Wallet.id == Hold.wallet_id)
+            .where(
+                Hold.id == hold_id,
+                Wallet.user_id == user_id,
+            )
+        ).scalar_one_or_none()
+
+        if hold is None:
+            raise HoldNotFoundError()
+
+        return hold
+
+    def hold(
+        self,
+        user_id: UUID,
+        wallet_id: UUID,
+        amount: Decimal,
+        reference: str | None = None,
+        expires_in_seconds: int | None = None,
+    ) -> tuple[Hold, Wallet]:
+        try:
+            self.wallet_service.get_wallet_by_user_id(
+                user_id=user_id,
+                wallet_id=wallet_id,
+            )
+
+            # Moves amount from available to held, or raises InsufficientBalanceError
+            wallet = self.wallet_service.reserve_balance(
+                wallet_id=wallet_id,
+                amount=amount,
+            )
+
+            ttl = expires_in_seconds or db_settings.HOLD_DEFAULT_TTL_SECONDS
+
+            hold = Hold(
+                wallet_id=wallet_id,
+                amount=amount,
+                status=HoldStatus.ACTIVE,
+                reference=reference,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl),
+            )
+
+            self.db.add(hold)
+            self.db.commit()
+
+            self.db.refresh(hold)
+            self.db.refresh(wallet)
+
+            return hold, wallet
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def capture(
+        self,
+        user_id: UUID,
+        hold_id: UUID,
+        amount: Decimal | None = None,
+        reference: str | None = None,
+    ):
+        try:
+            hold = self._get_user_hold(user_id=user_id, hold_id=hold_id)
+
+            capture_amount = hold.amount if amount is None else amount
+
+            if capture_amount > hold.amount:
+                raise InvalidHoldAmountError(
+                    "Capture amount cannot exceed the held amount."
+                )
+
+            # 1. Claim the hold. Only an active, unexpired hold can be claimed,
+            # and only once, even with a concurrent release or sweeper.
+            claimed = self.db.execute(
+                update(Hold)
+                .where(
+                    Hold.id == hold.id,
+                    Hold.status == HoldStatus.ACTIVE,
+                    Hold.expires_at > func.now(),
+                )
+                .values(
+                    status=HoldStatus.CAPTURED,
+                    captured_amount=capture_amount,
+                )
+                .returning(Hold.id)
+            ).scalar_one_or_none()
+
+            if claimed is None:
+                raise HoldNotActiveError()
+
+            transaction = create_transaction(
+                self.db,
+                transaction_type=TransactionType.CAPTURE,
+                reference=reference,
+            )
+
+            # 2. Debit the captured amount and drop the hold from held_balance
+            wallet = self.wallet_service.capture_held_balance(
+                wallet_id=hold.wallet_id,
+                held_amount=hold.amount,
+                amount=capture_amount,
+            )
+            self.wallet_service.consume_spending_limits(wallet, capture_amount)
+
+            ledger_entry = create_ledger_entry(
+                self.db,
+                wallet_id=wallet.id,
+                transaction_id=transaction.id,
+                amount=-capture_amount,
+            )
+
+            self.db.execute(
+                update(Hold)
+                .where(Hold.id == hold.id)
+                .values(transaction_id=transaction.id)
+            )
+
+            self.db.commit()
+
+            self.db.refresh(transaction)
+            self.db.refresh(ledger_entry)
+            self.db.refresh(wallet)
+
+            return transaction, ledger_entry, wallet
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def release(
+        self,
+        user_id: UUID,
+        hold_id: UUID,
+    ) -> Hold:
+        try:
+            hold = self._get_user_hold(user_id=user_id, hold_id=hold_id)
+
+            released = self.db.execute(
+                update(Hold)
+                .where(
+                    Hold.id == hold.id,
+                    Hold.status == HoldStatus.ACTIVE,
+                )
+                .values(status=HoldStatus.RELEASED)
+                .returning(Hold.id)
+            ).scalar_one_or_none()
+
+            if released is None:
+                raise HoldNotActiveError()
+
+            self.wallet_service.release_held_balance(
+                wallet_id=hold.wallet_id,
+                amount=hold.amount,
+            )
+
+            self.db.commit()
+            self.db.refresh(hold)
+
+            return hold
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def expire_holds(
+        self,
+        batch_size: int = db_settings.HOLD_SWEEP_BATCH_SIZE,
+    ) -> int:
+        try:
+            # Served by the partial index on active holds' expires_at.
+            # SKIP LOCKED lets several sweepers share the work, and skips
+            # holds that a capture/release is handling right now.
+            due = (
+                select(Hold.id)
+                .where(
+                    Hold.status == HoldStatus.ACTIVE,
+                    Hold.expires_at <= func.now(),
+                )
+                .order_by(Hold.expires_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+
+            expired = self.db.execute(
+                update(Hold)
+                .where(Hold.id.in_(due))
+                .values(status=HoldStatus.EXPIRED)
+                .returning(Hold.wallet_id, Hold.amount)
+            ).all()
+
+            # One UPDATE per wallet rather than per hold, in id order.
+            held_by_wallet: dict[UUID, Decimal] = defaultdict(Decimal)
+            for wallet_id, amount in expired:
+                held_by_wallet[wallet_id] += amount
+
+            for wallet_id in sorted(held_by_wallet):
+                self.wallet_service.release_held_balance(
+                    wallet_id=wallet_id,
+                    amount=held_by_wallet[wallet_id],
+                )
+
+            self.db.commit()
+
+            return len(expired)
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def fx_transfer(
+        self,
+        user_id: UUID,
+        source_wallet_id: UUID,
+        destination_wallet_id: UUID,
+        quote: FxQuote,
+        reference: str | None = None,
+    ):
+
+        if source_wallet_id == destination_wallet_id:
+            raise InvalidTransferError(
+                "Source and destination wallets must be different."
+            )
+
+        try:
+            source_wallet = self.wallet_service.get_wallet_by_user_id(
+                user_id=user_id,
+                wallet_id=source_wallet_id,
+            )
+            destination_wallet = self.wallet_service.get_wallet_by_id(
+                wallet_id=destination_wallet_id,
+            )
+
+            if (
+                source_wallet.currency != quote.source_currency.value
+                or destination_wallet.currency != quote.destination_currency.value
+            ):
+                raise WalletCurrencyMismatchError(
+                    "Wallet currencies do not match the FX quote."
+                )
+
+            # Risk checks on what leaves the sender, in the source currency,
+            # so an FX transfer counts in the same windows as a plain one. A
+            # quote expires within seconds, so a flagged transfer can't wait
+            # in review like a transfer and is refused.
+            risk = TransferRisk(
+                sender_id=source_wallet.user_id,
+                receiver_id=destination_wallet.user_id,
+                currency=source_wallet.currency,
+                amount=quote.source_amount,
+            )
+            reasons = self.risk_pipeline.assess(risk)
+
+            if reasons:
+                raise FxTransferReviewRequiredError(reasons)
+
+            house_source_id = get_fx_house_wallet_id(self.db, source_wallet.currency)
+            house_destination_id = get_fx_house_wallet_id(
+                self.db,
+                destination_wallet.currency,
+            )
+
+            # Each quote can be executed once: the idempotency key insert
+            # fails if the same quote comes back.
+            try:
+                with self.db.begin_nested():
+                    self.db.add(IdempotencyKey(key=f"fx-quote:{quote.quote_id}"))
+                    self.db.flush()
+            except IntegrityError:
+                raise InvalidFxQuoteError("FX quote has already been used.")
+
+            self.wallet_service.lock_wallets([
+                source_wallet.id,
+                destination_wallet.id,
+                house_source_id,
+                house_destination_id,
+            ])
+
+            transaction = create_transaction(
+                self.db,
+                transaction_type=TransactionType.FX_TRANSFER,
+                reference=reference,
+            )
+
+            # Four legs, each currency nets to zero:
+            #   source wallet      -source_amount       (source currency)
+            #   house (source cur) +source_amount
+            #   house (dest cur)   -destination_amount  (destination currency)
+            #   destination wallet +destination_amount
+            source_wallet = self.wallet_service.decrease_balance(
+                wallet_id=source_wallet.id,
+                amount=quote.source_amount,
+            )
+            self.wallet_service.consume_spending_limits(source_wallet, quote.source_amount)
+            self.wallet_service.increase_balance(
+                wallet_id=house_source_id,
+                amount=quote.source_amount,
+            )
+
+            try:
+                self.wallet_service.decrease_balance(
+                    wallet_id=house_destination_id,
+                    amount=quote.destination_amount,
+                )
+            except InsufficientBalanceError:
+                raise FxLiquidityError()
+
+            destination_wallet = self.wallet_service.increase_balance(
+                wallet_id=destination_wallet.id,
+                amount=quote.destination_amount,
+            )
+
+            for wallet_id, amount in (
+                (source_wallet.id, -quote.source_amount),
+                (house_source_id, quote.source_amount),
+                (house_destination_id, -quote.destination_amount),
+                (destination_wallet.id, quote.destination_amount),
+            ):
+                create_ledger_entry(
+                    self.db,
+                    wallet_id=wallet_id,
+                    transaction_id=transaction.id,
+                    amount=amount,
+                )
+
+            self.db.commit()
+            self.risk_pipeline.record(risk)
+
+            self.db.refresh(transaction)
+            self.db.refresh(source_wallet)
+            self.db.refresh(destination_wallet)
+
+            return (
+                transaction,
+                source_wallet,
+                destination_wallet,
+            )
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def post_journal(
+        self,
+        user_id: UUID,
+        legs: list[JournalLeg],
+        reference: str | None = None,
+    ) -> JournalRead:
+
+        # One transaction with any number of same-currency legs that net to
+        # zero, e.g. a payment split between a seller, a fee and tax wallets.
+        if len(legs) < 2:
+            raise InvalidJournalError("A journal needs at least two legs.")
+
+        if any(leg.amount == 0 for leg in legs):
+            raise InvalidJournalError("Leg amounts must not be zero.")
+
+        if sum(leg.amount for leg in legs) != 0:
+            raise InvalidJournalError("Journal legs must net to zero.")
+
+        wallet_ids = [leg.wallet_id for leg in legs]
+        if len(set(wallet_ids)) != len(wallet_ids):
+            raise InvalidJournalError("A wallet can only appear in one leg.")
+
+        try:
+            # 1. Lock every wallet in id order, reading them under the lock
+            wallets = {
+                wallet.id: wallet
+                for wallet in self.wallet_service.lock_wallets(wallet_ids)
+            }
+
+            if len(wallets) != len(wallet_ids):
+                raise WalletNotFoundError()
+
+            # Money only comes out of the caller's own wallets; credits can
+            # go to anyone's, like a transfer destination.
+            if any(
+                leg.amount < 0 and wallets[leg.wallet_id].user_id != user_id
+                for leg in legs
+            ):
+                raise WalletNotFoundError()
+
+            currencies = {wallet.currency for wallet in wallets.values()}
+            if len(currencies) != 1:
+                raise WalletCurrencyMismatchError(
+                    "All journal legs must use the same currency."
+                )
+            currency = currencies.pop()
+
+            # 2. Each credit to another user is a transfer from the caller
+            # as far as the risk checks go, and the legs are assessed
+            # together so their totals count against the limits. A journal
+            # can't be parked for review like a single transfer, so a flagged
+            # one is refused.
+            risks = [
+                TransferRisk(
+                    sender_id=user_id,
+                    receiver_id=wallets[leg.wallet_id].user_id,
+                    currency=currency,
+                    amount=leg.amount,
+                )
+                for leg in legs
+                if leg.amount > 0 and wallets[leg.wallet_id].user_id != user_id
+            ]
+            reasons = self.risk_pipeline.assess_many(risks)
+
+            if reasons:
+                raise JournalReviewRequiredError(reasons)
+
+            transaction = create_transaction(
+                self.db,
+                transaction_type=TransactionType.JOURNAL,
+                reference=reference,
+            )
+
+            # 3. Every balance change in one UPDATE, then the spending limits
+            # of the debited wallets (their rows are locked by now)
+            amounts = [(leg.wallet_id, leg.amount) for leg in legs]
+            updated = {
+                wallet.id: wallet
+                for wallet in self.wallet_service.apply_balance_changes(amounts)
+            }
+
+            for leg in legs:
+                if leg.amount < 0:
+                    self.wallet_service.consume_spending_limits(updated[leg.wallet_id], -leg.amount)
+
+            # 4. Every entry in one INSERT
+            entries = create_ledger_entries(self.db, transaction.id, amounts)
+
+            # Built before the commit expires everything. now() is the DB
+            # transaction's start, so the entries carry the transaction's
+            # created_at too. Balances are only shown for the caller's wallets.
+            own = {
+                wallet_id: wallet
+                for wallet_id, wallet in updated.items()
+                if wallet.user_id == user_id
+            }
+            journal = JournalRead(
+                transaction_id=transaction.id,
+                type=TransactionType.JOURNAL,
+                status=TransactionStatus(transaction.status),
+                reference=transaction.reference,
+                created_at=entries[0].created_at,
+                currency=currency,
+                legs=[
+                    JournalLegRead(
+                        ledger_entry_id=entry.id,
+                        wallet_id=entry.wallet_id,
+                        amount=entry.amount,
+                        balance=own[entry.wallet_id].balance if entry.wallet_id in own else None,
+                        wallet_version=own[entry.wallet_id].version if entry.wallet_id in own else None,
+                    )
+                    for entry in entries
+                ],
+            )
+
+            self.db.commit()
+
+            for risk in risks:
+                self.risk_pipeline.record(risk)
+
+            return journal
+
+        except Exception:
+            self.db.rollback()
+            raise
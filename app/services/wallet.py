@@ -1,13 +1,26 @@
+from datetime import date, datetime, timezone
 from decimal import Decimal
+from typing import Callable, TypeVar
 from uuid import UUID
 
-from sqlalchemy import select, update
+from sqlalchemy import column, or_, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.core.config import db_settings
+from app.db.types import Amount
+from app.models.spending_limit import WalletSpendBucket
 from app.models.wallet import Wallet
 from app.models.user import User
 
-from app.schemas.wallet import Currency
+from app.schemas.wallet import (
+    Currency,
+    LimitPeriod,
+    SpendingLimitRead,
+    WalletLimitsRead,
+)
 
 DEFAULT_WALLET_CURRENCIES = (
     Currency.USD,
@@ -21,6 +34,51 @@ class WalletNotFoundError(Exception):
 class InsufficientBalanceError(Exception):
     pass
 
+class SpendingLimitExceededError(Exception):
+    def __init__(self, period: LimitPeriod):
+        self.period = period
+        super().__init__(
+            "Daily spending limit exceeded."
+            if period == LimitPeriod.DAY
+            else "Monthly spending limit exceeded."
+        )
+
+class WalletVersionConflictError(Exception):
+    def __init__(self, current_version: int | None = None):
+        self.current_version = current_version
+        super().__init__("Wallet was modified concurrently.")
+
+
+def bucket_start(period: LimitPeriod, today: date) -> date:
+    if period == LimitPeriod.DAY:
+        return today
+
+    return today.replace(day=1)
+
+
+T = TypeVar("T")
+
+
+def retry_on_conflict(
+    db: Session,
+    operation: Callable[[], T],
+    attempts: int = db_settings.WALLET_UPDATE_ATTEMPTS,
+) -> T:
+    # Runs operation in a savepoint and runs it again when it lost a race on
+    # a wallet version, either through WalletService.compare_and_swap or an
+    # ORM flush (StaleDataError). operation has to re-read what it changes.
+    for attempt in range(1, attempts + 1):
+        try:
+            with db.begin_nested():
+                return operation()
+
+        except (WalletVersionConflictError, StaleDataError):
+            if attempt == attempts:
+                raise
+
+            # Drop the stale copies so the next attempt sees the winner's write
+            db.expire_all()
+
 
 class WalletService:
     def __init__(self, db: Session):
@@ -57,6 +115,17 @@ class WalletService:
 
         return wallet
 
+    def get_user_wallets(self, user_id: UUID) -> list[Wallet]:
+        # Not user.wallets: that reads the catalog, and a sharded user's
+        # wallets live on their home shard (this session).
+        return list(
+            self.db.execute(
+                select(Wallet)
+                .where(Wallet.user_id == user_id)
+                .order_by(Wallet.created_at.asc())
+            ).scalars()
+        )
+
     def get_wallet_by_id(
             self,
             wallet_id: UUID,
@@ -104,11 +173,96 @@ class WalletService:
 
         return wallet
 
+    def lock_wallets(self, wallet_ids: list[UUID]) -> list[Wallet]:
+        # Always lock in id order so two operations touching the same wallets
+        # can't each hold one lock and wait on the other (deadlock).
+        return self.db.execute(
+            select(Wallet)
+            .where(Wallet.id.in_(list(set(wallet_ids))))
+            .order_by(Wallet.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalars().all()
+
+    def _version_matches(self, expected_version: int | None) -> tuple:
+        if expected_version is None:
+            return ()
+
+        return (Wallet.version == expected_version,)
+
+    def _raise_for_missed_update(
+        self,
+        wallet_id: UUID,
+        expected_version: int | None,
+        error: type[Exception],
+    ):
+        # A conditional update matched no row. Tell a stale version apart
+        # from the update's own condition (missing wallet, low balance).
+        if expected_version is not None:
+            current_version = self.db.execute(
+                select(Wallet.version).where(Wallet.id == wallet_id)
+            ).scalar_one_or_none()
+
+            if current_version is not None and current_version != expected_version:
+                raise WalletVersionConflictError(current_version)
+
+        raise error()
+
+    def compare_and_swap(
+        self,
+        wallet_id: UUID,
+        expected_version: int,
+        **values,
+    ) -> Wallet:
+
+        # Applies values only if nobody updated the wallet since it was read
+        # at expected_version. No row lock is held between read and write.
+        stmt = (
+            update(Wallet)
+            .where(
+                Wallet.id == wallet_id,
+                Wallet.version == expected_version,
+            )
+            .values(**values, version=Wallet.version + 1)
+            .returning(Wallet)
+        )
+
+        wallet = self.db.execute(stmt).scalar_one_or_none()
+
+        if wallet is None:
+            self._raise_for_missed_update(wallet_id, expected_version, WalletNotFoundError)
+
+        return wallet
+
+    def update_wallet(
+        self,
+        wallet_id: UUID,
+        changes: Callable[[Wallet], dict],
+        attempts: int = db_settings.WALLET_UPDATE_ATTEMPTS,
+    ) -> Wallet:
+
+        # Read, compute the new values from what was read, compare-and-swap;
+        # on a conflict start over from a fresh read.
+        def attempt() -> Wallet:
+            wallet = self.db.execute(
+                select(Wallet)
+                .where(Wallet.id == wallet_id)
+                .execution_options(populate_existing=True)
+            ).scalar_one_or_none()
+
+            if wallet is None:
+                raise WalletNotFoundError()
+
+            return self.compare_and_swap(wallet.id, wallet.version, **changes(wallet))
+
+        return retry_on_conflict(self.db, attempt, attempts)
+
     def increase_balance(
         self,
         wallet_id: UUID,
         # user_id: UUID,
         amount: Decimal,
+        expected_version: int | None = None,
     ) -> Wallet:
 
         stmt = (
@@ -116,15 +270,19 @@ class WalletService:
             .where(
                 Wallet.id == wallet_id,
                 # Wallet.user_id == user_id,
+                *self._version_matches(expected_version),
+            )
+            .values(
+                balance=Wallet.balance + amount,
+                version=Wallet.version + 1,
             )
-            .values(balance=Wallet.balance + amount)
             .returning(Wallet)
         )
 
         wallet = self.db.execute(stmt).scalar_one_or_none()
 
         if wallet is None:
-            raise WalletNotFoundError()
+            self._raise_for_missed_update(wallet_id, expected_version, WalletNotFoundError)
 
         return wallet
 
@@ -133,6 +291,7 @@ class WalletService:
         wallet_id: UUID,
         # user_id: UUID,
         amount: Decimal,
+        expected_version: int | None = None,
     ) -> Wallet:
         
         # wallet_exists = self.db.execute(
@@ -146,14 +305,141 @@ class WalletService:
         #     raise WalletNotFoundError()
         
         # Wallet.balance >= amount means if the balance is $50, a withdrawal of $100 simply updates zero rows. So the opration is atomic.
+        # Held funds are excluded, so only the available balance can be spent.
         stmt = (
             update(Wallet)
             .where(
                 Wallet.id == wallet_id,
                 # Wallet.user_id == user_id,
+                Wallet.balance - Wallet.held_balance >= amount,
+                *self._version_matches(expected_version),
+            )
+            .values(
+                balance=Wallet.balance - amount,
+                version=Wallet.version + 1,
+            )
+            .returning(Wallet)
+        )
+
+        wallet = self.db.execute(stmt).scalar_one_or_none()
+
+        if wallet is None:
+            self._raise_for_missed_update(wallet_id, expected_version, InsufficientBalanceError)
+
+        return wallet
+
+    def apply_balance_changes(
+        self,
+        changes: list[tuple[UUID, Decimal]],
+    ) -> list[Wallet]:
+
+        # Every (wallet_id, amount) in one UPDATE ... FROM (VALUES ...).
+        # Debits keep the available-balance condition, so one that would
+        # overdraw its wallet matches no row and the whole set is refused.
+        # Callers lock the wallets first (lock_wallets).
+        legs = values(
+            column("id", PG_UUID(as_uuid=True)),
+            column("amount", Amount()),
+            name="legs",
+        ).data(changes)
+
+        wallets = self.db.execute(
+            update(Wallet)
+            .where(
+                Wallet.id == legs.c.id,
+                or_(
+                    legs.c.amount > 0,
+                    Wallet.balance - Wallet.held_balance >= -legs.c.amount,
+                ),
+            )
+            .values(
+                balance=Wallet.balance + legs.c.amount,
+                version=Wallet.version + 1,
+            )
+            .returning(Wallet)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        ).scalars().all()
+
+        if len(wallets) != len(changes):
+            raise InsufficientBalanceError()
+
+        return wallets
+
+    def reserve_balance(
+        self,
+        wallet_id: UUID,
+        amount: Decimal,
+    ) -> Wallet:
+
+        # Same conditional-update idea as decrease_balance, but the money
+        # moves from available to held instead of leaving the wallet.
+        stmt = (
+            update(Wallet)
+            .where(
+                Wallet.id == wallet_id,
+                Wallet.balance - Wallet.held_balance >= amount,
+            )
+            .values(
+                held_balance=Wallet.held_balance + amount,
+                version=Wallet.version + 1,
+            )
+            .returning(Wallet)
+        )
+
+        wallet = self.db.execute(stmt).scalar_one_or_none()
+
+        if wallet is None:
+            raise InsufficientBalanceError()
+
+        return wallet
+
+    def release_held_balance(
+        self,
+        wallet_id: UUID,
+        amount: Decimal,
+    ) -> Wallet:
+
+        stmt = (
+            update(Wallet)
+            .where(
+                Wallet.id == wallet_id,
+                Wallet.held_balance >= amount,
+            )
+            .values(
+                held_balance=Wallet.held_balance - amount,
+                version=Wallet.version + 1,
+            )
+            .returning(Wallet)
+        )
+
+        wallet = self.db.execute(stmt).scalar_one_or_none()
+
+        if wallet is None:
+            raise WalletNotFoundError()
+
+        return wallet
+
+    def capture_held_balance(
+        self,
+        wallet_id: UUID,
+        held_amount: Decimal,
+        amount: Decimal,
+    ) -> Wallet:
+
+        # Debit the captured amount and drop the whole hold in one statement;
+        # anything held but not captured goes back to available.
+        stmt = (
+            update(Wallet)
+            .where(
+                Wallet.id == wallet_id,
+                Wallet.held_balance >= held_amount,
                 Wallet.balance >= amount,
             )
-            .values(balance=Wallet.balance - amount)
+            .values(
+                balance=Wallet.balance - amount,
+                held_balance=Wallet.held_balance - held_amount,
+                version=Wallet.version + 1,
+            )
             .returning(Wallet)
         )
 
@@ -164,4 +450,109 @@ class WalletService:
 
         return wallet
 
-    
\ No newline at end of file
+    def update_spending_limits(
+        self,
+        wallet_id: UUID,
+        values: dict,
+    ) -> Wallet:
+
+        # A compare-and-swap on the wallet version, so a concurrent debit
+        # is never blocked behind a lock while limits change.
+        try:
+            wallet = self.update_wallet(wallet_id, lambda wallet: values)
+            self.db.commit()
+
+            return wallet
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def spending_limits(self, wallet: Wallet) -> dict[LimitPeriod, Decimal | None]:
+        tier = db_settings.SPENDING_LIMIT_TIERS.get(
+            wallet.limit_tier or db_settings.SPENDING_LIMIT_DEFAULT_TIER,
+            {},
+        )
+
+        return {
+            LimitPeriod.DAY: (
+                wallet.daily_limit
+                if wallet.daily_limit is not None
+                else tier.get(LimitPeriod.DAY.value)
+            ),
+            LimitPeriod.MONTH: (
+                wallet.monthly_limit
+                if wallet.monthly_limit is not None
+                else tier.get(LimitPeriod.MONTH.value)
+            ),
+        }
+
+    def consume_spending_limits(
+        self,
+        wallet: Wallet,
+        amount: Decimal,
+    ) -> None:
+
+        # Call this after the wallet's balance update, in the same
+        # transaction: the wallet row is locked by then, so bucket rows are
+        # always locked second and a rollback undoes both.
+        today = datetime.now(timezone.utc).date()
+
+        for period, limit in self.spending_limits(wallet).items():
+            if limit is None:
+                continue
+
+            if amount > limit:
+                raise SpendingLimitExceededError(period)
+
+            # Add to the window's counter only if it stays within the limit.
+            # A concurrent debit blocks on the row and then re-checks the
+            # condition against the updated total.
+            stmt = insert(WalletSpendBucket).values(
+                wallet_id=wallet.id,
+                period=period.value,
+                bucket_start=bucket_start(period, today),
+                spent=amount,
+            )
+            spent = self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["wallet_id", "period", "bucket_start"],
+                    set_={"spent": WalletSpendBucket.spent + stmt.excluded.spent},
+                    where=WalletSpendBucket.spent + stmt.excluded.spent <= limit,
+                )
+                .returning(WalletSpendBucket.spent)
+            ).scalar_one_or_none()
+
+            if spent is None:
+                raise SpendingLimitExceededError(period)
+
+    def get_spent(self, wallet_id: UUID) -> dict[LimitPeriod, Decimal]:
+        today = datetime.now(timezone.utc).date()
+        buckets = [(period.value, bucket_start(period, today)) for period in LimitPeriod]
+
+        rows = self.db.execute(
+            select(WalletSpendBucket.period, WalletSpendBucket.spent).where(
+                WalletSpendBucket.wallet_id == wallet_id,
+                tuple_(WalletSpendBucket.period, WalletSpendBucket.bucket_start).in_(buckets),
+            )
+        ).all()
+        spent = {LimitPeriod(period): amount for period, amount in rows}
+
+        return {period: spent.get(period, Decimal("0")) for period in LimitPeriod}
+
+    def get_limits(self, wallet: Wallet) -> WalletLimitsRead:
+        spent = self.get_spent(wallet.id)
+
+        return WalletLimitsRead(
+            wallet_id=wallet.id,
+            tier=wallet.limit_tier or db_settings.SPENDING_LIMIT_DEFAULT_TIER,
+            limits=[
+                SpendingLimitRead(
+                    period=period,
+                    limit=limit,
+                    spent=spent[period],
+                    remaining=None if limit is None else max(limit - spent[period], Decimal("0")),
+                )
+                for period, limit in self.spending_limits(wallet).items()
+            ],
+        )
@@ -4,17 +4,27 @@ from uuid import uuid4
 from fastapi import HTTPException, status
 import jwt
 
-from app.core.config import security_settings
+from app.core.config import db_settings, security_settings
+
+# Other tokens are signed with the same secret (FX quotes); the type claim
+# keeps them from being used as access tokens.
+ACCESS_TOKEN_TYPE = "access"
+
 
 def generate_access_token(
         data: dict,
-        expiry: timedelta = timedelta(seconds=111160)
+        expiry: timedelta = timedelta(minutes=db_settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 ):
+    now = datetime.now(timezone.utc)
     token = jwt.encode(
                 payload={
                     **data,
+                    "type": ACCESS_TOKEN_TYPE,
                     "jti": str(uuid4()),
-                    "exp": datetime.now(timezone.utc) + expiry
+                    # checked against the user's revocation watermark, so
+                    # keep sub-second precision
+                    "iat": now.timestamp(),
+                    "exp": now + expiry
                 },
                 algorithm=security_settings.JWT_ALGORITHM,
                 key=security_settings.JWT_SECRET,
@@ -24,7 +34,7 @@ def generate_access_token(
 # dict because payload is a dictionary
 def decode_access_token(token: str) -> dict | None:
     try:
-        return jwt.decode(
+        data = jwt.decode(
             jwt=token,
             algorithms=[security_settings.JWT_ALGORITHM],
             key=security_settings.JWT_SECRET,
@@ -39,4 +49,15 @@ def decode_access_token(token: str) -> dict | None:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+    # Tokens issued before the type claim existed have none; anything that
+    # says it is something else, or has no user, is not an access token.
+    if data.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE or "id" not in (data.get("user") or {}):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return data
@@ -0,0 +1,115 @@
+import argparse
+import logging
+
+from sqlalchemy import Numeric, text
+
+from app.db.base import Base
+from app.db.session import engine
+from app.db.types import AMOUNT_SCALE, MinorUnits
+from app.models import (  # noqa: F401 - every table with amount columns
+    archive,
+    hold,
+    ledger,
+    rollup,
+    scheduled_transfer,
+    spending_limit,
+    transaction,
+    transfer_review,
+    transfer_saga,
+    user,
+    wallet,
+)
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("minor_units", "numeric")
+
+
+def amount_columns() -> dict[str, list[tuple[str, int]]]:
+    # table -> [(column, precision)], from the models: whatever Amount()
+    # resolved to at import time, MinorUnits or NUMERIC(p, 2)
+    columns = {}
+
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, MinorUnits) or (
+                isinstance(column.type, Numeric) and column.type.scale == AMOUNT_SCALE
+            ):
+                columns.setdefault(table.name, []).append((column.name, column.type.precision))
+
+    return columns
+
+
+def conversion_statements(conn, target: str) -> list[str]:
+    current = {
+        (table, column): data_type
+        for table, column, data_type in conn.execute(text(
+            "SELECT table_name, column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema()"
+        ))
+    }
+    factor = 10 ** AMOUNT_SCALE
+    statements = []
+
+    for table, columns in amount_columns().items():
+        # Only columns not converted yet, so running it twice (or after a
+        # migration added a NUMERIC amount column) is safe.
+        if target == "minor_units":
+            changes = [
+                f"ALTER COLUMN {column} TYPE BIGINT USING round({column} * {factor})::bigint"
+                for column, _ in columns
+                if current.get((table, column)) == "numeric"
+            ]
+        else:
+            changes = [
+                f"ALTER COLUMN {column} TYPE NUMERIC({precision}, {AMOUNT_SCALE}) "
+                f"USING ({column}::numeric / {factor})"
+                for column, precision in columns
+                if current.get((table, column)) == "bigint"
+            ]
+
+        # One ALTER TABLE per table, so each table is rewritten once
+        if changes:
+            statements.append(f"ALTER TABLE {table} " + ", ".join(changes))
+
+    return statements
+
+
+def convert(target: str, dry_run: bool = False) -> list[str]:
+    # All tables in one transaction: the database is either fully converted
+    # or untouched. ALTER TYPE rewrites each table under an exclusive lock,
+    # so run it with the API and workers stopped.
+    with engine.begin() as conn:
+        statements = conversion_statements(conn, target)
+
+        if not dry_run:
+            for statement in statements:
+                logger.info("%s", statement)
+                conn.execute(text(statement))
+
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert amount columns between NUMERIC and BIGINT minor units.",
+    )
+    parser.add_argument("--to", choices=TARGETS, required=True)
+    parser.add_argument("--dry-run", action="store_true", help="Only print the statements.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    statements = convert(args.to, dry_run=args.dry_run)
+
+    for statement in statements if args.dry_run else ():
+        print(statement + ";")
+
+    if not statements:
+        print(f"Nothing to convert: amount columns are already {args.to}.")
+    elif not args.dry_run:
+        print(f"Converted {len(statements)} tables. Start the app with AMOUNT_STORAGE={args.to}.")
+
+
+if __name__ == "__main__":
+    main()
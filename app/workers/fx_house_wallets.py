@@ -0,0 +1,39 @@
+import argparse
+from uuid import UUID
+
+from app.core.config import db_settings
+from app.db.session import SessionLocal
+from app.models import ledger, transaction  # noqa: F401 - Wallet relationships need these mappers
+from app.schemas.wallet import Currency
+from app.services.sharding import create_fx_house_wallets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create the FX house wallets on every shard.")
+    parser.add_argument(
+        "--user-id",
+        type=UUID,
+        default=db_settings.FX_HOUSE_USER_ID,
+        help="House user (defaults to FX_HOUSE_USER_ID).",
+    )
+    parser.add_argument(
+        "--currencies",
+        nargs="+",
+        type=Currency,
+        help="Currencies to create house wallets for (defaults to all).",
+    )
+    args = parser.parse_args()
+
+    if args.user_id is None:
+        parser.error("--user-id or FX_HOUSE_USER_ID is required")
+
+    with SessionLocal() as db:
+        created = create_fx_house_wallets(db, args.user_id, currencies=args.currencies)
+        db.commit()
+
+    for shard, wallet_ids in created.items():
+        print(f"{shard}: {len(wallet_ids)} house wallets created")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import json
+import logging
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, Protocol
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import db_settings
+from app.db.session import SessionLocal
+from app.db.sharding import shard_map
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_event(event: OutboxEvent) -> dict:
+    return {
+        "id": str(event.id),
+        "event_type": event.event_type,
+        "aggregate_id": str(event.aggregate_id),
+        "payload": json.dumps(event.payload),
+        "created_at": event.created_at.isoformat(),
+    }
+
+
+class OutboxSink(Protocol):
+    def publish(self, events: list[dict]) -> None: ...
+
+
+class RedisStreamSink:
+    def __init__(
+        self,
+        stream: str = db_settings.OUTBOX_STREAM,
+        maxlen: int = db_settings.OUTBOX_STREAM_MAXLEN,
+    ):
+        self.stream = stream
+        self.maxlen = maxlen
+
+    def publish(self, events: list[dict]) -> None:
+        # Imported lazily so file/stub sinks work without a Redis server.
+        from app.db.redis_db import add_events_to_stream
+
+        add_events_to_stream(self.stream, events, maxlen=self.maxlen)
+
+
+class FileSink:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def publish(self, events: list[dict]) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.writelines(json.dumps(event) + "\n" for event in events)
+
+
+class StubSink:
+    # Keeps everything in memory; handy for local runs and tests.
+    def __init__(self):
+        self.events: list[dict] = []
+
+    def publish(self, events: list[dict]) -> None:
+        self.events.extend(events)
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        sink: OutboxSink,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = db_settings.OUTBOX_BATCH_SIZE,
+    ):
+        self.sink = sink
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    def relay_batch(self) -> int:
+        # Delivery is at-least-once: the batch is only acknowledged after the
+        # sink accepted it. If the sink (or this process) fails in between, the
+        # rows stay unpublished and the next run sends them again.
+        with self.session_factory() as db, db.begin():
+            # SKIP LOCKED lets several relays run side by side without
+            # waiting on (or double-sending) each other's batches.
+            events = db.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.published_at.is_(None))
+                .order_by(OutboxEvent.created_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+
+            if not events:
+                return 0
+
+            self.sink.publish([serialize_event(event) for event in events])
+
+            # Acknowledge the whole batch with a single UPDATE.
+            db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([event.id for event in events]))
+                .values(published_at=func.now())
+            )
+
+        return len(events)
+
+
+def run_forever(
+    relays: list[OutboxRelay],
+    poll_interval: float = db_settings.OUTBOX_POLL_INTERVAL_SECONDS,
+) -> None:
+    # One relay per shard, since events are written next to the change they
+    # describe. A failing shard only holds up its own events.
+    while True:
+        backlog = False
+
+        for relay in relays:
+            try:
+                relayed = relay.relay_batch()
+            except Exception:
+                logger.exception("Outbox relay batch failed")
+                relayed = 0
+
+            # A full batch means there is probably a backlog, so go again right away.
+            backlog = backlog or relayed >= relay.batch_size
+
+        if not backlog:
+            time.sleep(poll_interval)
+
+
+def build_sink(name: str, path: str | None = None) -> OutboxSink:
+    if name == "redis":
+        return RedisStreamSink()
+    if name == "file":
+        return FileSink(path or "outbox_events.jsonl")
+    if name == "stub":
+        return StubSink()
+
+    raise ValueError(f"Unknown outbox sink: {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Relay outbox events to a sink.")
+    parser.add_argument("--sink", choices=["redis", "file", "stub"], default="redis")
+    parser.add_argument("--path", help="Output file for the file sink.")
+    parser.add_argument("--batch-size", type=int, default=db_settings.OUTBOX_BATCH_SIZE)
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=db_settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    )
+    parser.add_argument("--once", action="store_true", help="Relay a single batch and exit.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    sink = build_sink(args.sink, args.path)
+    relays = [
+        OutboxRelay(
+            sink=sink,
+            session_factory=partial(shard_map.session, shard),
+            batch_size=args.batch_size,
+        )
+        for shard in shard_map.names
+    ]
+
+    if args.once:
+        logger.info("Relayed %d outbox events", sum(relay.relay_batch() for relay in relays))
+        return
+
+    run_forever(relays, poll_interval=args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
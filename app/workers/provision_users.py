@@ -0,0 +1,95 @@
+import argparse
+import csv
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic import ValidationError
+
+from app.core.config import db_settings
+from app.db.session import SessionLocal
+from app.models import ledger, transaction  # noqa: F401 - Wallet relationships need these mappers
+from app.schemas.auth import BulkProvisionRead, ProvisionUser
+from app.schemas.wallet import Currency
+from app.services.auth import AuthService
+from app.services.wallet import WalletService
+
+
+def read_users(f, report: BulkProvisionRead):
+    # CSV with a header row: email, and password or hashed_password
+    for row in csv.DictReader(f):
+        try:
+            yield ProvisionUser(
+                email=row["email"],
+                password=row.get("password") or None,
+                hashed_password=row.get("hashed_password") or None,
+            )
+        except ValidationError as e:
+            report.failed[row.get("email") or "<missing>"] = e.errors()[0]["msg"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-create users with their wallets.")
+    parser.add_argument("file", help="CSV file ('-' for stdin).")
+    parser.add_argument("--chunk-size", type=int, default=db_settings.PROVISION_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=db_settings.PROVISION_HASH_WORKERS)
+    parser.add_argument(
+        "--currencies",
+        nargs="+",
+        type=Currency,
+        help="Wallet currencies to create (defaults to DEFAULT_WALLET_CURRENCIES).",
+    )
+    parser.add_argument("--report", help="Write duplicates and failures to this JSON file.")
+    args = parser.parse_args()
+
+    report = BulkProvisionRead()
+    # Read a few chunks at a time so millions of rows never sit in memory
+    block_size = args.chunk_size * 10
+
+    with (
+        open(args.file, encoding="utf-8", newline="") if args.file != "-" else sys.stdin as f,
+        ProcessPoolExecutor(max_workers=args.workers) as executor,
+        SessionLocal() as db,
+    ):
+        service = AuthService(db, wallet_service=WalletService(db))
+        block = []
+
+        for user in read_users(f, report):
+            block.append(user)
+
+            if len(block) < block_size:
+                continue
+
+            _merge(report, service.bulk_create_users_with_wallets(
+                block,
+                currencies=args.currencies,
+                chunk_size=args.chunk_size,
+                executor=executor,
+            ))
+            print(f"Created {report.created} users so far", file=sys.stderr)
+            block = []
+
+        if block:
+            _merge(report, service.bulk_create_users_with_wallets(
+                block,
+                currencies=args.currencies,
+                chunk_size=args.chunk_size,
+                executor=executor,
+            ))
+
+    print(f"Created:    {report.created}")
+    print(f"Duplicates: {len(report.duplicates)}")
+    print(f"Failed:     {len(report.failed)}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report.model_dump_json(indent=2))
+
+
+def _merge(report: BulkProvisionRead, chunk_report: BulkProvisionRead) -> None:
+    report.created += chunk_report.created
+    report.duplicates.extend(chunk_report.duplicates)
+    report.failed.update(chunk_report.failed)
+
+
+if __name__ == "__main__":
+    main()
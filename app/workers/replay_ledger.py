@@ -0,0 +1,106 @@
+import argparse
+import csv
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.core.config import db_settings
+from app.models import transaction, user  # noqa: F401 - Wallet and LedgerEntry relationships need these mappers
+from app.services.replay import REPORT_COLUMNS, ReplayResult, replay_partition
+
+logger = logging.getLogger(__name__)
+
+
+def replay(
+    partitions: int,
+    workers: int,
+    fix: bool,
+    report: str | None,
+    batch_size: int,
+    fetch_size: int,
+) -> list[ReplayResult]:
+
+    part_paths = [f"{report}.part{partition:05d}" if report else None for partition in range(partitions)]
+    results = []
+
+    # More partitions than workers, so a slow partition doesn't leave the
+    # other cores idle at the end.
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                replay_partition,
+                partition,
+                partitions,
+                fix=fix,
+                report_path=part_paths[partition],
+                batch_size=batch_size,
+                fetch_size=fetch_size,
+            )
+            for partition in range(partitions)
+        ]
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            logger.info(
+                "Partition %d/%d: %d wallets, %d entries, %d mismatched",
+                len(results),
+                partitions,
+                result.wallets,
+                result.entries,
+                result.mismatched,
+            )
+
+    if report:
+        # Partitions are id ranges, so concatenating them in order gives a
+        # report sorted by wallet id, the same on every run.
+        with open(report, "w", newline="") as f:
+            csv.writer(f).writerow(REPORT_COLUMNS)
+
+            for path in part_paths:
+                with open(path, newline="") as part:
+                    shutil.copyfileobj(part, f)
+                os.remove(path)
+
+    return sorted(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild wallet balances from the ledger (archived carry-forward + entries).",
+    )
+    parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="Write the ledger balance to wallets that disagree (default: only report).",
+    )
+    parser.add_argument("--report", help="Write mismatched wallets to this CSV file.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--partitions", type=int, help="Wallet-id partitions (default: 4 per worker).")
+    parser.add_argument("--batch-size", type=int, default=db_settings.REPLAY_BATCH_SIZE)
+    parser.add_argument("--fetch-size", type=int, default=db_settings.REPLAY_FETCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = replay(
+        partitions=args.partitions or args.workers * 4,
+        workers=args.workers,
+        fix=args.fix,
+        report=args.report,
+        batch_size=args.batch_size,
+        fetch_size=args.fetch_size,
+    )
+
+    print(f"Wallets:    {sum(result.wallets for result in results)}")
+    print(f"Entries:    {sum(result.entries for result in results)}")
+    print(f"Mismatched: {sum(result.mismatched for result in results)}")
+
+    if args.fix:
+        print(f"Fixed:      {sum(result.fixed for result in results)}")
+        print(f"Skipped (changed during replay, run again): {sum(result.skipped for result in results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import sys
+from uuid import UUID
+
+from app.db.session import SessionLocal
+from app.services.transaction import TransactionService
+from app.services.wallet import WalletService
+
+
+def read_transaction_ids(path: str | None, ids: list[str]) -> list[UUID]:
+    values = list(ids)
+
+    if path:
+        with open(path, encoding="utf-8") if path != "-" else sys.stdin as f:
+            values.extend(line.strip() for line in f)
+
+    return [UUID(value) for value in values if value]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Reverse completed transactions with compensating entries.",
+    )
+    parser.add_argument("transaction_ids", nargs="*", help="Transaction ids to reverse.")
+    parser.add_argument("--file", help="File with one transaction id per line ('-' for stdin).")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    transaction_ids = read_transaction_ids(args.file, args.transaction_ids)
+
+    with SessionLocal() as db:
+        service = TransactionService(db=db, wallet_service=WalletService(db))
+        report = service.reverse_many(transaction_ids, batch_size=args.batch_size)
+
+    print(f"Reversed: {len(report.reversed)}")
+    print(f"Failed:   {len(report.failed)}")
+
+    for transaction_id, reason in report.failed.items():
+        print(f"  {transaction_id}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import logging
+import random
+import time
+
+from app.core.config import db_settings
+from app.db.sharding import shard_map
+from app.services.scheduled_transfer import ScheduledTransferService
+from app.services.transaction import TransactionService
+from app.services.wallet import WalletService
+
+logger = logging.getLogger(__name__)
+
+
+def run_due(batch_size: int) -> int:
+    # Schedules live on their owner's home shard, so every shard is visited
+    # in turn. One shard being down only holds up its own schedules.
+    total = 0
+
+    for shard in shard_map.names:
+        try:
+            with shard_map.session(shard) as db:
+                service = ScheduledTransferService(
+                    db=db,
+                    transaction_service=TransactionService(
+                        db=db,
+                        wallet_service=WalletService(db),
+                    ),
+                )
+
+                # Keep pulling while batches come back full
+                while True:
+                    ran = service.run_due(batch_size=batch_size)
+                    total += ran
+
+                    if ran < batch_size:
+                        break
+        except Exception:
+            logger.exception("Scheduler run on shard %s failed", shard)
+
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Execute due scheduled transfers.")
+    parser.add_argument("--batch-size", type=int, default=db_settings.SCHEDULER_BATCH_SIZE)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=db_settings.SCHEDULER_POLL_INTERVAL_SECONDS,
+    )
+    parser.add_argument("--once", action="store_true", help="Run due jobs once and exit.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    while True:
+        try:
+            ran = run_due(args.batch_size)
+            if ran:
+                logger.info("Ran %d scheduled transfers", ran)
+        except Exception:
+            logger.exception("Scheduler run failed")
+
+        if args.once:
+            return
+
+        # Jitter so idle workers don't all poll the index in lockstep
+        time.sleep(args.interval * random.uniform(0.5, 1.5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import logging
+import time
+
+from app.core.config import db_settings
+from app.db.sharding import shard_map
+from app.schemas.transaction import SagaStatus
+from app.services.sharding import resume_sagas
+
+logger = logging.getLogger(__name__)
+
+
+def resume(retry_after_seconds: int, batch_size: int) -> dict[SagaStatus, int]:
+    # Sagas live on their source shard, so every shard is visited in turn.
+    # One shard being down only holds up its own sagas.
+    totals = {status: 0 for status in SagaStatus}
+
+    for shard in shard_map.names:
+        try:
+            with shard_map.session(shard) as db:
+                outcomes = resume_sagas(
+                    db,
+                    retry_after_seconds=retry_after_seconds,
+                    batch_size=batch_size,
+                )
+        except Exception:
+            logger.exception("Resuming transfer sagas on shard %s failed", shard)
+            continue
+
+        for status, count in outcomes.items():
+            totals[status] += count
+
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Finish or compensate stalled cross-shard transfers.")
+    parser.add_argument("--batch-size", type=int, default=db_settings.SAGA_BATCH_SIZE)
+    parser.add_argument(
+        "--retry-after",
+        type=int,
+        default=db_settings.SAGA_RETRY_AFTER_SECONDS,
+        help="Seconds a saga must have been idle before it is retried.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=db_settings.SAGA_RETRY_AFTER_SECONDS,
+    )
+    parser.add_argument("--once", action="store_true", help="Run once and exit.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    while True:
+        totals = resume(args.retry_after, args.batch_size)
+        if totals[SagaStatus.COMPLETED] or totals[SagaStatus.COMPENSATED]:
+            logger.info(
+                "Transfer sagas: %d completed, %d compensated, %d still pending",
+                totals[SagaStatus.COMPLETED],
+                totals[SagaStatus.COMPENSATED],
+                totals[SagaStatus.PENDING],
+            )
+
+        if args.once:
+            return
+
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Latency and memory of a history page: the TypeAdapter path against the
+# lean row path (RecentTransactionRow), from driver output to JSON bytes.
+#
+#   python -m benchmarks.history_rows [--rows 100] [--number 2000]
+#   python -m benchmarks.history_rows --wallet-id <uuid>   # against DATABASE_URL
+#
+# Without --wallet-id the rows are synthetic, shaped like what psycopg2
+# hands over: the TypeAdapter path turns text ids and numerics into UUID
+# and Decimal objects (as the SQLAlchemy result processors do), the lean
+# path keeps the ids as text and reads amounts as integer cents. With
+# --wallet-id both service methods run against the real database.
+
+import argparse
+import timeit
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.api.responses import ORJSONModelResponse
+from app.schemas.transaction import (
+    RecentTransactionListAdapter,
+    RecentTransactionRow,
+    RecentTransactionsRead,
+    format_minor_units,
+)
+
+
+def wire_rows(count: int) -> list[tuple]:
+    wallet_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+
+    return [
+        (
+            str(uuid.uuid4()),
+            "transfer" if i % 3 else "deposit",
+            "completed",
+            i * 100 + 25,
+            wallet_id,
+            f"ref-{i}" if i % 2 else None,
+            now - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def adapter_page(rows: list[tuple]) -> bytes:
+    transactions = RecentTransactionListAdapter.validate_python([
+        {
+            "transaction_id": uuid.UUID(transaction_id),
+            "type": transaction_type,
+            "status": status,
+            "amount": Decimal(cents) / 100,
+            "wallet_id": uuid.UUID(wallet_id),
+            "reference": reference,
+            "created_at": created_at,
+        }
+        for transaction_id, transaction_type, status, cents, wallet_id, reference, created_at in rows
+    ])
+
+    return ORJSONModelResponse(
+        RecentTransactionsRead.model_construct(transactions=transactions, currency="USD")
+    ).body
+
+
+def lean_page(rows: list[tuple]) -> bytes:
+    transactions = [
+        RecentTransactionRow(
+            transaction_type,
+            status,
+            reference,
+            created_at,
+            transaction_id,
+            wallet_id,
+            format_minor_units(cents),
+        )
+        for transaction_id, transaction_type, status, cents, wallet_id, reference, created_at in rows
+    ]
+
+    return ORJSONModelResponse({"currency": "USD", "transactions": transactions}).body
+
+
+def db_pages(wallet_id: uuid.UUID, limit: int):
+    from app.db.session import SessionLocal
+    from app.models import user  # noqa: F401 - Wallet.user needs the User mapper
+    from app.services.transaction import TransactionService
+    from app.services.wallet import WalletService
+
+    db = SessionLocal()
+    service = TransactionService(db, wallet_service=WalletService(db))
+
+    def adapter() -> bytes:
+        transactions = service.get_recent_transactions(wallet_id=wallet_id, limit=limit)
+        return ORJSONModelResponse(
+            RecentTransactionsRead.model_construct(transactions=transactions, currency="USD")
+        ).body
+
+    def lean() -> bytes:
+        transactions = service.get_recent_transaction_rows(wallet_id=wallet_id, limit=limit)
+        return ORJSONModelResponse({"currency": "USD", "transactions": transactions}).body
+
+    return adapter, lean
+
+
+def peak_kib(render) -> float:
+    # Peak Python memory for one page, the rendered body included
+    tracemalloc.start()
+    render()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the history page read paths.")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--wallet-id", type=uuid.UUID, help="Read this wallet's history from the database")
+    args = parser.parse_args()
+
+    if args.wallet_id is not None:
+        adapter, lean = db_pages(args.wallet_id, args.rows)
+        source = f"wallet {args.wallet_id}"
+    else:
+        rows = wire_rows(args.rows)
+        adapter, lean = (lambda: adapter_page(rows)), (lambda: lean_page(rows))
+        source = "synthetic rows"
+
+    assert adapter() == lean(), "the two paths must render the same JSON"
+
+    results = {}
+    for name, render in (("TypeAdapter", adapter), ("lean rows", lean)):
+        render()
+        us = timeit.timeit(render, number=args.number) / args.number * 1e6
+        results[name] = (us, peak_kib(render))
+
+    print(f"{args.rows}-row history page, {source}, {args.number} iterations")
+    for name, (us, kib) in results.items():
+        print(f"  {name:<12} {us:8.1f} us/page   peak {kib:7.1f} KiB")
+
+    (old_us, old_kib), (new_us, new_kib) = results.values()
+    print(f"  {old_us / new_us:.1f}x faster, {old_kib / new_kib:.1f}x less peak memory")
+
+
+if __name__ == "__main__":
+    main()
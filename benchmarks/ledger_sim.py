@@ -0,0 +1,172 @@
+# Capacity simulation on the in-memory ledger (app.services.memory_ledger).
+#
+#   python -m benchmarks.ledger_sim [--ops 1000000] [--wallets 100000] [--skew 1.1] [--threads 1]
+#   python -m benchmarks.ledger_sim --replay [--limit 1000000]
+#
+# Synthetic mode generates deposits, withdrawals, transfers and journals
+# between wallets picked with a Zipf-like skew (a few hot merchant wallets,
+# a long tail of quiet ones) and runs them through the same rules as the
+# API: conditional debits, all-or-nothing, legs netting to zero.
+# --replay reads the real ledger from DATABASE_URL instead and re-applies
+# every transaction in commit order, starting from the archived
+# carry-forward balances. Either way it reports throughput, rejections by
+# reason and whether balances still agree with the ledger at the end.
+
+import argparse
+import itertools
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from app.schemas.transaction import TransactionType
+from app.services.memory_ledger import MemoryLedger
+
+DEFAULT_MIX = "transfer=0.7,deposit=0.15,withdraw=0.1,journal=0.05"
+
+
+def synthetic_ops(ledger: MemoryLedger, ops: int, skew: float, mix: dict[str, float]) -> list:
+    wallets = len(ledger.wallets)
+    weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(wallets)))
+    order = random.sample(range(wallets), wallets)
+    kinds = random.choices(list(mix), weights=list(mix.values()), k=ops)
+
+    def pick(k: int) -> list[int]:
+        return [order[i] for i in random.choices(range(wallets), cum_weights=weights, k=k)]
+
+    generated = []
+
+    for kind in kinds:
+        cents = random.randint(100, 20_000)
+
+        if kind == "deposit":
+            generated.append((TransactionType.DEPOSIT, [(pick(1)[0], cents * 5)]))
+        elif kind == "withdraw":
+            generated.append((TransactionType.WITHDRAWAL, [(pick(1)[0], -cents)]))
+        elif kind == "transfer":
+            source, destination = pick(2)
+            if source != destination:
+                generated.append((TransactionType.TRANSFER, [(source, -cents), (destination, cents)]))
+        else:
+            payer, *payees = dict.fromkeys(pick(4))
+            if payees:
+                legs = [(payee, cents) for payee in payees]
+                generated.append((TransactionType.JOURNAL, [(payer, -cents * len(payees)), *legs]))
+
+    return generated
+
+
+def replay_ops(ledger: MemoryLedger, limit: int | None) -> list:
+    from sqlalchemy import func, select
+
+    from app.db.session import SessionLocal
+    from app.models import user  # noqa: F401 - Wallet.user needs the User mapper
+    from app.models.archive import WalletArchiveBalance
+    from app.models.ledger import LedgerEntry
+    from app.models.transaction import Transaction
+    from app.models.wallet import Wallet
+    from app.services.memory_ledger import to_cents
+
+    indexes = {}
+    generated = []
+
+    with SessionLocal() as db:
+        for wallet_id, user_id, currency, carried in db.execute(
+            select(Wallet.id, Wallet.user_id, Wallet.currency, func.coalesce(WalletArchiveBalance.carried_balance, 0))
+            .outerjoin(WalletArchiveBalance, WalletArchiveBalance.wallet_id == Wallet.id)
+        ):
+            index = indexes[wallet_id] = ledger.create_wallet(user_id, currency).index
+            if carried:
+                ledger.post_cents(TransactionType.DEPOSIT, [(index, to_cents(carried))])
+
+        stmt = (
+            select(Transaction.id, Transaction.type, LedgerEntry.wallet_id, LedgerEntry.amount)
+            .join(LedgerEntry, LedgerEntry.transaction_id == Transaction.id)
+            .order_by(Transaction.created_at, Transaction.id)
+        )
+        rows = db.execute(stmt.execution_options(yield_per=10_000))
+
+        for _, group in itertools.groupby(rows, key=lambda row: row.id):
+            group = list(group)
+            legs = [(indexes[row.wallet_id], to_cents(row.amount)) for row in group]
+            generated.append((TransactionType(group[0].type), legs))
+
+            if limit is not None and len(generated) >= limit:
+                break
+
+    return generated
+
+
+def run(ledger: MemoryLedger, ops: list, threads: int) -> Counter:
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def worker(chunk) -> None:
+        local = Counter()
+        post = ledger.post_cents
+
+        for transaction_type, legs in chunk:
+            try:
+                post(transaction_type, legs)
+            except Exception as e:
+                local[type(e).__name__] += 1
+            else:
+                local["ok"] += 1
+
+        with lock:
+            outcomes.update(local)
+
+    workers = [threading.Thread(target=worker, args=(ops[i::threads],)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    return outcomes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate ledger traffic on the in-memory engine.")
+    parser.add_argument("--ops", type=int, default=1_000_000)
+    parser.add_argument("--wallets", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of wallet popularity")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Share of each operation")
+    parser.add_argument("--opening-balance", type=int, default=10_000, help="In cents, per wallet")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--replay", action="store_true", help="Replay the ledger in DATABASE_URL")
+    parser.add_argument("--limit", type=int, help="Replay at most this many transactions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    ledger = MemoryLedger()
+
+    if args.replay:
+        ops = replay_ops(ledger, args.limit)
+    else:
+        for _ in range(args.wallets):
+            wallet = ledger.create_wallet(uuid.uuid4(), "USD")
+            if args.opening_balance:
+                ledger.post_cents(TransactionType.DEPOSIT, [(wallet.index, args.opening_balance)])
+
+        mix = {kind: float(share) for kind, share in (item.split("=") for item in args.mix.split(","))}
+        ops = synthetic_ops(ledger, args.ops, args.skew, mix)
+
+    started = time.perf_counter()
+    outcomes = run(ledger, ops, args.threads)
+    elapsed = time.perf_counter() - started
+
+    problems = ledger.check_integrity()
+
+    print(f"Operations: {len(ops):,} on {len(ledger.wallets):,} wallets, {args.threads} thread(s)")
+    print(f"Elapsed:    {elapsed:.2f} s ({len(ops) / elapsed:,.0f} ops/s)")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<28} {count:>12,}")
+    print(f"Integrity:  {'ok' if not problems else f'{len(problems)} problems'}")
+    for problem in problems[:10]:
+        print(f"  {problem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# NUMERIC amounts against BIGINT minor units (AMOUNT_STORAGE=minor_units).
+#
+#   python -m benchmarks.minor_units [--entries 1000000] [--wallets 10000]
+#
+# Fills a temporary table with the same ledger amounts in both forms and
+# times the three places the representation shows:
+#   aggregation     SUM(amount) per wallet in Postgres (rollups, archival)
+#   reconciliation  streaming every entry to Python and adding it up per
+#                   wallet, as the ledger replay does (driver conversion included)
+#   serialization   fetching a page of amounts and rendering them as JSON
+#                   decimal strings: Decimal from the driver vs integer cents
+#                   through format_minor_units
+# Needs DATABASE_URL; nothing is written outside the temporary table.
+
+import argparse
+import time
+from decimal import Decimal
+
+import orjson
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.schemas.transaction import format_minor_units
+
+
+def timed(run, repeat: int = 3) -> float:
+    best = float("inf")
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+
+    return best
+
+
+def reconcile(conn, column: str) -> dict:
+    balances = {}
+    result = conn.execution_options(stream_results=True, yield_per=10_000).execute(
+        text(f"SELECT wallet_id, {column} FROM bench_amounts ORDER BY wallet_id")
+    )
+
+    for wallet_id, amount in result:
+        balances[wallet_id] = balances.get(wallet_id, 0) + amount
+
+    return balances
+
+
+def _decimal_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark NUMERIC vs BIGINT minor-unit amounts.")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--wallets", type=int, default=10_000)
+    parser.add_argument("--serialize", type=int, default=100_000, help="Amounts rendered to JSON")
+    args = parser.parse_args()
+
+    results = {}
+
+    with engine.connect() as conn:
+        conn.execute(text(
+            "CREATE TEMPORARY TABLE bench_amounts AS "
+            "SELECT (i % :wallets) AS wallet_id, "
+            "       round((random() * 2000 - 1000)::numeric, 2)::numeric(18, 2) AS amount "
+            "FROM generate_series(1, :entries) AS i"
+        ), {"wallets": args.wallets, "entries": args.entries})
+        conn.execute(text("ALTER TABLE bench_amounts ADD COLUMN amount_minor BIGINT"))
+        conn.execute(text("UPDATE bench_amounts SET amount_minor = round(amount * 100)::bigint"))
+        conn.execute(text("ANALYZE bench_amounts"))
+
+        for label, column in (("numeric", "amount"), ("minor units", "amount_minor")):
+            results[("aggregation", label)] = timed(lambda: conn.execute(text(
+                f"SELECT wallet_id, sum({column}) FROM bench_amounts GROUP BY wallet_id"
+            )).all())
+            results[("reconciliation", label)] = timed(lambda: reconcile(conn, column), repeat=1)
+
+        # Same totals either way
+        numeric = reconcile(conn, "amount")
+        minor = reconcile(conn, "amount_minor")
+        assert all(numeric[w] * 100 == minor[w] for w in numeric)
+
+        page = text("SELECT amount, amount_minor FROM bench_amounts LIMIT :n")
+        amounts = conn.execute(page, {"n": args.serialize}).all()
+        assert [str(d) for d, _ in amounts] == [format_minor_units(c) for _, c in amounts]
+
+        decimal_page = text("SELECT amount FROM bench_amounts LIMIT :n")
+        cents_page = text("SELECT amount_minor FROM bench_amounts LIMIT :n")
+        results[("serialization", "numeric")] = timed(lambda: orjson.dumps(
+            conn.execute(decimal_page, {"n": args.serialize}).scalars().all(), default=_decimal_default
+        ))
+        results[("serialization", "minor units")] = timed(lambda: orjson.dumps([
+            format_minor_units(c) for c in conn.execute(cents_page, {"n": args.serialize}).scalars()
+        ]))
+
+    print(f"{args.entries:,} entries over {args.wallets:,} wallets; {len(amounts):,} amounts serialized")
+    for stage in ("aggregation", "reconciliation", "serialization"):
+        old, new = results[(stage, "numeric")], results[(stage, "minor units")]
+        print(f"  {stage:<15} numeric {old * 1000:9.1f} ms   minor units {new * 1000:9.1f} ms   {old / new:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Throughput of `python -m app.server` with 1, 2, 4 and 8 workers.
+#
+#   python -m benchmarks.server_workers [--duration 10] [--concurrency 64]
+#
+# Needs PostgreSQL and Redis like the API itself. Each run starts a fresh
+# server, signs up a user and then hammers GET /wallet/transactions (auth,
+# one indexed query, serialization) from a pool of client threads.
+# The load generator shares the machine with the server, so run it on a box
+# with more cores than the largest worker count for meaningful numbers.
+
+import argparse
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import httpx
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def wait_until_up(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/openapi.json", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+
+    raise RuntimeError("Server did not start")
+
+
+def login(base_url: str) -> dict:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    credentials = {"email": email, "password": "Bench1234"}
+
+    httpx.post(f"{base_url}/auth/signup", json=credentials).raise_for_status()
+    response = httpx.post(
+        f"{base_url}/auth/login",
+        data={"username": email, "password": credentials["password"]},
+    )
+    response.raise_for_status()
+
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def hammer(base_url: str, headers: dict, duration: float, concurrency: int) -> tuple[int, int]:
+    ok = 0
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client() -> None:
+        nonlocal ok, errors
+        done = failed = 0
+
+        with httpx.Client(base_url=base_url, headers=headers, timeout=30) as http:
+            while time.monotonic() < stop_at:
+                try:
+                    response = http.get("/wallet/transactions")
+                    if response.status_code == 200:
+                        done += 1
+                    else:
+                        failed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+        with lock:
+            ok += done
+            errors += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return ok, errors
+
+
+def run(workers: int, port: int, duration: float, concurrency: int) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "app.server",
+            "--workers", str(workers),
+            "--port", str(port),
+            "--log-level", "warning",
+            "--preload",
+        ],
+    )
+
+    try:
+        wait_until_up(base_url)
+        headers = login(base_url)
+
+        # Warm up every worker's connection pools before measuring
+        hammer(base_url, headers, duration=1, concurrency=concurrency)
+        ok, errors = hammer(base_url, headers, duration, concurrency)
+
+        print(f"  {workers} worker(s): {ok / duration:8.1f} req/s  ({errors} errors)")
+
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark API throughput per worker count.")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, nargs="+", default=WORKER_COUNTS)
+    args = parser.parse_args()
+
+    print(f"GET /wallet/transactions, {args.concurrency} clients, {args.duration:.0f}s per run")
+
+    for workers in args.workers:
+        run(workers, args.port, args.duration, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
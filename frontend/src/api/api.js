@@ -22,6 +22,47 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Access tokens are short-lived: on a 401, swap the refresh token for a new
+// pair once and retry the original request.
+let refreshPromise = null;
+
+async function refreshTokens() {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) throw new Error('No refresh token');
+
+  const response = await axios.post(`${API_BASE_URL}/auth/refresh`, {
+    refresh_token: refreshToken,
+  });
+  localStorage.setItem('token', response.data.access_token);
+  localStorage.setItem('refresh_token', response.data.refresh_token);
+  return response.data.access_token;
+}
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    if (
+      error.response?.status === 401 &&
+      original &&
+      !original._retried &&
+      !original.url?.startsWith('/auth/')
+    ) {
+      original._retried = true;
+      try {
+        // Concurrent 401s share one refresh, since each refresh token works once
+        refreshPromise = refreshPromise || refreshTokens().finally(() => { refreshPromise = null; });
+        const accessToken = await refreshPromise;
+        original.headers.Authorization = `Bearer ${accessToken}`;
+        return api(original);
+      } catch {
+        // fall through to the normal error handling
+      }
+    }
+    return Promise.reject(error);
+  }
+);
+
 // Response interceptor to format backend error messages cleanly
 api.interceptors.response.use(
   (response) => response,
@@ -61,7 +102,7 @@ export async function loginApi(email, password) {
       'Content-Type': 'application/x-www-form-urlencoded',
     },
   });
-  return response.data; // { access_token, type }
+  return response.data; // { access_token, refresh_token, type, expires_in }
 }
 
 export async function registerApi(email, password) {
@@ -44,6 +44,7 @@ export function AuthProvider({ children }) {
     const accessToken = data.access_token;
     
     localStorage.setItem('token', accessToken);
+    localStorage.setItem('refresh_token', data.refresh_token);
     setToken(accessToken);
     
     const decoded = decodeJwt(accessToken);
@@ -60,6 +61,7 @@ export function AuthProvider({ children }) {
 
   const handleLogoutLocally = () => {
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     setToken(null);
     setUser(null);
   };
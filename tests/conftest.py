@@ -0,0 +1,232 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import delete, event, or_, select, union, update
+from sqlalchemy.exc import OperationalError
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.db.sharding import ShardMap, shard_map
+from app.models import (  # noqa: F401 - delete_users needs every table
+    archive,
+    hold,
+    ledger,
+    outbox,
+    refresh_token,
+    scheduled_transfer,
+    spending_limit,
+    transaction,
+    transfer_review,
+    transfer_saga,
+    wallet,
+    wallet_shard,
+)
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    # These tests need the real PostgreSQL database (alembic upgrade head)
+    session = SessionLocal()
+
+    try:
+        session.connection()
+    except OperationalError:
+        session.close()
+        pytest.skip("PostgreSQL is not available")
+
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def delete_users(db, user_ids: list) -> None:
+    # Everything the tests commit hangs off a user: their wallets, the
+    # transactions touching those wallets (and reversals of them), hot or
+    # archived, holds, schedules, reviews, sagas, outbox events. Test users only move money
+    # between each other, so no other wallet's ledger is touched.
+    tables = Base.metadata.tables
+    wallets, entries, transactions = tables["wallets"], tables["ledger_entries"], tables["transactions"]
+    holds, reviews, sagas = tables["holds"], tables["transfer_reviews"], tables["transfer_sagas"]
+
+    wallet_ids = db.execute(select(wallets.c.id).where(wallets.c.user_id.in_(user_ids))).scalars().all()
+    transaction_ids = set(db.execute(union(
+        select(entries.c.transaction_id).where(entries.c.wallet_id.in_(wallet_ids)),
+        select(holds.c.transaction_id).where(holds.c.wallet_id.in_(wallet_ids)),
+        select(reviews.c.transaction_id).where(reviews.c.source_wallet_id.in_(wallet_ids)),
+        select(sagas.c.transaction_id).where(sagas.c.source_wallet_id.in_(wallet_ids)),
+    )).scalars())
+    transaction_ids.update(db.execute(
+        select(transactions.c.id).where(transactions.c.reversal_of_id.in_(transaction_ids))
+    ).scalars())
+    transaction_ids = list(transaction_ids)
+
+    archived_entries, archived_transactions = tables["archived_ledger_entries"], tables["archived_transactions"]
+    archived_ids = db.execute(
+        delete(archived_entries)
+        .where(archived_entries.c.wallet_id.in_(wallet_ids))
+        .returning(archived_entries.c.transaction_id)
+    ).scalars().all()
+    db.execute(delete(archived_transactions).where(archived_transactions.c.id.in_(archived_ids)))
+
+    schedules = tables["scheduled_transfers"]
+    outbox = tables["outbox_events"]
+
+    db.execute(update(transactions).where(transactions.c.id.in_(transaction_ids)).values(reversal_of_id=None))
+
+    # Children first, in foreign key order
+    for table, condition in (
+        (sagas, or_(sagas.c.transaction_id.in_(transaction_ids), sagas.c.source_wallet_id.in_(wallet_ids))),
+        (reviews, or_(reviews.c.transaction_id.in_(transaction_ids), reviews.c.reviewed_by.in_(user_ids))),
+        (holds, or_(holds.c.transaction_id.in_(transaction_ids), holds.c.wallet_id.in_(wallet_ids))),
+        (entries, or_(entries.c.transaction_id.in_(transaction_ids), entries.c.wallet_id.in_(wallet_ids))),
+        (transactions, transactions.c.id.in_(transaction_ids)),
+        (outbox, outbox.c.aggregate_id.in_([*transaction_ids, *archived_ids, *wallet_ids, *user_ids])),
+        (schedules, or_(schedules.c.user_id.in_(user_ids), schedules.c.destination_wallet_id.in_(wallet_ids))),
+        (tables["wallet_spend_buckets"], tables["wallet_spend_buckets"].c.wallet_id.in_(wallet_ids)),
+        (tables["wallet_archive_balances"], tables["wallet_archive_balances"].c.wallet_id.in_(wallet_ids)),
+        # On the catalog, the directory also lists wallets living on other shards
+        (tables["wallet_shards"], or_(
+            tables["wallet_shards"].c.wallet_id.in_(wallet_ids),
+            tables["wallet_shards"].c.user_id.in_(user_ids),
+        )),
+    ):
+        db.execute(delete(table).where(condition))
+
+    db.execute(delete(wallets).where(wallets.c.id.in_(wallet_ids)))
+    db.execute(delete(tables["refresh_tokens"]).where(tables["refresh_tokens"].c.user_id.in_(user_ids)))
+    db.execute(delete(tables["users"]).where(tables["users"].c.id.in_(user_ids)))
+
+
+@pytest.fixture
+def created_users():
+    # Tests that need committed data (the API, concurrent sessions) add the
+    # users they create here; they are deleted with everything they own on
+    # every shard afterwards, so runs don't pile up rows in the database.
+    user_ids = []
+
+    yield user_ids
+
+    if not user_ids:
+        return
+
+    for shard in shard_map.names:
+        with shard_map.session(shard) as session:
+            delete_users(session, user_ids)
+            session.commit()
+
+
+@pytest.fixture
+def two_shards(db, created_users):
+    # Cross-shard tests need a second migrated database, e.g.
+    # TEST_SHARD_DATABASE_URL=postgresql://.../ledger_s1. DATABASE_URL is
+    # main (and the catalog), the second database is shard "s1".
+    url = os.environ.get("TEST_SHARD_DATABASE_URL")
+
+    if not url:
+        pytest.skip("TEST_SHARD_DATABASE_URL is not set")
+
+    shards = ShardMap({"s1": url})
+
+    try:
+        with shards.session("s1") as session:
+            session.connection()
+    except OperationalError:
+        pytest.skip("The second shard database is not available")
+
+    yield shards
+
+    if created_users:
+        with shards.session("s1") as session:
+            delete_users(session, created_users)
+            session.commit()
+
+
+@pytest.fixture
+def memory_ledger():
+    # In-memory engine with the same money rules, no database needed
+    from app.services.memory_ledger import MemoryLedger
+
+    return MemoryLedger()
+
+
+@pytest.fixture
+def client(db):
+    # The API end to end, so it also needs Redis (rate limits, token checks)
+    from fastapi.testclient import TestClient
+
+    from app.db.redis_db import ping_redis
+    from app.main import app
+
+    try:
+        ping_redis()
+    except Exception:
+        pytest.skip("Redis is not available")
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def new_user(client, db, created_users):
+    # Signs up a fresh user: returns (auth headers, {currency: wallet id}).
+    # Tokens are issued directly rather than through /auth/login, which is
+    # rate limited per client IP.
+    from app.services.auth import AuthService
+    from app.services.wallet import WalletService
+
+    def sign_up():
+        email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+
+        assert client.post("/auth/signup", json={"email": email, "password": "Test-passw0rd"}).status_code == 200
+        user = db.execute(select(User).where(User.email == email)).scalar_one()
+        created_users.append(user.id)
+        tokens = AuthService(db, wallet_service=WalletService(db)).issue_tokens(user)
+        headers = {"Authorization": f"Bearer {tokens.access_token}"}
+
+        return headers, {wallet.currency: str(wallet.id) for wallet in user.wallets}
+
+    return sign_up
+
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def sql_budget():
+    # Fails the test when the code in the block sends more statements than
+    # budgeted. Counts every cursor execute on the app engine, so savepoints
+    # and the auth lookup count too, exactly the round trips a request pays.
+    #
+    #     with sql_budget(5):
+    #         client.post("/wallet/deposit", ...)
+    @contextmanager
+    def budget(limit: int):
+        recorder = StatementRecorder()
+        event.listen(engine, "before_cursor_execute", recorder)
+
+        try:
+            yield recorder
+        finally:
+            event.remove(engine, "before_cursor_execute", recorder)
+
+        if len(recorder.statements) > limit:
+            listing = "\n".join(
+                f"  {i}. {' '.join(statement.split())[:200]}"
+                for i, statement in enumerate(recorder.statements, 1)
+            )
+            pytest.fail(
+                f"{len(recorder.statements)} SQL statements, budget is {limit}:\n{listing}",
+                pytrace=False,
+            )
+
+    return budget
@@ -0,0 +1,1371 @@
+import random
+import threading
+import uuid
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import column, delete, func, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects import postgresql
+
+from app.db.session import SessionLocal
+from app.db.sharding import HashRing
+from app.db.types import MinorUnits
+from app.models import user  # noqa: F401 - Wallet.user needs the User mapper
+from app.models.idempotency import IdempotencyKey
+from app.models.hold import Hold
+from app.models.ledger import LedgerEntry
+from app.models.outbox import OutboxEvent
+from app.models.scheduled_transfer import ScheduledTransfer
+from app.models.spending_limit import WalletSpendBucket
+from app.models.transaction import Transaction
+from app.models.transfer_saga import TransferSaga
+from app.models.user import User
+from app.models.wallet import Wallet
+from app.schemas.auth import ProvisionUser, TokenRead
+from app.schemas.hold import HoldStatus
+from app.schemas.scheduled_transfer import ScheduledTransferStatus, TransferFrequency
+from app.schemas.transaction import JournalLeg, SagaStatus, TransactionFilter, TransactionStatus, TransactionType
+from app.schemas.wallet import Currency, LimitPeriod
+from app.services.memory_ledger import DuplicateReferenceError
+from app.services.rate_limit import RateLimiter, RateLimitExceededError
+from app.services.risk import RiskPipeline, TransferRisk, VelocityCheck
+from app.services import fx, sharding
+from app.services.scheduled_transfer import ScheduledTransferNotActiveError, ScheduledTransferService
+from app.services.archive import ArchiveService
+from app.services.sharding import (
+    CrossShardFxTransferError,
+    ShardedTransferService,
+    advance_saga,
+    create_fx_house_wallets,
+    create_shard_wallets,
+    resume_sagas,
+)
+from app.services.transaction import (
+    FxTransferReviewRequiredError,
+    HoldNotActiveError,
+    InvalidJournalError,
+    JournalReviewRequiredError,
+    TransactionNotReversibleError,
+    TransactionService,
+    WalletCurrencyMismatchError,
+    history_query,
+)
+from app.services.wallet import InsufficientBalanceError, SpendingLimitExceededError, WalletNotFoundError, WalletService
+
+NOW = datetime.now(timezone.utc)
+WALLET_ID = uuid.uuid4()
+
+
+def plan_nodes(plan: dict):
+    yield plan
+
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(db, stmt) -> list[dict]:
+    sql = stmt.compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+
+    # The test tables are tiny, so a sequential scan would always look
+    # cheapest. Disabling it shows whether an index *can* serve the query.
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    result = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+
+    return list(plan_nodes(result[0]["Plan"]))
+
+
+@pytest.mark.parametrize(
+    ("wallet_id", "filters", "expected_index"),
+    [
+        (WALLET_ID, TransactionFilter(), "ix_ledger_entries_wallet_id_created_at"),
+        (
+            WALLET_ID,
+            TransactionFilter(type=TransactionType.DEPOSIT, min_amount=Decimal("10")),
+            "ix_ledger_entries_wallet_id_created_at",
+        ),
+        (
+            WALLET_ID,
+            TransactionFilter(start=NOW - timedelta(days=7), end=NOW),
+            "ix_ledger_entries_wallet_id_created_at",
+        ),
+        (None, TransactionFilter(), "ix_transactions_created_at"),
+        (None, TransactionFilter(reference="order-12"), "ix_transactions_reference_pattern"),
+        (None, TransactionFilter(type=TransactionType.TRANSFER), "ix_transactions_type_created_at"),
+        (
+            None,
+            TransactionFilter(
+                type=TransactionType.WITHDRAWAL,
+                start=NOW - timedelta(days=30),
+                end=NOW,
+            ),
+            "ix_transactions_type_created_at",
+        ),
+        (
+            None,
+            TransactionFilter(start=NOW - timedelta(days=1), max_amount=Decimal("500")),
+            "ix_transactions_created_at",
+        ),
+    ],
+)
+def test_history_filters_use_an_index(db, wallet_id, filters, expected_index):
+    nodes = explain(db, history_query(wallet_id=wallet_id, limit=20, filters=filters))
+
+    assert not [node for node in nodes if node["Node Type"] == "Seq Scan"]
+    assert expected_index in {node.get("Index Name") for node in nodes}
+
+
+@pytest.fixture
+def limited_wallet(db, created_users):
+    # Committed, so the concurrent sessions below can see it
+    owner = User(
+        email=f"limits-{uuid.uuid4().hex[:12]}@example.com",
+        hashed_password="not-a-real-hash",
+    )
+    db.add(owner)
+    db.flush()
+    created_users.append(owner.id)
+
+    wallet = Wallet(
+        user_id=owner.id,
+        currency="USD",
+        balance=Decimal("1000.00"),
+        daily_limit=Decimal("100.00"),
+    )
+    db.add(wallet)
+    db.commit()
+
+    return owner.id, wallet.id
+
+
+def test_parallel_withdrawals_cannot_exceed_daily_limit(db, limited_wallet):
+    user_id, wallet_id = limited_wallet
+    workers = 10
+    barrier = threading.Barrier(workers)
+    results = []
+
+    def withdraw() -> None:
+        session = SessionLocal()
+        service = TransactionService(session, wallet_service=WalletService(session))
+
+        try:
+            barrier.wait()
+            service.withdraw(user_id=user_id, wallet_id=wallet_id, amount=Decimal("30.00"))
+            results.append("ok")
+        except SpendingLimitExceededError:
+            results.append("limited")
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=withdraw) for _ in range(workers)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 3 x 30 fits in the 100 limit, a fourth would not
+    assert sorted(results) == ["limited"] * 7 + ["ok"] * 3
+
+    db.expire_all()
+    spent = db.execute(
+        select(WalletSpendBucket.spent).where(
+            WalletSpendBucket.wallet_id == wallet_id,
+            WalletSpendBucket.period == LimitPeriod.DAY.value,
+        )
+    ).scalar_one()
+    balance = db.execute(select(Wallet.balance).where(Wallet.id == wallet_id)).scalar_one()
+
+    assert spent == Decimal("90.00")
+    assert balance == Decimal("910.00")
+
+
+@pytest.fixture
+def funded_wallets(db, created_users):
+    # A sender with 1000.00 and a recipient, both committed:
+    # (sender id, source wallet id, destination wallet id)
+    users = [
+        User(email=f"funded-{uuid.uuid4().hex[:12]}@example.com", hashed_password="not-a-real-hash")
+        for _ in range(2)
+    ]
+    db.add_all(users)
+    db.flush()
+    created_users.extend(u.id for u in users)
+
+    source = Wallet(user_id=users[0].id, currency="USD", balance=Decimal("1000.00"))
+    destination = Wallet(user_id=users[1].id, currency="USD", balance=Decimal("0.00"))
+    db.add_all([source, destination])
+    db.commit()
+
+    return users[0].id, source.id, destination.id
+
+
+@pytest.fixture
+def user_wallet(db, created_users):
+    # Makes a committed user with one wallet: (user id, wallet id)
+    def make(balance="0.00", currency="USD"):
+        user = User(email=f"wallet-{uuid.uuid4().hex[:12]}@example.com", hashed_password="not-a-real-hash")
+        db.add(user)
+        db.flush()
+        created_users.append(user.id)
+
+        wallet = Wallet(user_id=user.id, currency=currency, balance=Decimal(balance))
+        db.add(wallet)
+        db.commit()
+
+        return user.id, wallet.id
+
+    return make
+
+
+def test_scheduler_batch_keeps_cancellations_and_retries_errors(db, funded_wallets):
+    user_id, source_id, destination_id = funded_wallets
+    long_ago = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    schedules = [
+        ScheduledTransfer(
+            user_id=user_id,
+            source_wallet_id=source_id,
+            destination_wallet_id=destination_id,
+            amount=Decimal("5.00"),
+            frequency=TransferFrequency.DAILY,
+            status=ScheduledTransferStatus.ACTIVE,
+            anchor_at=long_ago,
+            next_run_at=long_ago,
+        )
+        for _ in range(2)
+    ]
+    db.add_all(schedules)
+    db.commit()
+    cancelled, failing = (schedule.id for schedule in schedules)
+
+    def transfer(reference, **kwargs):
+        if reference.startswith(f"scheduled:{cancelled}:"):
+            # The user cancels while the worker is still on this batch
+            with SessionLocal() as session:
+                ScheduledTransferService(
+                    session, TransactionService(session, wallet_service=WalletService(session))
+                ).cancel(user_id=user_id, schedule_id=cancelled)
+        else:
+            raise OperationalError("INSERT ...", {}, Exception("server closed the connection"))
+
+    transaction_service = TransactionService(db, wallet_service=WalletService(db))
+    transaction_service.transfer = transfer
+    service = ScheduledTransferService(db, transaction_service)
+
+    # The oldest due schedules in the table, so these two are the batch
+    assert service.run_due(batch_size=2) == 2
+
+    db.expire_all()
+    cancelled_row, failing_row = (db.get(ScheduledTransfer, i) for i in (cancelled, failing))
+
+    assert cancelled_row.status == ScheduledTransferStatus.CANCELLED
+    # Kept for a retry of the same occurrence once the claim lease runs out
+    assert failing_row.status == ScheduledTransferStatus.ACTIVE
+    assert failing_row.occurrence == 0
+    assert failing_row.last_error == "OperationalError"
+    assert failing_row.next_run_at > datetime.now(timezone.utc)
+
+    with pytest.raises(ScheduledTransferNotActiveError):
+        service.cancel(user_id=user_id, schedule_id=cancelled)
+
+
+def test_scheduler_fails_a_one_off_that_could_not_run(db, funded_wallets):
+    user_id, source_id, destination_id = funded_wallets
+    long_ago = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    schedules = [
+        ScheduledTransfer(
+            user_id=user_id,
+            source_wallet_id=source_id,
+            destination_wallet_id=destination_id,
+            amount=Decimal(amount),
+            frequency=frequency,
+            status=ScheduledTransferStatus.ACTIVE,
+            anchor_at=long_ago,
+            next_run_at=long_ago,
+        )
+        for amount, frequency in (
+            ("5000.00", TransferFrequency.ONCE),
+            ("5000.00", TransferFrequency.DAILY),
+            ("5.00", TransferFrequency.ONCE),
+        )
+    ]
+    db.add_all(schedules)
+    db.commit()
+
+    service = ScheduledTransferService(db, TransactionService(db, wallet_service=WalletService(db)))
+    assert service.run_due(batch_size=3) == 3
+
+    db.expire_all()
+    unfunded_once, unfunded_daily, once = (db.get(ScheduledTransfer, schedule.id) for schedule in schedules)
+
+    # No money moved, so the one-off is not "completed"
+    assert unfunded_once.status == ScheduledTransferStatus.FAILED
+    assert unfunded_once.last_error == "Insufficient wallet balance."
+    # A standing order only skips the occurrence
+    assert unfunded_daily.status == ScheduledTransferStatus.ACTIVE
+    assert unfunded_daily.occurrence > 0
+    assert once.status == ScheduledTransferStatus.COMPLETED
+    assert once.last_error is None
+    assert db.get(Wallet, source_id).balance == Decimal("995.00")
+
+
+def test_velocity_check_limits_expire_with_the_window():
+    clock = [0.0]
+    check = VelocityCheck(
+        {"sender:minute": {"count": 2}, "pair:hour": {"amount": Decimal("100")}},
+        clock=lambda: clock[0],
+    )
+    sender, receiver, other = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    def transfer(to, amount):
+        return TransferRisk(sender_id=sender, receiver_id=to, currency="USD", amount=Decimal(amount))
+
+    for _ in range(2):
+        assert check.assess(transfer(receiver, "30")) == []
+        check.record(transfer(receiver, "30"))
+
+    assert check.assess(transfer(other, "1")) == ["sender transfer count over 2 per minute"]
+
+    # The minute is over (plus one slot); the pair's hour still counts 60.00
+    clock[0] += 62
+    assert check.assess(transfer(other, "50")) == []
+    assert check.assess(transfer(receiver, "50")) == ["pair amount over 100 per hour"]
+    # In another currency the counters start from zero
+    assert check.assess(transfer(receiver, "50")._replace(currency="EUR")) == []
+
+    clock[0] += 3600
+    assert check.assess(transfer(receiver, "50")) == []
+
+
+def test_velocity_check_assesses_a_batch_as_one():
+    check = VelocityCheck({"sender:hour": {"amount": Decimal("20000")}, "pair:minute": {"count": 1}})
+    sender, receivers = uuid.uuid4(), [uuid.uuid4() for _ in range(3)]
+
+    legs = [
+        TransferRisk(sender_id=sender, receiver_id=receiver, currency="USD", amount=Decimal("15000"))
+        for receiver in receivers
+    ]
+
+    # Each leg alone is under the limit, all three together are not
+    assert [check.assess(leg) for leg in legs] == [[], [], []]
+    assert check.assess_many(legs) == ["sender amount over 20000 per hour"]
+    assert check.assess_many([legs[0], legs[0]._replace(amount=Decimal("1"))]) == [
+        "pair transfer count over 1 per minute",
+    ]
+
+
+def test_journal_legs_count_together_against_velocity_limits(db, user_wallet):
+    sender_id, source_id = user_wallet("1000.00")
+    receivers = [user_wallet()[1] for _ in range(3)]
+    service = TransactionService(
+        db,
+        wallet_service=WalletService(db),
+        risk_pipeline=RiskPipeline([VelocityCheck({"sender:hour": {"amount": Decimal("500")}})], enabled=True),
+    )
+
+    with pytest.raises(JournalReviewRequiredError) as e:
+        service.post_journal(
+            sender_id,
+            [JournalLeg(wallet_id=source_id, amount=Decimal("-600.00"))]
+            + [JournalLeg(wallet_id=wallet_id, amount=Decimal("200.00")) for wallet_id in receivers],
+        )
+
+    assert e.value.reasons == ["sender amount over 500 per hour"]
+    assert db.get(Wallet, source_id).balance == Decimal("1000.00")
+
+
+def test_fx_transfer_goes_through_the_risk_checks(db, created_users, user_wallet, monkeypatch):
+    house = User(email=f"house-{uuid.uuid4().hex[:12]}@example.com", hashed_password="not-a-real-hash")
+    db.add(house)
+    db.flush()
+    created_users.append(house.id)
+    db.add_all([
+        Wallet(user_id=house.id, currency="USD", balance=Decimal("0.00")),
+        Wallet(user_id=house.id, currency="EUR", balance=Decimal("1000.00")),
+    ])
+    db.commit()
+    monkeypatch.setattr(fx.db_settings, "FX_HOUSE_USER_ID", str(house.id))
+    monkeypatch.setattr(fx, "_house_wallet_ids", {})
+
+    sender_id, source_id = user_wallet("100.00")
+    _, destination_id = user_wallet(currency="EUR")
+    service = TransactionService(
+        db,
+        wallet_service=WalletService(db),
+        risk_pipeline=RiskPipeline([VelocityCheck({"pair:hour": {"amount": Decimal("15")}})], enabled=True),
+    )
+    quotes = [fx.create_quote(str(sender_id), Currency.USD, Currency.EUR, Decimal("10.00"))[0] for _ in range(2)]
+
+    def fx_transfer(quote):
+        return service.fx_transfer(
+            user_id=sender_id,
+            source_wallet_id=source_id,
+            destination_wallet_id=destination_id,
+            quote=quote,
+        )
+
+    try:
+        fx_transfer(quotes[0])
+
+        # The pair's hour now counts 10.00 USD; another 10.00 goes over
+        with pytest.raises(FxTransferReviewRequiredError) as e:
+            fx_transfer(quotes[1])
+
+        assert e.value.reasons == ["pair amount over 15 per hour"]
+        assert db.get(Wallet, source_id).balance == Decimal("90.00")
+        # Refused before the quote was used up
+        assert db.execute(
+            select(IdempotencyKey).where(IdempotencyKey.key == f"fx-quote:{quotes[1].quote_id}")
+        ).first() is None
+    finally:
+        db.rollback()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_([f"fx-quote:{q.quote_id}" for q in quotes])))
+        db.commit()
+
+
+@pytest.mark.parametrize("decision", ["approve", "reject"])
+def test_parked_transfer_decision_moves_held_funds(db, funded_wallets, decision):
+    user_id, source_id, destination_id = funded_wallets
+    # Every transfer goes to review
+    flag_all = RiskPipeline([VelocityCheck({"sender:minute": {"count": 0}})], enabled=True)
+    service = TransactionService(db, wallet_service=WalletService(db), risk_pipeline=flag_all)
+
+    transaction, source, _ = service.transfer(
+        user_id=user_id,
+        source_wallet_id=source_id,
+        destination_wallet_id=destination_id,
+        amount=Decimal("100.00"),
+    )
+
+    assert transaction.status == TransactionStatus.PENDING
+    assert (source.balance, source.held_balance) == (Decimal("1000.00"), Decimal("100.00"))
+
+    if decision == "approve":
+        service.approve_transfer(transaction_id=transaction.id, reviewer_id=user_id)
+        expected = TransactionStatus.COMPLETED, Decimal("900.00"), Decimal("100.00")
+    else:
+        service.reject_transfer(transaction_id=transaction.id, reviewer_id=user_id)
+        expected = TransactionStatus.FAILED, Decimal("1000.00"), Decimal("0.00")
+
+    db.expire_all()
+    source, destination = db.get(Wallet, source_id), db.get(Wallet, destination_id)
+    status, source_balance, destination_balance = expected
+
+    assert db.get(Transaction, transaction.id).status == status
+    assert (source.balance, source.held_balance) == (source_balance, Decimal("0.00"))
+    assert destination.balance == destination_balance
+
+    events = db.execute(
+        select(OutboxEvent.event_type, OutboxEvent.payload)
+        .where(OutboxEvent.aggregate_id == transaction.id)
+    ).all()
+    assert ("transaction.status_changed", {
+        "transaction_id": str(transaction.id),
+        "previous_status": "pending",
+        "status": status.value,
+    }) in [tuple(event) for event in events]
+
+
+def ledger_service(db) -> TransactionService:
+    # Without risk checks, so the in-process velocity counters can't get in the way
+    return TransactionService(db, wallet_service=WalletService(db), risk_pipeline=RiskPipeline([], enabled=False))
+
+
+def test_reversing_a_transfer_mirrors_its_legs(db, user_wallet):
+    sender_id, source_id = user_wallet("1000.00")
+    _, destination_id = user_wallet()
+    service = ledger_service(db)
+    transfer, _, _ = service.transfer(sender_id, source_id, destination_id, Decimal("100.00"))
+    transfer_id = transfer.id
+
+    reversal = service.reverse(transfer_id)
+
+    assert reversal.type == TransactionType.REVERSAL
+    assert reversal.reversal_of_id == transfer_id
+    assert db.get(Transaction, transfer_id).status == TransactionStatus.REVERSED
+    legs = db.execute(
+        select(LedgerEntry.wallet_id, LedgerEntry.amount).where(LedgerEntry.transaction_id == reversal.id)
+    ).all()
+    assert sorted(legs) == sorted([(source_id, Decimal("100.00")), (destination_id, Decimal("-100.00"))])
+    assert db.get(Wallet, source_id).balance == Decimal("1000.00")
+    assert db.get(Wallet, destination_id).balance == Decimal("0.00")
+
+    # Only once, and a reversal can't be reversed either
+    with pytest.raises(TransactionNotReversibleError):
+        service.reverse(transfer_id)
+    with pytest.raises(TransactionNotReversibleError):
+        service.reverse(reversal.id)
+
+
+def test_reversal_is_refused_once_the_credit_was_spent(db, user_wallet):
+    sender_id, source_id = user_wallet("1000.00")
+    receiver_id, destination_id = user_wallet()
+    service = ledger_service(db)
+    transfer_id = service.transfer(sender_id, source_id, destination_id, Decimal("100.00"))[0].id
+    service.withdraw(receiver_id, destination_id, Decimal("60.00"))
+
+    with pytest.raises(InsufficientBalanceError):
+        service.reverse(transfer_id)
+
+    # Nothing of the reversal stays behind
+    assert db.get(Transaction, transfer_id).status == TransactionStatus.COMPLETED
+    assert db.get(Wallet, source_id).balance == Decimal("900.00")
+    assert db.get(Wallet, destination_id).balance == Decimal("40.00")
+    assert db.execute(select(Transaction).where(Transaction.reversal_of_id == transfer_id)).first() is None
+
+
+def test_reverse_many_reports_each_transaction(db, user_wallet):
+    sender_id, source_id = user_wallet("1000.00")
+    receiver_id, destination_id = user_wallet()
+    service = ledger_service(db)
+    reversible, already_reversed, spent = (
+        service.transfer(sender_id, source_id, destination_id, Decimal(amount))[0].id
+        for amount in ("10.00", "20.00", "500.00")
+    )
+    service.reverse(already_reversed)
+    # 510.00 received, 20.00 taken back: spending 500.00 leaves enough for the first only
+    service.withdraw(receiver_id, destination_id, Decimal("500.00"))
+    unknown = uuid.uuid4()
+
+    report = service.reverse_many([reversible, already_reversed, spent, unknown], batch_size=2)
+
+    assert report.reversed == [reversible]
+    assert report.failed == {
+        already_reversed: "TransactionNotReversibleError",
+        spent: "InsufficientBalanceError",
+        unknown: "TransactionNotFoundError",
+    }
+    assert db.get(Transaction, spent).status == TransactionStatus.COMPLETED
+    assert db.get(Wallet, source_id).balance == Decimal("500.00")
+
+
+@pytest.mark.parametrize(("captured", "balance"), [("25.00", "75.00"), (None, "60.00")])
+def test_hold_capture_debits_the_captured_amount(db, user_wallet, captured, balance):
+    user_id, wallet_id = user_wallet("100.00")
+    service = ledger_service(db)
+    hold_id = service.hold(user_id, wallet_id, Decimal("40.00"))[0].id
+
+    transaction, entry, wallet = service.capture(
+        user_id, hold_id, amount=Decimal(captured) if captured else None
+    )
+
+    # The rest of a partial capture goes back to the available balance
+    assert transaction.type == TransactionType.CAPTURE
+    assert entry.amount == -(Decimal(captured) if captured else Decimal("40.00"))
+    assert (wallet.balance, wallet.held_balance) == (Decimal(balance), Decimal("0.00"))
+    hold = db.get(Hold, hold_id)
+    assert (hold.status, hold.transaction_id) == (HoldStatus.CAPTURED, transaction.id)
+
+    with pytest.raises(HoldNotActiveError):
+        service.capture(user_id, hold_id)
+    with pytest.raises(HoldNotActiveError):
+        service.release(user_id, hold_id)
+
+
+def test_hold_release_frees_the_amount(db, user_wallet):
+    user_id, wallet_id = user_wallet("100.00")
+    service = ledger_service(db)
+    hold, wallet = service.hold(user_id, wallet_id, Decimal("40.00"))
+    assert (wallet.balance, wallet.held_balance) == (Decimal("100.00"), Decimal("40.00"))
+
+    assert service.release(user_id, hold.id).status == HoldStatus.RELEASED
+
+    wallet = db.get(Wallet, wallet_id)
+    assert (wallet.balance, wallet.held_balance) == (Decimal("100.00"), Decimal("0.00"))
+    with pytest.raises(HoldNotActiveError):
+        service.capture(user_id, hold.id)
+
+
+def test_expire_holds_only_releases_expired_holds(db, user_wallet):
+    user_id, wallet_id = user_wallet("100.00")
+    service = ledger_service(db)
+    stale, fresh = (service.hold(user_id, wallet_id, Decimal(amount))[0].id for amount in ("30.00", "20.00"))
+    db.execute(update(Hold).where(Hold.id == stale).values(expires_at=func.now() - timedelta(minutes=1)))
+    db.commit()
+
+    # Past its expiry a hold can't be captured, even before the sweeper ran
+    with pytest.raises(HoldNotActiveError):
+        service.capture(user_id, stale)
+
+    assert service.expire_holds(batch_size=100) >= 1
+
+    db.expire_all()
+    assert db.get(Hold, stale).status == HoldStatus.EXPIRED
+    assert db.get(Hold, fresh).status == HoldStatus.ACTIVE
+    wallet = db.get(Wallet, wallet_id)
+    assert (wallet.balance, wallet.held_balance) == (Decimal("100.00"), Decimal("20.00"))
+
+
+def test_held_funds_are_not_available(db, user_wallet):
+    user_id, wallet_id = user_wallet("100.00")
+    service = ledger_service(db)
+    service.hold(user_id, wallet_id, Decimal("70.00"))
+
+    # available = balance - held_balance = 30.00
+    with pytest.raises(InsufficientBalanceError):
+        service.withdraw(user_id, wallet_id, Decimal("40.00"))
+    with pytest.raises(InsufficientBalanceError):
+        service.hold(user_id, wallet_id, Decimal("30.01"))
+
+    service.withdraw(user_id, wallet_id, Decimal("30.00"))
+    wallet = db.get(Wallet, wallet_id)
+    assert (wallet.balance, wallet.held_balance) == (Decimal("70.00"), Decimal("70.00"))
+
+
+@pytest.mark.parametrize(
+    ("legs", "error"),
+    [
+        # (wallet, amount) with wallet 0 the caller's USD wallet
+        ([(0, "-10.00"), (1, "9.00")], InvalidJournalError),
+        ([(0, "-10.00"), (1, "5.00"), (1, "5.00")], InvalidJournalError),
+        ([(0, "-10.00"), (3, "10.00")], WalletCurrencyMismatchError),
+        ([(0, "10.00"), (1, "-10.00")], WalletNotFoundError),
+        ([(0, "-10.00"), (4, "10.00")], WalletNotFoundError),
+    ],
+    ids=["not-net-zero", "duplicate-wallet", "mixed-currencies", "debit-other-user", "unknown-wallet"],
+)
+def test_journal_rejects_invalid_legs(db, user_wallet, legs, error):
+    user_id, wallet_id = user_wallet("100.00")
+    wallets = [wallet_id, user_wallet("100.00")[1], user_wallet()[1], user_wallet(currency="EUR")[1], uuid.uuid4()]
+
+    with pytest.raises(error):
+        ledger_service(db).post_journal(
+            user_id, [JournalLeg(wallet_id=wallets[i], amount=Decimal(amount)) for i, amount in legs]
+        )
+
+    assert [db.get(Wallet, w).balance for w in wallets[:3]] == [Decimal("100.00"), Decimal("100.00"), Decimal("0.00")]
+
+
+def test_journal_insufficient_balance_rolls_back_every_leg(db, user_wallet):
+    user_id, source_id = user_wallet("50.00")
+    credited = [user_wallet()[1] for _ in range(2)]
+
+    with pytest.raises(InsufficientBalanceError):
+        ledger_service(db).post_journal(
+            user_id,
+            [JournalLeg(wallet_id=source_id, amount=Decimal("-80.00"))]
+            + [JournalLeg(wallet_id=wallet_id, amount=Decimal("40.00")) for wallet_id in credited],
+            reference=f"journal-{uuid.uuid4().hex[:12]}",
+        )
+
+    assert [db.get(Wallet, w).balance for w in [source_id, *credited]] == [Decimal("50.00"), Decimal("0.00"), Decimal("0.00")]
+    assert db.execute(select(LedgerEntry).where(LedgerEntry.wallet_id.in_([source_id, *credited]))).first() is None
+
+
+def test_journal_posts_every_leg_in_one_transaction(db, user_wallet):
+    user_id, source_id = user_wallet("100.00")
+    (_, seller_id), (_, fee_id) = user_wallet("5.00"), user_wallet()
+
+    journal = ledger_service(db).post_journal(
+        user_id,
+        [
+            JournalLeg(wallet_id=source_id, amount=Decimal("-100.00")),
+            JournalLeg(wallet_id=seller_id, amount=Decimal("90.00")),
+            JournalLeg(wallet_id=fee_id, amount=Decimal("10.00")),
+        ],
+    )
+
+    assert (journal.type, journal.status, journal.currency) == (TransactionType.JOURNAL, TransactionStatus.COMPLETED, "USD")
+    # Balances only for the caller's own wallets
+    assert {(leg.wallet_id, leg.amount, leg.balance) for leg in journal.legs} == {
+        (source_id, Decimal("-100.00"), Decimal("0.00")),
+        (seller_id, Decimal("90.00"), None),
+        (fee_id, Decimal("10.00"), None),
+    }
+    entries = db.execute(
+        select(LedgerEntry.wallet_id, LedgerEntry.amount).where(LedgerEntry.transaction_id == journal.transaction_id)
+    ).all()
+    assert sorted(entries) == sorted((leg.wallet_id, leg.amount) for leg in journal.legs)
+    assert [db.get(Wallet, w).balance for w in (source_id, seller_id, fee_id)] == [
+        Decimal("0.00"), Decimal("95.00"), Decimal("10.00"),
+    ]
+
+
+def test_replay_reports_and_fixes_a_drifted_balance(db, user_wallet, tmp_path, monkeypatch):
+    from app.services import replay
+
+    user_id, wallet_id = user_wallet()
+    ledger_service(db).deposit(user_id, wallet_id, Decimal("100.00"))
+    # A partition so narrow that it only holds this wallet
+    partitions = 1 << 20
+    partition = wallet_id.int * partitions >> 128
+    report = tmp_path / "replay.csv"
+
+    def drift():
+        db.execute(update(Wallet).where(Wallet.id == wallet_id).values(balance=Decimal("250.00")))
+        db.commit()
+
+    def run(**kwargs):
+        result = replay.replay_partition(partition, partitions, report_path=str(report), **kwargs)
+        db.expire_all()
+        return result, report.read_text().split()
+
+    drift()
+    result, rows = run()
+    assert (result.wallets, result.entries, result.mismatched, result.fixed) == (1, 1, 1, 0)
+    assert rows == [f"{wallet_id},250.00,100.00,-150.00,mismatch"]
+    assert db.get(Wallet, wallet_id).balance == Decimal("250.00")
+
+    version = db.get(Wallet, wallet_id).version
+    result, rows = run(fix=True)
+    assert (result.mismatched, result.fixed, result.skipped) == (1, 1, 0)
+    assert rows == [f"{wallet_id},250.00,100.00,-150.00,fixed"]
+    assert (db.get(Wallet, wallet_id).balance, db.get(Wallet, wallet_id).version) == (Decimal("100.00"), version + 1)
+
+    # A live deposit lands between the snapshot and the correction: the
+    # stale ledger total must not overwrite it
+    apply_corrections = replay.apply_corrections
+
+    def live_write_first(session, mismatches):
+        with SessionLocal() as live:
+            ledger_service(live).deposit(user_id, wallet_id, Decimal("10.00"))
+        return apply_corrections(session, mismatches)
+
+    drift()
+    monkeypatch.setattr(replay, "apply_corrections", live_write_first)
+    result, rows = run(fix=True)
+    assert (result.mismatched, result.fixed, result.skipped) == (1, 0, 1)
+    assert rows == [f"{wallet_id},250.00,100.00,-150.00,changed"]
+    assert db.get(Wallet, wallet_id).balance == Decimal("260.00")
+
+
+def test_history_reads_through_to_archive_only_for_archived_wallets(db, funded_wallets, sql_budget):
+    user_id, source_id, destination_id = funded_wallets
+    service = TransactionService(db, wallet_service=WalletService(db))
+    long_ago = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+    old = service.deposit(user_id=user_id, wallet_id=source_id, amount=Decimal("7.00"))[0]
+    service.deposit(user_id=user_id, wallet_id=source_id, amount=Decimal("3.00"))
+    db.execute(text("UPDATE transactions SET created_at = :t WHERE id = :id"), {"t": long_ago, "id": old.id})
+    db.execute(text("UPDATE ledger_entries SET created_at = :t WHERE transaction_id = :id"), {"t": long_ago, "id": old.id})
+    db.commit()
+
+    # The oldest settled transaction in the table, so it's the one moved
+    assert ArchiveService(db).archive_batch(batch_size=1) == 1
+
+    db.expire_all()
+    source, destination = db.get(Wallet, source_id), db.get(Wallet, destination_id)
+    assert source.archived_until == long_ago
+    assert destination.archived_until is None
+
+    # Hot page first, then the archived deposit: two queries
+    with sql_budget(2):
+        rows = service.get_recent_transaction_rows(wallet_id=source_id, limit=10)
+    assert [row.amount for row in rows] == ["3.00", "7.00"]
+
+    # A start after the watermark, or no archive at all: the hot query only
+    with sql_budget(1):
+        assert len(service.get_recent_transaction_rows(
+            wallet_id=source_id, limit=10, filters=TransactionFilter(start=long_ago + timedelta(days=1)),
+        )) == 1
+    with sql_budget(1):
+        assert service.get_recent_transaction_rows(wallet_id=destination_id, limit=10) == []
+
+
+def test_memory_ledger_parallel_transfers_never_overdraw(memory_ledger):
+    owner = uuid.uuid4()
+    source = memory_ledger.create_wallet(owner, "USD")
+    destinations = [memory_ledger.create_wallet(uuid.uuid4(), "USD") for _ in range(4)]
+    memory_ledger.deposit(source.id, Decimal("100.00"))
+    results = []
+
+    def transfer(destination) -> None:
+        for _ in range(50):
+            try:
+                memory_ledger.transfer(owner, source.id, destination.id, Decimal("1.50"))
+                results.append("ok")
+            except InsufficientBalanceError:
+                results.append("insufficient")
+
+    threads = [threading.Thread(target=transfer, args=(d,)) for d in destinations]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 66 x 1.50 fits in 100, the 67th would not
+    assert results.count("ok") == 66
+    assert memory_ledger.balance(source.id) == Decimal("1.00")
+    assert memory_ledger.check_integrity() == []
+
+
+def test_memory_ledger_rejects_duplicate_reference(memory_ledger):
+    owner = uuid.uuid4()
+    source = memory_ledger.create_wallet(owner, "USD")
+    destination = memory_ledger.create_wallet(uuid.uuid4(), "USD")
+    memory_ledger.deposit(source.id, Decimal("10.00"))
+
+    memory_ledger.transfer(owner, source.id, destination.id, Decimal("4.00"), reference="order-1")
+
+    with pytest.raises(DuplicateReferenceError):
+        memory_ledger.transfer(owner, source.id, destination.id, Decimal("4.00"), reference="order-1")
+
+    # A failed operation doesn't keep its reference
+    with pytest.raises(InsufficientBalanceError):
+        memory_ledger.transfer(owner, source.id, destination.id, Decimal("50.00"), reference="order-2")
+    memory_ledger.transfer(owner, source.id, destination.id, Decimal("5.00"), reference="order-2")
+
+    assert memory_ledger.balance(destination.id) == Decimal("9.00")
+    assert memory_ledger.check_integrity() == []
+
+
+# SQL statements per request, auth lookup included. Raise one only together
+# with the change that needs the extra round trip.
+SQL_BUDGETS = {
+    "wallets": 3,
+    "deposit": 10,
+    "withdraw": 12,
+    "transfer": 18,
+    "journal": 8,
+    "history": 3,
+}
+
+
+def test_adding_a_shard_moves_few_users():
+    users = [uuid.uuid4() for _ in range(5000)]
+    before = HashRing(["main", "s1", "s2"])
+    after = HashRing(["main", "s1", "s2", "s3"])
+
+    moved = [u for u in users if before.shard_for(u) != after.shard_for(u)]
+
+    # Only the new shard takes users (about a quarter), nobody else reshuffles
+    assert {after.shard_for(u) for u in moved} == {"s3"}
+    assert 0.15 < len(moved) / len(users) < 0.35
+
+
+def test_minor_units_scale_amounts_in_expressions():
+    balance, held = column("balance", MinorUnits()), column("held_balance", MinorUnits())
+    guard = (balance - held >= Decimal("10.005")).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+
+    # The compared amount is in cents too, rounded half up; no NUMERIC casts
+    assert str(guard) == "balance - held_balance >= 1001"
+    assert MinorUnits().process_result_value(-550, None) == Decimal("-5.50")
+
+
+class FakeBucket:
+    # The Redis token bucket script, on a clock the test controls
+    def __init__(self):
+        self.now = 0.0
+        self.buckets = {}
+        self.calls = 0
+
+    def take_tokens(self, key, capacity, refill_per_second, requested, returned):
+        self.calls += 1
+        tokens, ts = self.buckets.get(key, (capacity, self.now))
+        tokens = min(capacity, tokens + (self.now - ts) * refill_per_second + returned)
+        granted = min(requested, int(tokens))
+        self.buckets[key] = (tokens - granted, self.now)
+
+        return granted, 0 if granted else 1000
+
+
+@pytest.mark.parametrize("load", [0.25, 0.5, 0.9])
+def test_rate_limit_leases_never_deny_under_the_limit(load):
+    bucket = FakeBucket()
+    limiter = RateLimiter({"transfer:user": "60/minute"}, take_tokens=bucket.take_tokens, clock=lambda: bucket.now)
+    arrivals = random.Random(load)
+    denied = 0
+
+    # Poisson traffic at a share of the 1/second limit, for an hour. A
+    # bucket that starts full never runs dry at these rates in practice,
+    # so any denial is a token lost in a local lease.
+    for _ in range(int(3600 * load)):
+        bucket.now += arrivals.expovariate(load)
+        try:
+            limiter.hit("transfer", "user", "u1")
+        except RateLimitExceededError:
+            denied += 1
+
+    assert denied == 0
+    assert bucket.calls < 3600 * load
+
+
+def test_rate_limit_leases_still_enforce_the_limit():
+    bucket = FakeBucket()
+    limiter = RateLimiter({"transfer:user": "60/minute"}, take_tokens=bucket.take_tokens, clock=lambda: bucket.now)
+    allowed = 0
+
+    for _ in range(600):
+        bucket.now += 0.05
+        try:
+            limiter.hit("transfer", "user", "u1")
+            allowed += 1
+        except RateLimitExceededError:
+            pass
+
+    # 30 seconds at 20/second: the full bucket plus the refill, no more
+    assert allowed <= 60 + 30
+
+
+def test_wallet_rate_limit_is_not_spent_by_other_users(client, new_user, monkeypatch):
+    from app.schemas import dependencies
+
+    bucket = FakeBucket()
+    limiter = RateLimiter(
+        {"transfer:user": "100/minute", "transfer:wallet": "5/minute"},
+        take_tokens=bucket.take_tokens,
+        clock=lambda: bucket.now,
+    )
+    monkeypatch.setattr(dependencies, "rate_limiter", limiter)
+
+    alice_headers, alice_wallets = new_user()
+    mallory_headers, mallory_wallets = new_user()
+    client.post(f"/wallet/deposit?wallet_id={alice_wallets['USD']}", json={"amount": "100.00"}, headers=alice_headers)
+
+    def transfer(headers, destination):
+        return client.post(
+            "/wallet/transfer",
+            json={"source_wallet_id": alice_wallets["USD"], "destination_wallet_id": destination, "amount": "1.00"},
+            headers=headers,
+        )
+
+    # Mallory hammers Alice's wallet ID: only Mallory's own bucket runs dry
+    statuses = [transfer(mallory_headers, mallory_wallets["USD"]).status_code for _ in range(10)]
+    assert statuses == [404] * 5 + [429] * 5
+
+    assert transfer(alice_headers, mallory_wallets["USD"]).status_code == 200
+
+
+def shard_user(db, created_users, two_shards, currency=Currency.USD) -> tuple[User, UUID]:
+    # A user homed on s1 through the signup path: (user, wallet id)
+    user = User(email=f"s1-{uuid.uuid4().hex[:12]}@example.com", hashed_password="not-a-real-hash", shard="s1")
+    db.add(user)
+    db.flush()
+    created_users.append(user.id)
+
+    [wallet_id] = create_shard_wallets(db, user, currencies=[currency], shard_map=two_shards)
+    db.commit()
+
+    return user, wallet_id
+
+
+def test_cross_shard_transfer_saga(db, funded_wallets, created_users, two_shards, monkeypatch):
+    sender_id, source_id, _ = funded_wallets
+    _, destination_id = shard_user(db, created_users, two_shards)
+    service = ShardedTransferService(
+        db,
+        TransactionService(db, wallet_service=WalletService(db)),
+        home_shard="main",
+        shard_map=two_shards,
+        risk_pipeline=RiskPipeline([], enabled=False),
+    )
+
+    def transfer(destination, amount):
+        return service.transfer(
+            user_id=sender_id,
+            source_wallet_id=source_id,
+            destination_wallet_id=destination,
+            amount=Decimal(amount),
+        )[0]
+
+    def shard_balance(wallet_id):
+        with two_shards.session("s1") as session:
+            return session.get(Wallet, wallet_id).balance
+
+    def destination_down(saga, shard_map):
+        raise OperationalError("INSERT ...", {}, Exception("could not connect to server"))
+
+    # Completes within the request
+    completed = transfer(destination_id, "10.00")
+    assert completed.status == TransactionStatus.COMPLETED
+    assert shard_balance(destination_id) == Decimal("10.00")
+
+    # Applying the credit again (a commit whose acknowledgement got lost)
+    # hits the primary key and changes nothing
+    sharding._apply_credit(db.get(TransferSaga, completed.id), two_shards)
+    assert shard_balance(destination_id) == Decimal("10.00")
+
+    # Destination unreachable: debited and pending, finished by the worker
+    monkeypatch.setattr(sharding, "_apply_credit", destination_down)
+    retried = transfer(destination_id, "15.00")
+    monkeypatch.undo()
+
+    saga = db.get(TransferSaga, retried.id)
+    assert retried.status == TransactionStatus.PENDING
+    assert (saga.status, saga.attempts) == (SagaStatus.PENDING, 1)
+    assert "could not connect" in saga.last_error
+
+    resume_sagas(db, retry_after_seconds=0, shard_map=two_shards)
+    db.expire_all()
+    assert db.get(Transaction, retried.id).status == TransactionStatus.COMPLETED
+    assert shard_balance(destination_id) == Decimal("25.00")
+
+    # Destination wallet gone by the time the credit is retried: refunded
+    _, gone_id = shard_user(db, created_users, two_shards)
+    monkeypatch.setattr(sharding, "_apply_credit", destination_down)
+    compensated = transfer(gone_id, "20.00")
+    monkeypatch.undo()
+
+    with two_shards.session("s1") as session:
+        session.execute(delete(Wallet).where(Wallet.id == gone_id))
+        session.commit()
+
+    assert advance_saga(db, compensated.id, shard_map=two_shards) == SagaStatus.COMPENSATED
+    db.expire_all()
+    assert db.get(Transaction, compensated.id).status == TransactionStatus.FAILED
+    assert db.get(Wallet, source_id).balance == Decimal("975.00")
+
+
+def test_hold_sweeper_expires_holds_on_every_shard(db, created_users, two_shards, monkeypatch):
+    from app.workers import hold_sweeper
+
+    user, wallet_id = shard_user(db, created_users, two_shards)
+
+    with two_shards.session("s1") as s1:
+        service = TransactionService(s1, wallet_service=WalletService(s1))
+        service.deposit(user_id=user.id, wallet_id=wallet_id, amount=Decimal("100.00"))
+        hold_id = service.hold(user_id=user.id, wallet_id=wallet_id, amount=Decimal("40.00"))[0].id
+        s1.execute(update(Hold).where(Hold.id == hold_id).values(expires_at=func.now() - timedelta(minutes=1)))
+        s1.commit()
+
+    monkeypatch.setattr(hold_sweeper, "shard_map", two_shards)
+    assert hold_sweeper.sweep(batch_size=100) >= 1
+
+    with two_shards.session("s1") as s1:
+        assert s1.get(Hold, hold_id).status == HoldStatus.EXPIRED
+        assert s1.get(Wallet, wallet_id).held_balance == 0
+
+
+def test_shard_signup_replaces_orphaned_user_copy(db, created_users, two_shards):
+    email = f"s1-{uuid.uuid4().hex[:12]}@example.com"
+
+    # An earlier signup got its shard rows committed, then failed in the catalog
+    ghost = User(id=uuid.uuid4(), email=email, hashed_password="not-a-real-hash", shard="s1")
+    create_shard_wallets(db, ghost, currencies=[Currency.USD], shard_map=two_shards)
+    db.rollback()
+
+    user = User(email=email, hashed_password="not-a-real-hash", shard="s1")
+    db.add(user)
+    db.flush()
+    created_users.append(user.id)
+    [wallet_id] = create_shard_wallets(db, user, currencies=[Currency.USD], shard_map=two_shards)
+    db.commit()
+
+    with two_shards.session("s1") as session:
+        assert session.execute(select(User.id).where(User.email == email)).scalars().all() == [user.id]
+        assert session.execute(select(Wallet.id).where(Wallet.user_id.in_([ghost.id, user.id]))).scalars().all() == [wallet_id]
+
+
+def test_fx_transfer_uses_the_house_wallets_of_the_callers_shard(db, created_users, two_shards, monkeypatch):
+    house = User(email=f"house-{uuid.uuid4().hex[:12]}@example.com", hashed_password="not-a-real-hash")
+    db.add(house)
+    db.flush()
+    created_users.append(house.id)
+    WalletService(db).create_wallets(str(house.id), currencies=[Currency.EUR])
+    db.commit()
+
+    monkeypatch.setattr(fx.db_settings, "FX_HOUSE_USER_ID", str(house.id))
+    monkeypatch.setattr(fx, "_house_wallet_ids", {})
+
+    # Main already has its EUR wallet; every shard gets the missing ones
+    created = create_fx_house_wallets(db, house.id, currencies=[Currency.USD, Currency.EUR], shard_map=two_shards)
+    db.commit()
+    assert [len(created["main"]), len(created["s1"])] == [1, 2]
+    assert create_fx_house_wallets(db, house.id, currencies=[Currency.USD, Currency.EUR], shard_map=two_shards) == {
+        "main": [],
+        "s1": [],
+    }
+
+    sender, source_id = shard_user(db, created_users, two_shards)
+    _, destination_id = shard_user(db, created_users, two_shards, currency=Currency.EUR)
+    [main_house_eur] = db.execute(
+        select(Wallet.id).where(Wallet.user_id == house.id, Wallet.currency == Currency.EUR.value)
+    ).scalars().all()
+    # Cached for main, which must not leak into s1's lookup
+    assert fx.get_fx_house_wallet_id(db, Currency.EUR.value) == main_house_eur
+
+    with two_shards.session("s1") as s1:
+        s1_wallets = TransactionService(s1, wallet_service=WalletService(s1))
+        s1_wallets.deposit(user_id=sender.id, wallet_id=source_id, amount=Decimal("100.00"))
+        house_eur = s1.execute(
+            select(Wallet.id).where(Wallet.user_id == house.id, Wallet.currency == Currency.EUR.value)
+        ).scalar_one()
+        s1_wallets.deposit(user_id=house.id, wallet_id=house_eur, amount=Decimal("100.00"))
+
+        service = ShardedTransferService(db, s1_wallets, home_shard="s1", shard_map=two_shards)
+        quote, _ = fx.create_quote(str(sender.id), Currency.USD, Currency.EUR, Decimal("10.00"))
+        keys = [f"fx-quote:{quote.quote_id}"]
+
+        try:
+            transaction, _, destination = service.fx_transfer(
+                user_id=sender.id,
+                source_wallet_id=source_id,
+                destination_wallet_id=destination_id,
+                quote=quote,
+            )
+            assert transaction.status == TransactionStatus.COMPLETED
+            assert destination.balance == quote.destination_amount
+            assert s1.get(Wallet, house_eur).balance == Decimal("100.00") - quote.destination_amount
+
+            # No FX saga: a destination on another shard is refused up front
+            quote, _ = fx.create_quote(str(sender.id), Currency.USD, Currency.EUR, Decimal("10.00"))
+            keys.append(f"fx-quote:{quote.quote_id}")
+            with pytest.raises(CrossShardFxTransferError):
+                service.fx_transfer(
+                    user_id=sender.id,
+                    source_wallet_id=source_id,
+                    destination_wallet_id=main_house_eur,
+                    quote=quote,
+                )
+        finally:
+            s1.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(keys)))
+            s1.commit()
+
+
+def test_bulk_provisioning_reports_duplicates_and_failures(db, created_users, user_wallet):
+    from app.services.auth import AuthService, hash_password, verify_password
+
+    existing = db.get(User, user_wallet()[0]).email
+    new, migrated, broken = (f"bulk-{uuid.uuid4().hex[:12]}@example.com" for _ in range(3))
+    migrated_hash = hash_password("Migrated-passw0rd")
+
+    report = AuthService(db, wallet_service=WalletService(db)).bulk_create_users_with_wallets(
+        [
+            ProvisionUser(email=new, password="Test-passw0rd"),
+            ProvisionUser(email=new.upper(), password="Test-passw0rd"),
+            ProvisionUser(email=existing, password="Test-passw0rd"),
+            ProvisionUser(email=migrated, hashed_password=migrated_hash),
+            ProvisionUser(email=broken, hashed_password="not-a-bcrypt-hash"),
+        ],
+        currencies=[Currency.USD, Currency.EUR],
+        chunk_size=2,
+    )
+    users = {user.email: user for user in db.execute(select(User).where(User.email.in_([new, migrated, broken]))).scalars()}
+    created_users.extend(user.id for user in users.values())
+
+    # Duplicates within the batch and against the table are both reported
+    assert report.created == 2
+    assert sorted(report.duplicates) == sorted([new, existing])
+    assert report.failed == {broken: "Unsupported password hash"}
+    assert sorted(users) == sorted([new, migrated])
+
+    # A migrated hash is stored as is, a plain password is hashed
+    assert users[migrated].hashed_password == migrated_hash
+    assert verify_password("Test-passw0rd", users[new].hashed_password)
+    assert sorted(wallet.currency for wallet in users[new].wallets) == ["EUR", "USD"]
+
+
+def test_bulk_provisioning_over_http_is_capped(client, db, created_users, user_wallet):
+    from app.core.config import db_settings
+    from app.services.auth import AuthService
+
+    admin = db.get(User, user_wallet()[0])
+    admin.is_admin = True
+    db.commit()
+    headers = {"Authorization": f"Bearer {AuthService(db, wallet_service=WalletService(db)).issue_tokens(admin).access_token}"}
+
+    def provision(emails, **extra):
+        return client.post(
+            "/admin/users/bulk",
+            json={"users": [{"email": email, "password": "Test-passw0rd", **extra} for email in emails]},
+            headers=headers,
+        )
+
+    too_many = [f"bulk-{i}-{uuid.uuid4().hex[:8]}@example.com" for i in range(db_settings.PROVISION_MAX_USERS_PER_REQUEST + 1)]
+    assert provision(too_many).status_code == 413
+    assert db.execute(select(User.id).where(User.email.in_(too_many))).first() is None
+
+    email = f"bulk-{uuid.uuid4().hex[:12]}@example.com"
+    response = provision([email, admin.email])
+    created_users.extend(db.execute(select(User.id).where(User.email == email)).scalars())
+
+    assert response.status_code == 200
+    assert response.json() == {"created": 1, "duplicates": [admin.email], "failed": {}}
+
+
+def test_signup_sql_budget(client, db, sql_budget, created_users):
+    email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+
+    # user, wallets, and the user read back for the response
+    with sql_budget(3):
+        response = client.post("/auth/signup", json={"email": email, "password": "Test-passw0rd"})
+
+    assert response.status_code == 200
+    created_users.append(db.execute(select(User.id).where(User.email == email)).scalar_one())
+
+
+def test_reused_refresh_token_revokes_its_session(client, db, user_wallet):
+    from app.services.auth import AuthService
+
+    user = db.get(User, user_wallet()[0])
+    auth = AuthService(db, wallet_service=WalletService(db))
+    first, other_session = auth.issue_tokens(user), auth.issue_tokens(user)
+
+    def refresh(tokens):
+        return client.post("/auth/refresh", json={"refresh_token": tokens.refresh_token})
+
+    rotated = refresh(first)
+    assert rotated.status_code == 200
+    rotated = TokenRead(**rotated.json())
+    assert client.get("/wallet/", headers={"Authorization": f"Bearer {rotated.access_token}"}).status_code == 200
+
+    # The rotated-out token comes back: the whole chain is revoked, and the
+    # access tokens handed out so far stop working
+    assert refresh(first).status_code == 401
+    assert refresh(rotated).status_code == 401
+    assert client.get("/wallet/", headers={"Authorization": f"Bearer {rotated.access_token}"}).status_code == 401
+
+    # Other sessions of the user only need to refresh
+    assert refresh(other_session).status_code == 200
+
+
+def test_logout_revokes_existing_access_tokens(client, db, user_wallet):
+    from app.services.auth import AuthService
+
+    user = db.get(User, user_wallet()[0])
+    auth = AuthService(db, wallet_service=WalletService(db))
+    this_session, other_session = auth.issue_tokens(user), auth.issue_tokens(user)
+
+    def bearer(tokens):
+        return {"Authorization": f"Bearer {tokens.access_token}"}
+
+    def refresh(tokens):
+        return client.post("/auth/refresh", json={"refresh_token": tokens.refresh_token})
+
+    assert client.get("/auth/logout", headers=bearer(this_session)).status_code == 200
+    assert client.get("/wallet/", headers=bearer(this_session)).status_code == 401
+    assert client.get("/wallet/", headers=bearer(other_session)).status_code == 401
+    assert refresh(this_session).status_code == 401
+
+    # The other session survives logout, but not logout-all
+    refreshed = refresh(other_session)
+    assert refreshed.status_code == 200
+    refreshed = TokenRead(**refreshed.json())
+    assert client.post("/auth/logout-all", headers=bearer(refreshed)).status_code == 200
+    assert client.get("/wallet/", headers=bearer(refreshed)).status_code == 401
+    assert refresh(refreshed).status_code == 401
+
+
+def test_journal_cannot_debit_another_users_wallet(client, new_user):
+    headers, wallets = new_user()
+    victim_headers, victim_wallets = new_user()
+    client.post(f"/wallet/deposit?wallet_id={victim_wallets['USD']}", json={"amount": "50.00"}, headers=victim_headers)
+
+    response = client.post(
+        "/wallet/journal",
+        json={"legs": [
+            {"wallet_id": victim_wallets["USD"], "amount": "-50.00"},
+            {"wallet_id": wallets["USD"], "amount": "50.00"},
+        ]},
+        headers=headers,
+    )
+
+    assert response.status_code == 404
+    balances = {w["id"]: w["balance"] for w in client.get("/wallet/", headers=victim_headers).json()["wallets"]}
+    assert balances[victim_wallets["USD"]] == "50.00"
+
+
+def test_fx_quote_token_is_not_an_access_token(client, new_user):
+    headers, _ = new_user()
+    response = client.post(
+        "/wallet/fx/quote",
+        json={"source_currency": "USD", "destination_currency": "EUR", "amount": "10.00"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    # Signed with the same secret, but it has no user claim
+    quote_headers = {"Authorization": f"Bearer {response.json()['quote_token']}"}
+    assert client.get("/wallet/", headers=quote_headers).status_code == 401
+
+
+@pytest.mark.parametrize("endpoint", SQL_BUDGETS)
+def test_wallet_endpoint_sql_budget(client, new_user, sql_budget, endpoint):
+    headers, wallets = new_user()
+    _, other_wallets = new_user()
+    _, fee_wallets = new_user()
+    wallet_id = wallets["USD"]
+
+    client.post(f"/wallet/deposit?wallet_id={wallet_id}", json={"amount": "100.00"}, headers=headers)
+
+    requests = {
+        "wallets": lambda: client.get("/wallet/", headers=headers),
+        "deposit": lambda: client.post(
+            f"/wallet/deposit?wallet_id={wallet_id}", json={"amount": "10.00"}, headers=headers
+        ),
+        "withdraw": lambda: client.post(
+            f"/wallet/withdraw?wallet_id={wallet_id}", json={"amount": "10.00"}, headers=headers
+        ),
+        "transfer": lambda: client.post(
+            "/wallet/transfer",
+            json={
+                "source_wallet_id": wallet_id,
+                "destination_wallet_id": other_wallets["USD"],
+                "amount": "10.00",
+            },
+            headers=headers,
+        ),
+        "journal": lambda: client.post(
+            "/wallet/journal",
+            json={
+                "legs": [
+                    {"wallet_id": wallet_id, "amount": "-10.00"},
+                    {"wallet_id": other_wallets["USD"], "amount": "9.00"},
+                    {"wallet_id": fee_wallets["USD"], "amount": "1.00"},
+                ],
+            },
+            headers=headers,
+        ),
+        "history": lambda: client.get(f"/wallet/transactions?wallet_id={wallet_id}", headers=headers),
+    }
+
+    with sql_budget(SQL_BUDGETS[endpoint]):
+        response = requests[endpoint]()
+
+    assert response.status_code == 200, response.text
+
+
+def test_profiler_follows_request_into_worker_thread_on_shard(two_shards):
+    import contextvars
+
+    from sqlalchemy import event
+
+    from app.core import profiling
+
+    class App:
+        def add_middleware(self, *args, **kwargs):
+            pass
+
+    profiling.install_profiling(App(), two_shards.engines)
+    profile = profiling.RequestProfile("GET", "/wallet", "header")
+    sampler = profiling.StackSampler()
+    sampler._active.add(profile)
+    queried = threading.Event()
+    done = threading.Event()
+
+    def endpoint():
+        with two_shards.session("s1") as session:
+            session.execute(text("SELECT 1"))
+        queried.set()
+        done.wait(5)
+
+    def run_in_request():
+        profiling._current_profile.set(profile)
+        endpoint()
+
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(run_in_request,))
+    worker.start()
+
+    try:
+        assert queried.wait(5)
+        sampler._sample()
+    finally:
+        done.set()
+        worker.join()
+        sampler.remove(profile)
+        for engine in two_shards.engines:
+            event.remove(engine, "before_cursor_execute", profiling._before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", profiling._after_cursor_execute)
+
+    # Shard statements are timed, and the worker's stack counts for the request
+    assert [s["statement"] for s in profile.statements] == ["SELECT 1"]
+    assert any(endpoint.__code__ in stack for stack in profile.samples)
+    assert worker.ident not in profiling._thread_profiles